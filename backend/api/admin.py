@@ -1,6 +1,16 @@
 from django.contrib import admin
 
-from .models import Chat, ChatMessage, Note
+from .models import (
+    Chat,
+    ChatArchive,
+    ChatEvent,
+    ChatMessage,
+    HelpPrecomputeStats,
+    LearnerStats,
+    LLMJob,
+    Note,
+    Scenario,
+)
 
 
 @admin.register(Chat)
@@ -16,17 +26,85 @@ class ChatAdmin(admin.ModelAdmin):
         'created_at',
         'updated_at',
     ]
-    list_filter = ['completed', 'created_at', 'user']
+    list_filter = ['completed', 'archived', 'created_at', 'user']
     search_fields = ['title', 'user__username']
     readonly_fields = ['created_at', 'updated_at']
+    raw_id_fields = ['scenario']
+
+
+@admin.register(Scenario)
+class ScenarioAdmin(admin.ModelAdmin):
+    list_display = ['id', 'content_hash', 'created_at']
+    search_fields = ['content_hash']
+    readonly_fields = ['content_hash', 'data', 'created_at']
 
 
 @admin.register(ChatMessage)
 class ChatMessageAdmin(admin.ModelAdmin):
-    list_display = ['id', 'chat', 'role', 'timestamp', 'relevance_score']
+    list_display = ['id', 'chat', 'seq', 'role', 'timestamp', 'relevance_score']
     list_filter = ['role', 'timestamp']
     search_fields = ['content', 'chat__title']
     readonly_fields = ['timestamp']
 
 
+@admin.register(ChatArchive)
+class ChatArchiveAdmin(admin.ModelAdmin):
+    list_display = ['chat', 'original_size', 'archived_at']
+    readonly_fields = ['chat', 'original_size', 'archived_at']
+    exclude = ['payload']
+
+
+@admin.register(LearnerStats)
+class LearnerStatsAdmin(admin.ModelAdmin):
+    list_display = [
+        'user',
+        'chat_count',
+        'completed_count',
+        'average_score',
+        'latest_score',
+        'updated_at',
+    ]
+    search_fields = ['user__username']
+    readonly_fields = [
+        'user',
+        'chat_count',
+        'completed_count',
+        'score_total',
+        'scored_count',
+        'latest_score',
+        'latest_graded_at',
+        'updated_at',
+    ]
+
+
+@admin.register(HelpPrecomputeStats)
+class HelpPrecomputeStatsAdmin(admin.ModelAdmin):
+    list_display = ['day', 'help_requests', 'served', 'precomputed', 'cancelled']
+    readonly_fields = ['day', 'help_requests', 'served', 'precomputed', 'cancelled']
+
+
+@admin.register(ChatEvent)
+class ChatEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'chat', 'kind', 'message', 'created_at']
+    list_filter = ['kind', 'created_at']
+    readonly_fields = ['created_at']
+
+
+@admin.register(LLMJob)
+class LLMJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'kind',
+        'chat',
+        'status',
+        'priority',
+        'attempts',
+        'locked_by',
+        'created_at',
+        'finished_at',
+    ]
+    list_filter = ['kind', 'status']
+    readonly_fields = ['created_at', 'locked_at', 'finished_at']
+
+
 admin.site.register(Note)
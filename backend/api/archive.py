@@ -0,0 +1,157 @@
+"""
+Cold archive for completed chats.
+
+Graded chats are never changed again, but their ``messages``,
+``help_responses`` and ``grading_data`` JSON stays in the hot ``api_chat``
+table. archive_chat() moves those payloads into a gzip-compressed
+ChatArchive row and empties them in place; the chat itself (title, status,
+score, counters...) stays where listings expect it. Its ChatMessage rows
+are kept, so archived chats stay in transcript search (see api.search).
+
+Readers that need the payloads call rehydrate(), which fills them back in
+on the instance from the archive. Writes go through restore_chat() first,
+which moves them back into the hot table.
+
+Archiving runs from ``manage.py archive_chats`` and, when
+CHAT_ARCHIVE_AFTER_DAYS is set, periodically in ``run_llm_workers``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .message_store import sync_message_rows
+from .models import Chat, ChatArchive
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from django.db.models import QuerySet
+
+
+logger = logging.getLogger(__name__)
+
+# Columns moved to the archive, and their value while a chat is archived
+ARCHIVED_FIELDS = {
+    'messages': [],
+    'help_responses': [],
+    'grading_data': None,
+}
+
+
+def archivable_chats(older_than_days: int) -> QuerySet[Chat]:
+    """Graded chats untouched for ``older_than_days`` days, oldest first."""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return Chat.objects.filter(
+        completed=True,
+        status=Chat.STATUS_COMPLETE,
+        archived=False,
+        updated_at__lt=cutoff,
+    ).order_by('updated_at', 'pk')
+
+
+def archive_chat(chat: Chat) -> bool:
+    """
+    Move a completed chat's JSON payloads into its compressed archive row.
+
+    Conditional on the chat's version, so a chat changed since it was read
+    is left alone. Does not change ``updated_at`` or the version: what the
+    API returns for the chat stays the same.
+
+    Returns:
+        Whether the chat was archived
+    """
+    if chat.archived or chat.status != Chat.STATUS_COMPLETE:
+        return False
+    raw = json.dumps({name: getattr(chat, name) for name in ARCHIVED_FIELDS}).encode()
+    with transaction.atomic():
+        updated = Chat.objects.filter(
+            pk=chat.pk, version=chat.version, archived=False
+        ).update(archived=True, **ARCHIVED_FIELDS)
+        if not updated:
+            return False
+        ChatArchive.objects.create(
+            chat_id=chat.pk,
+            payload=gzip.compress(raw),
+            original_size=len(raw),
+        )
+    chat.archived = True
+    return True
+
+
+def _load_payloads(chat: Chat) -> dict[str, Any]:
+    payload = ChatArchive.objects.values_list('payload', flat=True).get(chat_id=chat.pk)
+    return json.loads(gzip.decompress(payload))
+
+
+def archived_payloads(chat_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+    """The archived payloads of several chats, read in one query."""
+    archives = ChatArchive.objects.filter(chat_id__in=list(chat_ids)).values_list(
+        'chat_id', 'payload'
+    )
+    return {
+        chat_id: json.loads(gzip.decompress(payload)) for chat_id, payload in archives
+    }
+
+
+def rehydrate(chat: Chat) -> Chat:
+    """Fill an archived chat's JSON payloads back in, on this instance only."""
+    if chat.archived:
+        for name, value in _load_payloads(chat).items():
+            setattr(chat, name, value)
+    return chat
+
+
+def restore_chat(chat: Chat) -> Chat:
+    """
+    Move an archived chat's payloads back into the hot table before a write.
+
+    Like archiving, this doesn't change what the API returns, so the
+    version and ``updated_at`` are left as they are.
+    """
+    if not chat.archived:
+        return chat
+    payloads = _load_payloads(chat)
+    with transaction.atomic():
+        Chat.objects.filter(pk=chat.pk).update(archived=False, **payloads)
+        ChatArchive.objects.filter(chat_id=chat.pk).delete()
+        for name, value in payloads.items():
+            setattr(chat, name, value)
+        chat.archived = False
+        sync_message_rows(chat)
+    return chat
+
+
+def archive_completed_chats(older_than_days: int, limit: int) -> int:
+    """
+    Archive up to ``limit`` chats that have been graded for a while.
+
+    Returns:
+        Number of chats archived
+    """
+    archived = 0
+    for chat in archivable_chats(older_than_days)[:limit]:
+        try:
+            if archive_chat(chat):
+                archived += 1
+        except Exception:
+            logger.exception(f'Failed to archive chat {chat.pk}')
+    return archived
+
+
+def run_archive_sweep() -> int:
+    """One round of archiving as configured by CHAT_ARCHIVE_* (0 if disabled)."""
+    if settings.CHAT_ARCHIVE_AFTER_DAYS <= 0:
+        return 0
+    return archive_completed_chats(
+        settings.CHAT_ARCHIVE_AFTER_DAYS, settings.CHAT_ARCHIVE_BATCH_SIZE
+    )
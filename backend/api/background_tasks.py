@@ -2,25 +2,182 @@
 Background task handlers for async LLM operations.
 """
 
+from __future__ import annotations
+
 import logging
-import threading
+import time
+from typing import TYPE_CHECKING, NamedTuple, TypeVar
 
+from django.conf import settings
+from django.db.models import F
 from django.utils import timezone
 
-from .models import Chat
+from .chat_events import publish_chat_event
+from .context_budget import plan_context, summary_boundary
+from .db_functions import JSONArrayAppend, JSONArrayWithout
+from .learner_stats import record_chat_graded
+from .message_store import (
+    WITHOUT_PARTIAL_REPLY,
+    append_messages,
+    load_messages,
+    load_token_counts,
+)
+from .models import Chat, ChatEvent, ChatVersionConflictError, LLMJob
 from .openwebui_client import OpenWebUIClient
-from .prompts import CHAT_GRADING_SYSTEM_PROMPT, CHAT_HELP_SYSTEM_PROMPT
-from .utils import format_conversation_for_llm
+from .prompts import (
+    CHAT_GRADING_SYSTEM_PROMPT,
+    CHAT_HELP_SYSTEM_PROMPT,
+    CONVERSATION_SUMMARY_SYSTEM_PROMPT,
+)
+from .speculative_help import record_speculative_help
+from .utils import check_max_turns_not_exceeded, format_conversation_for_llm
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
 
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+
+class TurnResult(NamedTuple):
+    """Outcome of run_chat_message, for the follow-up jobs it calls for."""
+
+    # Whether the resident's reply was saved
+    replied: bool
+    # Whether messages had to be left out of the resident's context, so the
+    # conversation summary should be extended (see run_summary)
+    summary_due: bool
+
+
+# Speaker labels in the transcript given to the summarizer
+SUMMARY_ROLE_LABELS = {
+    'user': 'Care worker',
+    'assistant': 'Resident',
+    'scenario': 'Action',
+}
+
+
+def _write_with_retry(chat: Chat, write: Callable[[Chat], T]) -> T:
+    """
+    Run ``write(chat)``, reloading the chat and retrying on a version conflict.
+
+    ``write`` must work from the chat it is given (not from state read
+    earlier), since after a conflict it is called again with a fresh copy.
+    Gives up after CHAT_WRITE_RETRIES retries.
+    """
+    for attempt in range(settings.CHAT_WRITE_RETRIES + 1):
+        try:
+            return write(chat)
+        except ChatVersionConflictError:
+            if attempt == settings.CHAT_WRITE_RETRIES:
+                raise
+            logger.info(f'Chat {chat.pk} changed concurrently, retrying write')
+            chat.refresh_from_db()
+    raise AssertionError('unreachable')  # pragma: no cover
+
+
+def _record_error(chat_id: int, operation: str, message: str, error: Exception) -> None:
+    """Add a failed operation to the chat's diagnostics log (not its transcript)."""
+    ChatEvent.objects.create(
+        chat_id=chat_id,
+        kind=ChatEvent.KIND_ERROR,
+        message=message,
+        data={'operation': operation, 'error_type': type(error).__name__},
+    )
+
+
+def _without_help_placeholder(turn: int) -> JSONArrayWithout:
+    """Chat.help_responses without the processing placeholder for ``turn``."""
+    return JSONArrayWithout('help_responses', {'status': 'processing', 'turn': turn})
+
+
+def _publish_last_message(chat_id: int, messages: list[dict]) -> None:
+    """Push the newest message; clients replace everything from its index on."""
+    publish_chat_event(
+        chat_id, 'message', {'index': len(messages) - 1, 'message': messages[-1]}
+    )
+
+
+def _publish_help(chat: Chat) -> None:
+    """Push the newest help response; clients replace everything from its index on."""
+    help_responses = chat.help_responses or []
+    publish_chat_event(
+        chat.pk,
+        'help',
+        {'index': len(help_responses) - 1, 'help_response': help_responses[-1]},
+    )
+
+
+def _publish_status(chat: Chat) -> None:
+    """Push a status transition with the current turn count."""
+    publish_chat_event(
+        chat.pk,
+        'status',
+        {'status': chat.status, 'interaction_count': chat.interaction_count},
+    )
+
+
+def _stream_assistant_reply(
+    chat: Chat,
+    messages: list[dict],
+    client: OpenWebUIClient,
+    messages_for_llm: list[dict],
+) -> str:
+    """
+    Stream the resident reply, saving the partial assistant message as it grows.
+
+    The partial message is flagged ``streaming: True`` and written at most
+    LLM_STREAM_WRITES_PER_SECOND times per second (the first chunk is written
+    immediately), so polling clients see text after the time-to-first-token.
+
+    A partial write that loses a version race is skipped (the next one
+    carries the text), and writes stop once the chat leaves ``thinking``.
+
+    Returns:
+        The complete response text
+    """
+    writes_per_second = settings.LLM_STREAM_WRITES_PER_SECOND
+    min_interval = 1 / writes_per_second if writes_per_second > 0 else None
+    last_write = None
+    parts = []
+
+    for delta in client.stream_conversation_response(
+        model='slc-resident', messages=messages_for_llm
+    ):
+        parts.append(delta)
+        now = time.monotonic()
+        if min_interval is None or (
+            last_write is not None and now - last_write < min_interval
+        ):
+            continue
+        last_write = now
+        if chat.status != Chat.STATUS_THINKING:
+            continue
+        partial = {'role': 'assistant', 'content': ''.join(parts), 'streaming': True}
+        # Replace the previous partial in place; bumping updated_at also keeps
+        # the recovery sweeper away while tokens flow
+        try:
+            chat.apply_update(
+                messages=JSONArrayAppend(WITHOUT_PARTIAL_REPLY, [partial])
+            )
+        except ChatVersionConflictError:
+            chat.refresh_from_db(fields=['status', 'version'])
+            continue
+        publish_chat_event(
+            chat.pk, 'partial', {'index': len(messages), 'content': partial['content']}
+        )
+
+    return ''.join(parts)
 
-def process_chat_message_async(
+
+def run_chat_message(
     chat_id: int, user_message: str, openwebui_token: str, is_action: bool = False
-):
+) -> TurnResult:
     """
-    Process a chat message in the background.
+    Process a chat message (runs on a worker thread).
     Updates chat status and saves response when complete.
 
     Args:
@@ -28,326 +185,396 @@ def process_chat_message_async(
         user_message: The message content
         openwebui_token: User's OpenWebUI token
         is_action: If True, add a scenario message before the user message
-    """
-
-    def task():
-        try:
-            chat = Chat.objects.get(pk=chat_id)
-
-            # Add messages to chat
-            messages = chat.messages.copy() if chat.messages else []
 
-            # If this is an action, add scenario message for display
-            # and prepare a user message for the LLM
-            if is_action:
-                # Add scenario message for display in UI (yellow box)
-                messages.append(
-                    {
-                        'role': 'scenario',
-                        'content': user_message,
-                    }
-                )
-
-                # Prepare messages for LLM - convert scenario to user message
-                messages_for_llm = []
-                for msg in messages:
-                    if msg.get('role') == 'scenario':
-                        # Convert scenario messages to user messages for LLM
-                        messages_for_llm.append(
-                            {
-                                'role': 'user',
-                                'content': f'[Action: {msg["content"]}]',
-                            }
-                        )
-                    else:
-                        messages_for_llm.append(msg)
-            else:
-                # Regular user message
-                messages.append(
-                    {
-                        'role': 'user',
-                        'content': user_message,
-                    }
-                )
-                # For regular messages, send messages as-is
-                messages_for_llm = messages
-
-            # Update status to thinking
-            chat.status = Chat.STATUS_THINKING
-            chat.messages = messages
-            chat.save()
-
-            # Limit conversation history to prevent token overflow
-            # Qwen models can be sensitive to context length, especially through OpenRouter
-            # Keep system message + last N exchanges to stay under token limits
-            import os
-
-            MAX_CONVERSATION_EXCHANGES = int(
-                os.getenv('MAX_CONVERSATION_EXCHANGES', '6')
-            )  # Reduced to 6 for Qwen (12 messages max)
-
-            messages_for_llm_limited = []
-            system_messages = [m for m in messages_for_llm if m.get('role') == 'system']
-            non_system_messages = [
-                m for m in messages_for_llm if m.get('role') != 'system'
-            ]
-
-            # Always include system message (scenario instructions)
-            messages_for_llm_limited.extend(system_messages)
-
-            # Keep only recent conversation history
-            if len(non_system_messages) > (MAX_CONVERSATION_EXCHANGES * 2):
-                logger.info(
-                    f'Chat {chat_id}: Trimming conversation history from {len(non_system_messages)} to {MAX_CONVERSATION_EXCHANGES * 2} messages'
-                )
-                # Keep last N exchanges (N user + N assistant messages)
-                messages_for_llm_limited.extend(
-                    non_system_messages[-(MAX_CONVERSATION_EXCHANGES * 2) :]
+    Returns:
+        Whether the reply was saved and whether the summary is due
+    """
+    try:
+        chat = Chat.objects.get(pk=chat_id)
+        new_message = {
+            'role': 'scenario' if is_action else 'user',
+            'content': user_message,
+        }
+
+        def store_user_message(chat: Chat) -> list[dict]:
+            # Current transcript (without a partial reply left by an interrupted stream)
+            messages = load_messages(chat)
+            # A re-queued job may already have stored this message before its
+            # worker died; don't append it twice
+            if messages and messages[-1] == new_message:
+                chat.apply_update(
+                    status=Chat.STATUS_THINKING, messages=WITHOUT_PARTIAL_REPLY
                 )
-            else:
-                messages_for_llm_limited.extend(non_system_messages)
-
-            # Estimate total tokens (rough: 4 chars = 1 token for English, Qwen uses similar tokenization)
-            total_chars = sum(
-                len(str(m.get('content', ''))) for m in messages_for_llm_limited
-            )
-            estimated_tokens = total_chars // 4
-            logger.info(
-                f'Chat {chat_id}: Sending {len(messages_for_llm_limited)} messages (~{estimated_tokens} tokens) to LLM (Qwen model)'
+                return messages
+            # Store the message (scenario messages show as a yellow box in
+            # the UI) and set status to thinking
+            return append_messages(
+                chat, messages, [new_message], status=Chat.STATUS_THINKING
             )
 
-            # Qwen models through OpenRouter may have stricter limits
-            if estimated_tokens > 4000:  # Conservative limit for stability
-                logger.warning(
-                    f'Chat {chat_id}: High token count ({estimated_tokens}), may fail with Qwen through OpenRouter'
-                )
-                # If still too large, trim more aggressively
-                if estimated_tokens > 6000:
-                    # Further reduce to last 4 exchanges if needed
-                    logger.warning(
-                        f'Chat {chat_id}: Token count very high, reducing to last 4 exchanges'
-                    )
-                    messages_for_llm_limited = (
-                        system_messages + non_system_messages[-8:]
+        messages = _write_with_retry(chat, store_user_message)
+
+        # Content token counts, cached on the message rows
+        token_counts = load_token_counts(chat, messages)
+
+        # If this is an action, prepare a user message for the LLM
+        if is_action:
+            # Prepare messages for LLM - convert scenario to user message
+            messages_for_llm = []
+            for i, msg in enumerate(messages):
+                if msg.get('role') == 'scenario':
+                    # Convert scenario messages to user messages for LLM
+                    messages_for_llm.append(
+                        {
+                            'role': 'user',
+                            'content': f'[Action: {msg["content"]}]',
+                        }
                     )
-
-            # Get LLM response using the limited message history
-            client = OpenWebUIClient(user_token=openwebui_token)
+                    # The wrapped text is counted afresh
+                    token_counts[i] = None
+                else:
+                    messages_for_llm.append(msg)
+        else:
+            # For regular messages, send messages as-is
+            messages_for_llm = messages
+
+        _publish_last_message(chat_id, messages)
+        _publish_status(chat)
+
+        # Keep the system message (scenario instructions), the summary of
+        # earlier turns and as much recent history as fits the model's
+        # context window
+        messages_for_llm_limited, prompt_tokens, dropped = plan_context(
+            messages_for_llm,
+            'slc-resident',
+            token_counts,
+            summary=chat.summary,
+            summary_through=chat.summary_through,
+        )
+        logger.info(
+            f'Chat {chat_id}: Sending {len(messages_for_llm_limited)} of '
+            f'{len(messages_for_llm)} messages (~{prompt_tokens} tokens, '
+            f'{chat.summary_through} summarized, {dropped} left out) to LLM'
+        )
+
+        # Get LLM response using the limited message history
+        client = OpenWebUIClient(user_token=openwebui_token)
+        if settings.LLM_STREAM_RESPONSES:
+            response_content = _stream_assistant_reply(
+                chat, messages, client, messages_for_llm_limited
+            )
+        else:
             response_content = client.get_conversation_response(
                 model='slc-resident',
                 messages=messages_for_llm_limited,
             )
 
-            # Add assistant response to messages
-            messages.append(
-                {
-                    'role': 'assistant',
-                    'content': response_content,
-                }
-            )
-
-            # Update chat
-            chat.messages = messages
-            chat.interaction_count = len(
-                [m for m in messages if m.get('role') == 'user']
-            )
-            chat.status = Chat.STATUS_READY
-            chat.save()
-
-        except Exception as e:
-            # Log the full error details
-            logger.error(
-                f'Error in process_chat_message_async for chat_id={chat_id}: {e!s}',
-                exc_info=True,
-            )
-
-            # On error, update chat with error status
-            try:
-                chat = Chat.objects.get(pk=chat_id)
-                chat.status = Chat.STATUS_READY
-                # Store detailed error in messages
-                messages = chat.messages.copy() if chat.messages else []
-                messages.append(
+        # Add assistant response to messages and update chat
+        def store_reply(chat: Chat) -> list[dict]:
+            messages = load_messages(chat)
+            return append_messages(
+                chat,
+                messages,
+                [
                     {
-                        'role': 'system',
-                        'content': f'Error processing message: {e!s}',
+                        'role': 'assistant',
+                        'content': response_content,
                     }
-                )
-                chat.messages = messages
-                chat.save()
-                logger.info(f'Updated chat {chat_id} with error message')
-            except Exception as save_error:
-                logger.error(f'Failed to save error to chat {chat_id}: {save_error!s}')
-                # Chat may have been deleted
+                ],
+                status=Chat.STATUS_READY,
+            )
 
-    # Start background thread
-    thread = threading.Thread(target=task)
-    thread.daemon = True
-    thread.start()
+        messages = _write_with_retry(chat, store_reply)
+        _publish_last_message(chat_id, messages)
+        _publish_status(chat)
 
+    except Exception as e:
+        # Log the full error details
+        logger.error(
+            f'Error in run_chat_message for chat_id={chat_id}: {e!s}',
+            exc_info=True,
+        )
 
-def process_help_request_async(chat_id, user_token):
-    """
-    Process help request in a background thread.
-    """
-
-    def task():
+        # On error, record it in the chat's diagnostics log and reset status
         try:
             chat = Chat.objects.get(pk=chat_id)
-
-            # Set chat status to getting_help
-            chat.status = Chat.STATUS_GETTING_HELP
-
-            # Calculate which turn this is
-            current_turn = len([m for m in chat.messages if m.get('role') == 'user'])
-
-            # Add processing placeholder to help_responses
-            help_responses = chat.help_responses or []
-            help_responses.append(
-                {
-                    'turn': current_turn,
-                    'timestamp': timezone.now().isoformat(),
-                    'help_text': '',
-                    'status': 'processing',
-                }
+            _record_error(
+                chat_id, LLMJob.KIND_CHAT_MESSAGE, f'Error processing message: {e!s}', e
             )
-            chat.help_responses = help_responses
-            chat.save()
-
-            # Format conversation for help request
-            conversation_text = format_conversation_for_llm(chat)
-
-            # Prepare messages for help
-            messages = [
-                {'role': 'system', 'content': CHAT_HELP_SYSTEM_PROMPT},
-                {'role': 'user', 'content': conversation_text},
-            ]
-
-            # Get help response
-            client = OpenWebUIClient(user_token=user_token)
-            help_text = client.get_help_response(messages)
+            # Drop any partial reply; the transcript ends with the unanswered
+            # message, which the learner can send again
+            _write_with_retry(
+                chat,
+                lambda chat: chat.apply_update(
+                    status=Chat.STATUS_READY, messages=WITHOUT_PARTIAL_REPLY
+                ),
+            )
+            messages = load_messages(chat)
+            if messages:
+                _publish_last_message(chat_id, messages)
+            _publish_status(chat)
+            logger.info(f'Recorded error for chat {chat_id}')
+        except Exception as save_error:
+            logger.error(f'Failed to save error to chat {chat_id}: {save_error!s}')
+            # Chat may have been deleted
+        return TurnResult(replied=False, summary_due=False)
+    else:
+        return TurnResult(replied=True, summary_due=dropped > 0)
+
+
+def run_summary(chat_id: int, openwebui_token: str) -> None:
+    """
+    Extend a chat's conversation summary (low-priority job).
 
-            # Update help_responses with result
+    Condenses the messages between the current summary boundary and the
+    new one (see context_budget.summary_boundary) into the summary, so the
+    resident keeps what was said in turns that no longer fit its context.
+    The summary is saved only if no other job moved the boundary first;
+    it is not a version change, as clients never see it.
+    """
+    chat = Chat.objects.get(pk=chat_id)
+    messages = load_messages(chat)
+    through = summary_boundary(
+        messages, 'slc-resident', load_token_counts(chat, messages)
+    )
+    if through <= chat.summary_through:
+        return
+
+    transcript = '\n'.join(
+        f'{SUMMARY_ROLE_LABELS[m["role"]]}: {m.get("content", "")}'
+        for m in messages[chat.summary_through : through]
+        if m.get('role') in SUMMARY_ROLE_LABELS
+    )
+    previous = chat.summary or '(none yet)'
+    client = OpenWebUIClient(user_token=openwebui_token)
+    summary = client.get_summary_response(
+        [
+            {'role': 'system', 'content': CONVERSATION_SUMMARY_SYSTEM_PROMPT},
+            {
+                'role': 'user',
+                'content': f'SUMMARY SO FAR:\n{previous}\n\n'
+                f'CONVERSATION TO ADD:\n{transcript}',
+            },
+        ]
+    )
+
+    updated = Chat.objects.filter(
+        pk=chat_id, summary_through=chat.summary_through
+    ).update(summary=summary.strip(), summary_through=through)
+    if updated:
+        logger.info(f'Chat {chat_id}: summary now covers {through} messages')
+
+
+def _help_messages(chat: Chat) -> list[dict[str, str]]:
+    """The helper tutor prompt for the chat's current turn."""
+    return [
+        {'role': 'system', 'content': CHAT_HELP_SYSTEM_PROMPT},
+        {'role': 'user', 'content': format_conversation_for_llm(chat)},
+    ]
+
+
+def run_help_request(chat_id, user_token):
+    """
+    Process a help request (runs on a worker thread).
+    """
+    try:
+        chat = Chat.objects.get(pk=chat_id)
+
+        # The turn is the number of user messages so far
+        current_turn = chat.interaction_count
+
+        # Set chat status to getting_help with a processing placeholder (in
+        # place of the one the view added)
+        _write_with_retry(
+            chat,
+            lambda chat: chat.apply_update(
+                status=Chat.STATUS_GETTING_HELP,
+                help_responses=JSONArrayAppend(
+                    _without_help_placeholder(current_turn),
+                    [
+                        {
+                            'turn': current_turn,
+                            'timestamp': timezone.now().isoformat(),
+                            'help_text': '',
+                            'status': 'processing',
+                        }
+                    ],
+                ),
+            ),
+        )
+        _publish_help(chat)
+        _publish_status(chat)
+
+        # Get help response
+        client = OpenWebUIClient(user_token=user_token)
+        help_text = client.get_help_response(_help_messages(chat))
+
+        # Replace the processing placeholder with the result and reset
+        # chat status to ready
+        help_entry = {
+            'turn': current_turn,
+            'timestamp': timezone.now().isoformat(),
+            'help_text': help_text,
+            'status': 'completed',
+        }
+        _write_with_retry(
+            chat,
+            lambda chat: chat.apply_update(
+                status=Chat.STATUS_READY,
+                help_responses=JSONArrayAppend(
+                    _without_help_placeholder(current_turn), [help_entry]
+                ),
+                help_response_count=F('help_response_count') + 1,
+            ),
+        )
+        _publish_help(chat)
+        _publish_status(chat)
+
+    except Exception as e:
+        # Log the full error details
+        logger.error(
+            f'Error in run_help_request for chat_id={chat_id}: {e!s}',
+            exc_info=True,
+        )
+
+        # On error, mark help request as failed and reset status
+        try:
             chat = Chat.objects.get(pk=chat_id)
-            help_responses = chat.help_responses or []
-            # Remove the processing placeholder
-            help_responses = [
-                h
-                for h in help_responses
-                if h.get('status') != 'processing' or h.get('turn') != current_turn
-            ]
+            current_turn = chat.interaction_count
 
+            # Replace the processing placeholder with the error and reset
+            # chat status to ready even on error
             help_entry = {
                 'turn': current_turn,
                 'timestamp': timezone.now().isoformat(),
-                'help_text': help_text,
-                'status': 'completed',
+                'help_text': f'Error getting help: {e!s}',
+                'status': 'error',
             }
-            help_responses.append(help_entry)
-            chat.help_responses = help_responses
-
-            # Reset chat status to ready
-            chat.status = Chat.STATUS_READY
-            chat.save()
-
-        except Exception as e:
-            # Log the full error details
-            logger.error(
-                f'Error in process_help_request_async for chat_id={chat_id}: {e!s}',
-                exc_info=True,
+            _write_with_retry(
+                chat,
+                lambda chat: chat.apply_update(
+                    status=Chat.STATUS_READY,
+                    help_responses=JSONArrayAppend(
+                        _without_help_placeholder(current_turn), [help_entry]
+                    ),
+                    help_response_count=F('help_response_count') + 1,
+                ),
             )
+            _publish_help(chat)
+            _publish_status(chat)
+            _record_error(chat_id, LLMJob.KIND_HELP, help_entry['help_text'], e)
+        except Exception:  # nosec B110
+            pass  # Chat may have been deleted - nothing we can do
 
-            # On error, mark help request as failed and reset status
-            try:
-                chat = Chat.objects.get(pk=chat_id)
-                help_responses = chat.help_responses or []
-                current_turn = len(
-                    [m for m in chat.messages if m.get('role') == 'user']
-                )
 
-                # Remove processing placeholder
-                help_responses = [
-                    h
-                    for h in help_responses
-                    if h.get('status') != 'processing' or h.get('turn') != current_turn
-                ]
-
-                help_entry = {
-                    'turn': current_turn,
-                    'timestamp': timezone.now().isoformat(),
-                    'help_text': f'Error getting help: {e!s}',
-                    'status': 'error',
-                }
-                help_responses.append(help_entry)
-                chat.help_responses = help_responses
-
-                # Reset chat status to ready even on error
-                chat.status = Chat.STATUS_READY
-                chat.save()
-            except Exception:  # nosec B110
-                pass  # Chat may have been deleted - nothing we can do
-
-    # Start background thread
-    thread = threading.Thread(target=task)
-    thread.daemon = True
-    thread.start()
-
-
-def process_grading_async(chat_id: int, openwebui_token: str):
+def run_help_precompute(chat_id: int, openwebui_token: str, version: int) -> None:
     """
-    Process chat grading in the background.
+    Precompute help for the current turn (low-priority, speculative job).
+
+    Queued after a resident reply at chat ``version``; dropped without an
+    LLM call if the chat has changed since. The help is saved only if the
+    chat is still at that version, and without bumping it, so clients
+    never see it (see api.speculative_help).
+    """
+    chat = Chat.objects.get(pk=chat_id)
+    if chat.version != version:
+        record_speculative_help(cancelled=1)
+        return
+    # Skip turns that weren't answered or that help can't be asked for
+    messages = chat.messages or []
+    help_responses = chat.help_responses or []
+    if (
+        not messages
+        or messages[-1].get('role') != 'assistant'
+        or chat.completed
+        or (help_responses and help_responses[-1].get('turn') == chat.interaction_count)
+        or check_max_turns_not_exceeded(chat) is not None
+    ):
+        return
+
+    client = OpenWebUIClient(user_token=openwebui_token)
+    help_text = client.get_help_response(_help_messages(chat))
+    record_speculative_help(precomputed=1)
+
+    saved = Chat.objects.filter(pk=chat_id, version=version).update(
+        speculative_help=help_text, speculative_help_version=version
+    )
+    if not saved:
+        logger.info(f'Chat {chat_id}: moved on, precomputed help discarded')
+
+
+def run_grading(chat_id: int, openwebui_token: str):
+    """
+    Process chat grading (runs on a worker thread).
     Updates chat with grading data when complete.
     """
-
-    def task():
+    try:
+        chat = Chat.objects.get(pk=chat_id)
+        was_completed = chat.completed
+
+        # Format conversation for grading request
+        conversation_text = format_conversation_for_llm(chat)
+
+        # Prepare messages for grading
+        messages = [
+            {'role': 'system', 'content': CHAT_GRADING_SYSTEM_PROMPT},
+            {'role': 'user', 'content': conversation_text},
+        ]
+
+        # Get grading response
+        client = OpenWebUIClient(user_token=openwebui_token)
+        grading_data = client.get_grading_response(messages)
+
+        # Update chat with results
+        _write_with_retry(
+            chat,
+            lambda chat: chat.apply_update(
+                grading_data=grading_data,
+                score=grading_data.get('score', {}).get('percentage', 0),
+                completed=True,
+                status=Chat.STATUS_COMPLETE,
+            ),
+        )
+        try:
+            record_chat_graded(chat, was_completed)
+        except Exception:
+            # The grading itself is saved; rebuild_learner_stats repairs this
+            logger.exception(f'Failed to update learner stats for chat {chat_id}')
+        # The full grading report is fetched by the client, not pushed
+        publish_chat_event(
+            chat_id, 'grading', {'status': 'complete', 'score': chat.score}
+        )
+        _publish_status(chat)
+
+    except Exception as e:
+        # Log the full error details
+        logger.error(
+            f'Error in run_grading for chat_id={chat_id}: {e!s}',
+            exc_info=True,
+        )
+
+        # On error, reset status
         try:
             chat = Chat.objects.get(pk=chat_id)
-
-            # Format conversation for grading request
-            conversation_text = format_conversation_for_llm(chat)
-
-            # Prepare messages for grading
-            messages = [
-                {'role': 'system', 'content': CHAT_GRADING_SYSTEM_PROMPT},
-                {'role': 'user', 'content': conversation_text},
-            ]
-
-            # Get grading response
-            client = OpenWebUIClient(user_token=openwebui_token)
-            grading_data = client.get_grading_response(messages)
-
-            # Update chat with results
-            chat.grading_data = grading_data
-            chat.score = grading_data.get('score', {}).get('percentage', 0)
-            chat.completed = True
-            chat.status = Chat.STATUS_COMPLETE
-            chat.save()
-
-        except Exception as e:
-            # Log the full error details
+            # Store detailed error in grading_data
+            grading_error = {
+                'error': str(e),
+                'status': 'failed',
+                'error_type': type(e).__name__,
+            }
+            _write_with_retry(
+                chat,
+                lambda chat: chat.apply_update(
+                    status=Chat.STATUS_READY_FOR_GRADING, grading_data=grading_error
+                ),
+            )
+            publish_chat_event(
+                chat_id, 'grading', {'status': 'failed', 'error': str(e)}
+            )
+            _publish_status(chat)
+            _record_error(chat_id, LLMJob.KIND_GRADING, f'Error grading chat: {e!s}', e)
+            logger.info(f'Updated chat {chat_id} with grading error')
+        except Exception as save_error:
             logger.error(
-                f'Error in process_grading_async for chat_id={chat_id}: {e!s}',
-                exc_info=True,
+                f'Failed to save grading error to chat {chat_id}: {save_error!s}'
             )
-
-            # On error, reset status
-            try:
-                chat = Chat.objects.get(pk=chat_id)
-                chat.status = Chat.STATUS_READY_FOR_GRADING
-                # Store detailed error in grading_data
-                chat.grading_data = {
-                    'error': str(e),
-                    'status': 'failed',
-                    'error_type': type(e).__name__,
-                }
-                chat.save()
-                logger.info(f'Updated chat {chat_id} with grading error')
-            except Exception as save_error:
-                logger.error(
-                    f'Failed to save grading error to chat {chat_id}: {save_error!s}'
-                )
-
-    # Start background thread
-    thread = threading.Thread(target=task)
-    thread.daemon = True
-    thread.start()
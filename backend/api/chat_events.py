@@ -0,0 +1,254 @@
+"""
+Push channel for per-chat updates.
+
+Background tasks publish small deltas (status transitions, appended or
+partial messages, help and grading completion) with publish_chat_event().
+The SSE endpoint subscribes to a chat through the process-local ChatEventHub
+and forwards whatever arrives.
+
+With CHAT_EVENTS_BROKER='postgres' events are sent with NOTIFY and a
+listener thread in every web process feeds its local hub, so events
+published by ``run_llm_workers`` processes reach clients connected to any
+web process. 'inprocess' skips the database and only reaches subscribers in
+the publishing process. 'auto' picks postgres when the database is Postgres.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.db import connection, connections
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'chat_events'
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_BYTES = 7900
+
+EVENT_SYNC = 'sync'
+
+
+class Subscription:
+    """A single subscriber's bounded queue of events for one chat."""
+
+    def __init__(self, chat_id: int, max_size: int) -> None:
+        """Create an empty subscription for ``chat_id``."""
+        self.chat_id = chat_id
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue(max_size)
+        self._overflowed = False
+
+    def deliver(self, event: dict[str, Any]) -> None:
+        """Queue an event, remembering if it had to be dropped."""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._overflowed = True
+
+    def get(self, timeout: float) -> dict[str, Any] | None:
+        """
+        Wait up to ``timeout`` seconds for the next event.
+
+        After events were dropped a single ``sync`` event is returned so the
+        client knows to refetch the chat.
+        """
+        if self._overflowed:
+            self._overflowed = False
+            with self._queue.mutex:
+                self._queue.queue.clear()
+            return {'type': EVENT_SYNC, 'data': {'reason': 'overflow'}}
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class ChatEventHub:
+    """Fans events out to the subscribers of each chat in this process."""
+
+    def __init__(self) -> None:
+        """Create a hub with no subscribers."""
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, chat_id: int) -> Subscription:
+        """Start receiving events for a chat."""
+        subscription = Subscription(chat_id, settings.CHAT_EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[chat_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop receiving events for a subscription's chat."""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.chat_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.chat_id]
+
+    def publish(self, chat_id: int, event: dict[str, Any]) -> None:
+        """Deliver an event to every local subscriber of a chat."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(chat_id, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def subscriber_count(self) -> int:
+        """Number of open subscriptions across all chats."""
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+
+hub = ChatEventHub()
+
+
+def get_broker() -> str:
+    """Resolve CHAT_EVENTS_BROKER to 'postgres' or 'inprocess'."""
+    broker = settings.CHAT_EVENTS_BROKER
+    if broker == 'auto':
+        return 'postgres' if connection.vendor == 'postgresql' else 'inprocess'
+    return broker
+
+
+def publish_chat_event(
+    chat_id: int, event_type: str, data: dict[str, Any] | None = None
+) -> None:
+    """
+    Publish a delta for a chat to its SSE subscribers.
+
+    Never raises: a failed publish only costs clients a live update, they
+    still see the change on their next fetch.
+
+    Args:
+        chat_id: The chat the event belongs to
+        event_type: 'status', 'message', 'partial', 'help', 'grading' or 'sync'
+        data: JSON-serializable event body
+    """
+    event = {'type': event_type, 'data': data or {}}
+    try:
+        if get_broker() == 'postgres':
+            _notify(chat_id, event)
+        else:
+            hub.publish(chat_id, event)
+    except Exception:
+        logger.exception(f'Failed to publish {event_type} event for chat {chat_id}')
+
+
+def _notify(chat_id: int, event: dict[str, Any]) -> None:
+    payload = json.dumps({'chat_id': chat_id, **event})
+    if len(payload.encode()) > MAX_NOTIFY_BYTES:
+        # Too big for NOTIFY; tell clients to fetch the change instead
+        payload = json.dumps(
+            {'chat_id': chat_id, 'type': EVENT_SYNC, 'data': {'reason': event['type']}}
+        )
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, payload])
+
+
+_listener: threading.Thread | None = None
+_listener_lock = threading.Lock()
+
+
+def ensure_listener() -> None:
+    """Start this process's LISTEN thread if the postgres broker is in use."""
+    global _listener  # noqa: PLW0603
+    if get_broker() != 'postgres':
+        return
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(
+                target=_listen_forever, name='chat-events-listener', daemon=True
+            )
+            _listener.start()
+
+
+def _listen_forever() -> None:
+    """Relay NOTIFY payloads into the local hub, reconnecting on failure."""
+    db = connections['default']
+    while True:
+        try:
+            # A dedicated connection: LISTEN must outlive request connections
+            conn = db.get_new_connection(db.get_connection_params())
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+            logger.info('Chat events listener connected')
+            try:
+                while True:
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        _relay(conn.notifies.pop(0).payload)
+            finally:
+                conn.close()
+        except Exception:
+            logger.exception('Chat events listener failed, reconnecting in 5s')
+            time.sleep(5)
+
+
+def _relay(payload: str) -> None:
+    try:
+        event = json.loads(payload)
+        chat_id = event.pop('chat_id')
+    except (ValueError, KeyError):
+        logger.warning(f'Ignoring malformed chat event: {payload}')
+        return
+    hub.publish(chat_id, event)
+
+
+def format_sse(event_type: str, data: dict[str, Any]) -> str:
+    """Encode one server-sent event."""
+    return f'event: {event_type}\ndata: {json.dumps(data)}\n\n'
+
+
+def stream_chat_events(
+    chat_id: int, load_snapshot: Callable[[], dict[str, Any] | None]
+) -> Iterator[str]:
+    """
+    Yield SSE frames for a chat until CHAT_EVENTS_MAX_STREAM_SECONDS.
+
+    Subscribes first and then sends a ``snapshot`` event from
+    ``load_snapshot`` so clients can tell whether they missed anything. A
+    comment is sent every CHAT_EVENTS_HEARTBEAT seconds so proxies keep the
+    connection open and dead clients are noticed. Clients reconnect when the
+    stream ends.
+    """
+    deadline = time.monotonic() + settings.CHAT_EVENTS_MAX_STREAM_SECONDS
+    subscription = hub.subscribe(chat_id)
+    try:
+        snapshot = load_snapshot()
+        # Don't pin a database connection for the lifetime of the stream
+        if not connection.in_atomic_block:
+            connection.close()
+        if snapshot is None:
+            yield format_sse(EVENT_SYNC, {'reason': 'not_found'})
+            return
+
+        yield 'retry: 2000\n\n'
+        yield format_sse('snapshot', snapshot)
+        while (remaining := deadline - time.monotonic()) > 0:
+            event = subscription.get(
+                timeout=min(settings.CHAT_EVENTS_HEARTBEAT, remaining)
+            )
+            if event is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield format_sse(event['type'], event['data'])
+    finally:
+        hub.unsubscribe(subscription)
@@ -0,0 +1,230 @@
+"""
+Token budgeting for the conversation history sent to the LLM.
+
+Each model has a context window (LLM_CONTEXT_LIMITS, tokens); the reply
+needs LLM_RESPONSE_RESERVE_TOKENS of it. plan_context() keeps the system
+messages and packs as many of the newest other messages as fit in the
+rest, so short chats are sent whole and long ones are cut to the window.
+
+When messages have to be left out, a low-priority job condenses them into
+``Chat.summary`` (see background_tasks.run_summary); later turns send the
+system messages, the summary and the recent window. The summary is only
+extended when the window moves past the messages it covers, and then far
+enough that the window can grow for several turns before it is due again.
+
+Messages are measured with the tokenizer named by LLM_TOKENIZER, a dotted
+path to a callable taking text and returning its token count. The default,
+approximate_tokens(), needs no model files and errs towards overcounting;
+point the setting at a wrapper around the model's own tokenizer for exact
+counts. A message's count is stored on its ChatMessage row when it is
+written (``token_count``), so planning a turn only measures messages that
+have never been counted. After changing the tokenizer, reset the stored
+counts (``ChatMessage.objects.update(token_count=None)``); they are
+recounted as chats are used.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from functools import cache
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+
+logger = logging.getLogger(__name__)
+
+# Role markers and separators the chat template adds around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Start of the error records older chats have in their transcript
+ERROR_RECORD_PREFIX = 'Error processing message: '
+
+# Share of the history budget left to recent messages after summarizing
+SUMMARY_KEEP_FRACTION = 0.5
+
+# Runs of word characters, or single other non-space characters
+_PIECES = re.compile(r'\w+|[^\w\s]')
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Estimate the token count of ``text`` without a model tokenizer.
+
+    BPE tokenizers keep common English words whole and split longer or
+    rarer ones, so each word counts one token per six characters (at least
+    one), each punctuation mark one token, and each character of a
+    non-ASCII word (e.g. CJK text) one token.
+    """
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        if not piece.isascii():
+            tokens += len(piece)
+        else:
+            tokens += (len(piece) + 5) // 6
+    return tokens
+
+
+@cache
+def _tokenizer(path: str) -> Callable[[str], int]:
+    return import_string(path)
+
+
+def count_tokens(text: str) -> int:
+    """Token count of ``text`` with the configured LLM_TOKENIZER."""
+    return _tokenizer(settings.LLM_TOKENIZER)(text)
+
+
+def message_content_tokens(message: dict[str, Any]) -> int:
+    """Token count of a message's content (the value cached on its row)."""
+    content = message.get('content')
+    return count_tokens(content if isinstance(content, str) else str(content or ''))
+
+
+def is_conversational(message: dict[str, Any]) -> bool:
+    """
+    Whether a message belongs in an LLM prompt.
+
+    Failed turns used to be recorded in the transcript as system messages;
+    those are now ChatEvent rows, and any left in older chats are skipped.
+    """
+    return not (
+        message.get('role') == 'system'
+        and str(message.get('content', '')).startswith(ERROR_RECORD_PREFIX)
+    )
+
+
+def context_limit(model: str) -> int:
+    """Context window of ``model`` in tokens."""
+    return settings.LLM_CONTEXT_LIMITS.get(model, settings.LLM_DEFAULT_CONTEXT_TOKENS)
+
+
+def _costs(
+    messages: Sequence[dict[str, Any]], token_counts: Sequence[int | None] | None
+) -> list[int]:
+    """Prompt tokens of each message, counting those without a known count."""
+    if token_counts is None:
+        token_counts = [None] * len(messages)
+    return [
+        (message_content_tokens(m) if n is None else n) + MESSAGE_OVERHEAD_TOKENS
+        for m, n in zip(messages, token_counts, strict=True)
+    ]
+
+
+def _window(
+    messages: Sequence[dict[str, Any]], costs: list[int], budget: int, start: int
+) -> tuple[int, int]:
+    """
+    Newest run of non-system messages from ``start`` on that fits ``budget``.
+
+    Returns:
+        Index of its oldest message (``len(messages)`` if none) and its tokens
+    """
+    first, used = len(messages), 0
+    for i in range(len(messages) - 1, start - 1, -1):
+        if messages[i].get('role') == 'system':
+            continue
+        if first < len(messages) and used + costs[i] > budget:
+            break
+        first, used = i, used + costs[i]
+    return first, used
+
+
+def _is_prompt(message: dict[str, Any]) -> bool:
+    """Whether a message is a system prompt that is always sent."""
+    return message.get('role') == 'system' and is_conversational(message)
+
+
+def _system_tokens(messages: Sequence[dict[str, Any]], costs: list[int]) -> int:
+    return sum(c for m, c in zip(messages, costs, strict=True) if _is_prompt(m))
+
+
+def summary_message(summary: str) -> dict[str, str]:
+    """The message that stands in for the summarized start of a conversation."""
+    return {
+        'role': 'system',
+        'content': f'Summary of the earlier conversation:\n{summary}',
+    }
+
+
+def plan_context(
+    messages: Sequence[dict[str, Any]],
+    model: str,
+    token_counts: Sequence[int | None] | None = None,
+    summary: str = '',
+    summary_through: int = 0,
+) -> tuple[list[dict[str, Any]], int, int]:
+    """
+    Choose the history to send to ``model`` for its next reply.
+
+    System prompts are always kept; error records (see is_conversational)
+    never are. The first ``summary_through`` messages are replaced by
+    ``summary`` (placed after the system messages before the history); of
+    the rest, the newest are kept for as long as they fit, so the history
+    sent is an unbroken run ending at the latest message. The latest
+    message is kept even if it alone is over the budget.
+
+    Args:
+        messages: The conversation, oldest first
+        model: Model ID the messages are for
+        token_counts: Known content token counts, aligned with ``messages``
+            (None where unknown); the rest are counted here
+        summary: Summary of the first ``summary_through`` messages, if any
+        summary_through: Number of leading messages the summary covers
+
+    Returns:
+        The messages to send, in order, their estimated prompt tokens, and
+        how many messages after the summary had to be left out
+    """
+    costs = _costs(messages, token_counts)
+    budget = context_limit(model) - settings.LLM_RESPONSE_RESERVE_TOKENS
+    fixed = _system_tokens(messages, costs)
+    if summary:
+        fixed += count_tokens(summary_message(summary)['content'])
+        fixed += MESSAGE_OVERHEAD_TOKENS
+    first, used = _window(messages, costs, budget - fixed, summary_through)
+    used += fixed
+
+    if used > budget:
+        logger.warning(
+            f'Prompt for {model} needs ~{used} tokens, over its budget of {budget}'
+        )
+    before = [m for m in messages[:first] if _is_prompt(m)]
+    dropped = sum(
+        1 for m in messages[summary_through:first] if m.get('role') != 'system'
+    )
+    if summary:
+        before.append(summary_message(summary))
+    after = [m for m in messages[first:] if is_conversational(m)]
+    return [*before, *after], used, dropped
+
+
+def summary_boundary(
+    messages: Sequence[dict[str, Any]],
+    model: str,
+    token_counts: Sequence[int | None] | None = None,
+) -> int:
+    """
+    How many leading messages a new summary should cover.
+
+    The summary is taken up to where the newest messages fill
+    SUMMARY_KEEP_FRACTION of the history budget (after the system messages
+    and a summary of up to LLM_SUMMARY_MAX_TOKENS). The window then has
+    room to grow for several turns before the summary is due again.
+    """
+    costs = _costs(messages, token_counts)
+    budget = (
+        context_limit(model)
+        - settings.LLM_RESPONSE_RESERVE_TOKENS
+        - _system_tokens(messages, costs)
+        - settings.LLM_SUMMARY_MAX_TOKENS
+        - MESSAGE_OVERHEAD_TOKENS
+    )
+    first, _ = _window(messages, costs, int(budget * SUMMARY_KEEP_FRACTION), 0)
+    return first
@@ -0,0 +1,249 @@
+"""
+Database functions for reading inside the JSON columns on Chat.
+
+Lets views compute small facts about ``messages`` and ``help_responses``
+in SQL instead of loading the whole JSON arrays into Python, and lets
+writers append to or filter those arrays in place. Implemented for
+PostgreSQL (jsonb, production) and SQLite (tests).
+"""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING, Any
+
+from django.db import NotSupportedError
+from django.db.models import CharField, Func, IntegerField, JSONField
+
+
+if TYPE_CHECKING:
+    from django.db.backends.base.base import BaseDatabaseWrapper
+    from django.db.models.sql.compiler import SQLCompiler
+
+
+class JSONArrayLength(Func):
+    """Number of elements in a JSON array column (NULL for NULL)."""
+
+    function = 'JSON_ARRAY_LENGTH'
+    output_field = IntegerField()
+
+    def as_postgresql(
+        self,
+        compiler: SQLCompiler,
+        connection: BaseDatabaseWrapper,
+        **extra_context: Any,
+    ) -> tuple[str, list[Any]]:
+        """Use jsonb_array_length (JSONField is jsonb on Postgres)."""
+        return self.as_sql(
+            compiler, connection, function='JSONB_ARRAY_LENGTH', **extra_context
+        )
+
+    def as_sql(
+        self,
+        compiler: SQLCompiler,
+        connection: BaseDatabaseWrapper,
+        **extra_context: Any,
+    ) -> tuple[str, list[Any]]:
+        """Use json_array_length (SQLite); other backends are not supported."""
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise NotSupportedError(
+                f'JSONArrayLength is not supported on {connection.vendor}'
+            )
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+class JSONLastElementKey(Func):
+    """Text value of ``key`` in the last object of a JSON array column."""
+
+    output_field = CharField()
+
+    def __init__(self, expression: Any, key: str, **extra: Any) -> None:
+        """Read ``key`` from the last element of ``expression``."""
+        super().__init__(expression, **extra)
+        self.key = key
+
+    def as_postgresql(
+        self,
+        compiler: SQLCompiler,
+        connection: BaseDatabaseWrapper,  # noqa: ARG002
+        **extra_context: Any,  # noqa: ARG002
+    ) -> tuple[str, list[Any]]:
+        """Compile to ``column -> -1 ->> key``."""
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f'({sql} -> -1 ->> %s)', [*params, self.key]
+
+    def as_sqlite(
+        self,
+        compiler: SQLCompiler,
+        connection: BaseDatabaseWrapper,  # noqa: ARG002
+        **extra_context: Any,  # noqa: ARG002
+    ) -> tuple[str, list[Any]]:
+        """Compile to ``json_extract(column, '$[#-1].key')``."""
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f'JSON_EXTRACT({sql}, %s)', [*params, f'$[#-1].{self.key}']
+
+    def as_sql(
+        self,
+        compiler: SQLCompiler,  # noqa: ARG002
+        connection: BaseDatabaseWrapper,
+        **extra_context: Any,  # noqa: ARG002
+    ) -> tuple[str, list[Any]]:
+        """Other backends are not supported."""
+        raise NotSupportedError(
+            f'JSONLastElementKey is not supported on {connection.vendor}'
+        )
+
+
+class JSONArraySlice(Func):
+    """Elements of a JSON array column from index ``start`` on, as a JSON array."""
+
+    def __init__(self, expression: Any, start: int, **extra: Any) -> None:
+        """Slice ``expression`` from zero-based index ``start`` to the end."""
+        super().__init__(expression, output_field=JSONField(), **extra)
+        self.start = int(start)
+
+    def as_postgresql(
+        self,
+        compiler: SQLCompiler,
+        connection: BaseDatabaseWrapper,  # noqa: ARG002
+        **extra_context: Any,  # noqa: ARG002
+    ) -> tuple[str, list[Any]]:
+        """Aggregate the tail of the array with jsonb_array_elements."""
+        sql, params = compiler.compile(self.source_expressions[0])
+        elements = f'jsonb_array_elements({sql}) WITH ORDINALITY AS e'
+        aggregate = "COALESCE(jsonb_agg(e.value ORDER BY e.ordinality), '[]'::jsonb)"
+        template = f'(SELECT {aggregate} FROM {elements} WHERE e.ordinality > %s)'  # noqa: S608  # nosec B608
+        return template, [*params, self.start]
+
+    def as_sqlite(
+        self,
+        compiler: SQLCompiler,
+        connection: BaseDatabaseWrapper,  # noqa: ARG002
+        **extra_context: Any,  # noqa: ARG002
+    ) -> tuple[str, list[Any]]:
+        """Aggregate the tail of the array with json_each."""
+        sql, params = compiler.compile(self.source_expressions[0])
+        elements = f'json_each({sql}) AS e'
+        template = (
+            f'(SELECT json_group_array(e.value) FROM {elements} WHERE e.key >= %s)'  # noqa: S608  # nosec B608
+        )
+        return template, [*params, self.start]
+
+    def as_sql(
+        self,
+        compiler: SQLCompiler,  # noqa: ARG002
+        connection: BaseDatabaseWrapper,
+        **extra_context: Any,  # noqa: ARG002
+    ) -> tuple[str, list[Any]]:
+        """Other backends are not supported."""
+        raise NotSupportedError(
+            f'JSONArraySlice is not supported on {connection.vendor}'
+        )
+
+
+class JSONArrayAppend(Func):
+    """
+    A JSON array column with ``items`` added to the end.
+
+    For ``.update()`` calls: the append happens in the database, so writers
+    don't have to read the array first and concurrent appends are not lost.
+    """
+
+    def __init__(self, expression: Any, items: list[Any], **extra: Any) -> None:
+        """Append ``items`` (JSON-serializable values) to ``expression``."""
+        super().__init__(expression, output_field=JSONField(), **extra)
+        self.items = list(items)
+
+    def as_postgresql(
+        self,
+        compiler: SQLCompiler,
+        connection: BaseDatabaseWrapper,  # noqa: ARG002
+        **extra_context: Any,  # noqa: ARG002
+    ) -> tuple[str, list[Any]]:
+        """Compile to ``COALESCE(column, '[]') || items``."""
+        sql, params = compiler.compile(self.source_expressions[0])
+        return (
+            f"(COALESCE({sql}, '[]'::jsonb) || %s::jsonb)",
+            [*params, json.dumps(self.items)],
+        )
+
+    def as_sqlite(
+        self,
+        compiler: SQLCompiler,
+        connection: BaseDatabaseWrapper,  # noqa: ARG002
+        **extra_context: Any,  # noqa: ARG002
+    ) -> tuple[str, list[Any]]:
+        """Compile to one ``json_insert(..., '$[#]', item)`` per item."""
+        sql, params = compiler.compile(self.source_expressions[0])
+        sql = f"COALESCE({sql}, '[]')"
+        for item in self.items:
+            sql = f"JSON_INSERT({sql}, '$[#]', JSON(%s))"
+            params = [*params, json.dumps(item)]
+        return sql, params
+
+    def as_sql(
+        self,
+        compiler: SQLCompiler,  # noqa: ARG002
+        connection: BaseDatabaseWrapper,
+        **extra_context: Any,  # noqa: ARG002
+    ) -> tuple[str, list[Any]]:
+        """Other backends are not supported."""
+        raise NotSupportedError(
+            f'JSONArrayAppend is not supported on {connection.vendor}'
+        )
+
+
+class JSONArrayWithout(Func):
+    """A JSON array column without the objects that contain all of ``match``."""
+
+    def __init__(self, expression: Any, match: dict[str, Any], **extra: Any) -> None:
+        """Drop elements of ``expression`` whose keys equal ``match``'s values."""
+        super().__init__(expression, output_field=JSONField(), **extra)
+        self.match = dict(match)
+
+    def as_postgresql(
+        self,
+        compiler: SQLCompiler,
+        connection: BaseDatabaseWrapper,  # noqa: ARG002
+        **extra_context: Any,  # noqa: ARG002
+    ) -> tuple[str, list[Any]]:
+        """Filter the array with jsonb containment (``@>``)."""
+        sql, params = compiler.compile(self.source_expressions[0])
+        elements = (
+            f"jsonb_array_elements(COALESCE({sql}, '[]'::jsonb)) WITH ORDINALITY AS e"
+        )
+        aggregate = "COALESCE(jsonb_agg(e.value ORDER BY e.ordinality), '[]'::jsonb)"
+        template = (
+            f'(SELECT {aggregate} FROM {elements} WHERE NOT e.value @> %s::jsonb)'  # noqa: S608  # nosec B608
+        )
+        return template, [*params, json.dumps(self.match)]
+
+    def as_sqlite(
+        self,
+        compiler: SQLCompiler,
+        connection: BaseDatabaseWrapper,  # noqa: ARG002
+        **extra_context: Any,  # noqa: ARG002
+    ) -> tuple[str, list[Any]]:
+        """Filter the array with json_each, comparing each key with IS."""
+        sql, params = compiler.compile(self.source_expressions[0])
+        conditions = []
+        for key, value in self.match.items():
+            conditions.append('JSON_EXTRACT(e.value, %s) IS %s')
+            params = [*params, f'$.{key}', value]
+        elements = f"json_each(COALESCE({sql}, '[]')) AS e"
+        where = ' AND '.join(conditions) or '1'
+        template = (
+            f'(SELECT json_group_array(e.value) FROM {elements} WHERE NOT ({where}))'  # noqa: S608  # nosec B608
+        )
+        return template, params
+
+    def as_sql(
+        self,
+        compiler: SQLCompiler,  # noqa: ARG002
+        connection: BaseDatabaseWrapper,
+        **extra_context: Any,  # noqa: ARG002
+    ) -> tuple[str, list[Any]]:
+        """Other backends are not supported."""
+        raise NotSupportedError(
+            f'JSONArrayWithout is not supported on {connection.vendor}'
+        )
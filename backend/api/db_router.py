@@ -0,0 +1,119 @@
+"""
+Routing of read-only requests to an optional read replica.
+
+Reads go to the primary unless a view opts in with ``@replica_reads``;
+only polling GETs that can tolerate a little replication lag do. Even
+then the primary is used when:
+
+- no replica is configured (``DATABASE_REPLICA`` is unset);
+- the request has already written something;
+- the client wrote recently. Successful unsafe requests set a short-lived
+  cookie (``REPLICA_STICKY_SECONDS``) so the client reads its own writes.
+
+Background tasks run in worker threads or processes that never opt in, and
+run_job() pins them to the primary explicitly.
+"""
+
+from __future__ import annotations
+
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+    from django.http import HttpRequest, HttpResponse
+
+
+# Cookie telling us the client wrote within the last REPLICA_STICKY_SECONDS
+PRIMARY_PIN_COOKIE = 'db_primary_pin'
+
+_replica_allowed: ContextVar[bool] = ContextVar('replica_allowed', default=False)
+_pinned_to_primary: ContextVar[bool] = ContextVar('pinned_to_primary', default=False)
+
+
+def _replica_alias() -> str | None:
+    alias = settings.DATABASE_REPLICA
+    return alias if alias and alias in settings.DATABASES else None
+
+
+class PrimaryReplicaRouter:
+    """Send opted-in reads to the replica and everything else to the primary."""
+
+    def db_for_read(self, _model: type, **_hints: Any) -> str:
+        """The replica inside ``@replica_reads`` views, else the primary."""
+        replica = _replica_alias()
+        if replica and _replica_allowed.get() and not _pinned_to_primary.get():
+            return replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, _model: type, **_hints: Any) -> str:
+        """Always the primary; later reads in this request follow it there."""
+        _pinned_to_primary.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, _obj1: Any, _obj2: Any, **_hints: Any) -> bool:
+        """Always: the replica is a copy of the primary."""
+        return True
+
+    def allow_migrate(self, db: str, _app_label: str, **_hints: Any) -> bool:
+        """Only the primary; the replica gets its schema through replication."""
+        return db == DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def primary_db() -> Iterator[None]:
+    """Read from the primary inside this block, whatever the caller allowed."""
+    token = _pinned_to_primary.set(True)
+    try:
+        yield
+    finally:
+        _pinned_to_primary.reset(token)
+
+
+def replica_reads(view_method: Callable[..., Any]) -> Callable[..., Any]:
+    """Let a view method's reads use the replica (see module docstring)."""
+
+    @functools.wraps(view_method)
+    def wrapper(view: Any, request: Any, *args: Any, **kwargs: Any) -> Any:
+        allowed = _replica_allowed.set(True)
+        pinned = _pinned_to_primary.set(PRIMARY_PIN_COOKIE in request.COOKIES)
+        try:
+            return view_method(view, request, *args, **kwargs)
+        finally:
+            _pinned_to_primary.reset(pinned)
+            _replica_allowed.reset(allowed)
+
+    return wrapper
+
+
+class ReplicaStickinessMiddleware:
+    """Pin clients that just wrote to the primary for REPLICA_STICKY_SECONDS."""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        """Wrap the next handler in the middleware chain."""
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Set the pin cookie on responses to successful writes."""
+        response = self.get_response(request)
+        if (
+            _replica_alias()
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,288 @@
+"""
+Durable LLM job queue backed by the LLMJob table.
+
+Views enqueue jobs here instead of handing work straight to a thread, so
+in-flight work survives restarts. Jobs are executed either inline by the web
+process's worker pool (LLM_JOB_EXECUTION='inline') or by one or more
+``manage.py run_llm_workers`` processes (LLM_JOB_EXECUTION='worker').
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .background_tasks import (
+    run_chat_message,
+    run_grading,
+    run_help_precompute,
+    run_help_request,
+    run_summary,
+)
+from .db_router import primary_db
+from .models import Chat, LLMJob, UserProfile
+from .speculative_help import record_speculative_help
+from .task_queue import TaskQueueFullError, submit_task
+
+
+logger = logging.getLogger(__name__)
+
+INLINE_WORKER_ID = 'inline'
+
+FINISHED_STATUSES = [LLMJob.STATUS_DONE, LLMJob.STATUS_FAILED, LLMJob.STATUS_CANCELLED]
+
+# Finished jobs deleted per statement by purge_finished_jobs
+JOB_PURGE_BATCH_SIZE = 1000
+
+
+def enqueue_job(
+    chat: Chat,
+    kind: str,
+    payload: dict[str, Any] | None = None,
+    priority: int = LLMJob.PRIORITY_NORMAL,
+) -> LLMJob:
+    """
+    Persist a job for a chat and, in inline mode, dispatch it to the pool.
+
+    Args:
+        chat: The chat the job operates on
+        kind: One of the LLMJob.KIND_* constants
+        payload: Extra job arguments (never store credentials here)
+        priority: One of the LLMJob.PRIORITY_* constants
+
+    Returns:
+        The created LLMJob
+
+    Raises:
+        TaskQueueFullError: If the queued backlog or the worker pool is full
+    """
+    backlog = LLMJob.objects.filter(status=LLMJob.STATUS_QUEUED).count()
+    if backlog >= settings.LLM_JOB_QUEUE_MAX:
+        logger.warning(f'LLM job backlog full ({backlog} queued), rejecting {kind}')
+        raise TaskQueueFullError(settings.LLM_WORKER_RETRY_AFTER)
+
+    job = LLMJob.objects.create(
+        chat=chat, kind=kind, payload=payload or {}, priority=priority
+    )
+
+    if settings.LLM_JOB_EXECUTION == 'inline':
+        try:
+            submit_task(run_job_by_id, job.id, INLINE_WORKER_ID)
+        except TaskQueueFullError:
+            job.delete()
+            raise
+
+    return job
+
+
+def purge_finished_jobs(now: datetime | None = None) -> int:
+    """
+    Delete jobs that finished more than LLM_JOB_RETENTION_DAYS days ago.
+
+    Their payload holds the learner's message and ``last_error`` the
+    failure, so they aren't kept longer than needed for debugging. Deletes
+    in batches of JOB_PURGE_BATCH_SIZE; does nothing if retention is 0.
+
+    Returns:
+        Number of jobs deleted
+    """
+    if settings.LLM_JOB_RETENTION_DAYS <= 0:
+        return 0
+    cutoff = (now or timezone.now()) - timedelta(days=settings.LLM_JOB_RETENTION_DAYS)
+    expired = LLMJob.objects.filter(
+        status__in=FINISHED_STATUSES, finished_at__lt=cutoff
+    ).order_by()
+    purged = 0
+    while True:
+        batch = list(expired.values_list('pk', flat=True)[:JOB_PURGE_BATCH_SIZE])
+        if not batch:
+            return purged
+        purged += LLMJob.objects.filter(pk__in=batch).delete()[0]
+
+
+def dispatch_inline(job_id: int) -> bool:
+    """
+    Hand a queued job to this process's worker pool (inline mode only).
+
+    Returns:
+        True if the job was submitted, False if not in inline mode or full.
+    """
+    if settings.LLM_JOB_EXECUTION != 'inline':
+        return False
+    try:
+        submit_task(run_job_by_id, job_id, INLINE_WORKER_ID)
+    except TaskQueueFullError:
+        return False
+    return True
+
+
+def claim_jobs(worker_id: str, limit: int) -> list[LLMJob]:
+    """
+    Claim up to ``limit`` queued jobs for a worker.
+
+    Uses SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers never
+    claim the same row and never block on each other. Jobs are claimed by
+    priority, then oldest first.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            LLMJob.objects.select_for_update(skip_locked=True)
+            .filter(status=LLMJob.STATUS_QUEUED, available_at__lte=now)
+            .order_by('priority', 'available_at', 'id')[:limit]
+        )
+        if not jobs:
+            return []
+        LLMJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=LLMJob.STATUS_RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+    for job in jobs:
+        job.status = LLMJob.STATUS_RUNNING
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.attempts += 1
+    return jobs
+
+
+def _get_openwebui_token(chat_id: int) -> str | None:
+    """Look up the chat owner's current OpenWebUI token."""
+    return (
+        UserProfile.objects.filter(user__chats__id=chat_id)
+        .values_list('openwebui_token', flat=True)
+        .first()
+    )
+
+
+def _request_summary(chat_id: int) -> None:
+    """
+    Queue a low-priority job to extend the chat's conversation summary.
+
+    Skipped if one is already pending, or if the backlog is full (the next
+    turn asks again).
+    """
+    pending = LLMJob.objects.filter(
+        chat_id=chat_id,
+        kind=LLMJob.KIND_SUMMARY,
+        status__in=[LLMJob.STATUS_QUEUED, LLMJob.STATUS_RUNNING],
+    )
+    if pending.exists():
+        return
+    try:
+        enqueue_job(
+            Chat.objects.get(pk=chat_id),
+            LLMJob.KIND_SUMMARY,
+            priority=LLMJob.PRIORITY_LOW,
+        )
+    except (Chat.DoesNotExist, TaskQueueFullError):
+        logger.info(f'Chat {chat_id}: summary not queued')
+
+
+def _request_help_precompute(chat_id: int) -> None:
+    """
+    Queue a low-priority job to precompute help for the chat's current turn.
+
+    Only with LLM_SPECULATIVE_HELP on, and skipped if the backlog is full
+    (help is then computed when asked for, as usual).
+    """
+    if not settings.LLM_SPECULATIVE_HELP:
+        return
+    chat = Chat.objects.filter(pk=chat_id).only('version').first()
+    if chat is None:
+        return
+    try:
+        enqueue_job(
+            chat,
+            LLMJob.KIND_HELP_PRECOMPUTE,
+            {'version': chat.version},
+            priority=LLMJob.PRIORITY_LOW,
+        )
+    except TaskQueueFullError:
+        logger.info(f'Chat {chat_id}: help precompute not queued')
+
+
+def cancel_help_precompute(chat: Chat) -> int:
+    """
+    Cancel the chat's queued help precompute jobs (the turn has moved on).
+
+    Jobs already running can't be stopped; run_help_precompute discards
+    their result.
+
+    Returns:
+        The number of jobs cancelled
+    """
+    cancelled = LLMJob.objects.filter(
+        chat=chat,
+        kind=LLMJob.KIND_HELP_PRECOMPUTE,
+        status=LLMJob.STATUS_QUEUED,
+    ).update(status=LLMJob.STATUS_CANCELLED, finished_at=timezone.now())
+    if cancelled:
+        record_speculative_help(cancelled=cancelled)
+    return cancelled
+
+
+def _dispatch(job: LLMJob, token: str | None) -> None:
+    """Call the background task handler for the job's kind."""
+    if job.kind == LLMJob.KIND_CHAT_MESSAGE:
+        turn = run_chat_message(
+            job.chat_id,
+            job.payload.get('message', ''),
+            token,
+            job.payload.get('is_action', False),
+        )
+        if turn.summary_due:
+            _request_summary(job.chat_id)
+        if turn.replied:
+            _request_help_precompute(job.chat_id)
+    elif job.kind == LLMJob.KIND_HELP:
+        run_help_request(job.chat_id, token)
+    elif job.kind == LLMJob.KIND_GRADING:
+        run_grading(job.chat_id, token)
+    elif job.kind == LLMJob.KIND_SUMMARY:
+        run_summary(job.chat_id, token)
+    elif job.kind == LLMJob.KIND_HELP_PRECOMPUTE:
+        run_help_precompute(job.chat_id, token, job.payload.get('version'))
+    else:
+        raise ValueError(f'Unknown LLM job kind: {job.kind}')
+
+
+def run_job(job: LLMJob) -> None:
+    """Execute a claimed job and record its outcome."""
+    try:
+        with primary_db():
+            _dispatch(job, _get_openwebui_token(job.chat_id))
+    except Exception as e:
+        logger.exception(f'LLM job {job.pk} ({job.kind}) failed')
+        LLMJob.objects.filter(pk=job.pk).update(
+            status=LLMJob.STATUS_FAILED,
+            last_error=str(e),
+            finished_at=timezone.now(),
+        )
+        return
+
+    LLMJob.objects.filter(pk=job.pk).update(
+        status=LLMJob.STATUS_DONE,
+        finished_at=timezone.now(),
+    )
+
+
+def run_job_by_id(job_id: int, worker_id: str) -> None:
+    """Claim a specific queued job and run it (used for inline execution)."""
+    claimed = LLMJob.objects.filter(pk=job_id, status=LLMJob.STATUS_QUEUED).update(
+        status=LLMJob.STATUS_RUNNING,
+        locked_by=worker_id,
+        locked_at=timezone.now(),
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        # Already taken by a standalone worker (or deleted with its chat)
+        return
+    run_job(LLMJob.objects.get(pk=job_id))
@@ -0,0 +1,130 @@
+"""
+Incrementally maintained per-learner progress totals (LearnerStats).
+
+Staff user listings used to aggregate over each learner's chats on every
+request. Instead, the code paths that change those totals update the
+learner's LearnerStats row in the same place:
+
+- a chat is created: record_chat_created();
+- grading finishes: record_chat_graded();
+- a chat is deleted (refresh_learner_stats()) or its score or completion
+  is edited directly (record_chat_edited()): the learner's row is
+  recomputed from their chats.
+
+Rows are updated with F() expressions so concurrent updates don't lose
+counts. ``manage.py rebuild_learner_stats`` recomputes every row in bulk.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from django.contrib.auth.models import User
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from .models import Chat, LearnerStats
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+# Chat fields whose edits change the learner's totals
+PROGRESS_FIELDS = {'score', 'completed'}
+
+# LearnerStats columns recomputed by refresh_learner_stats
+STATS_FIELDS = [
+    'chat_count',
+    'completed_count',
+    'score_total',
+    'scored_count',
+    'latest_score',
+    'latest_graded_at',
+]
+
+
+def _increment(user_id: int, **fields: Any) -> None:
+    """Apply ``fields`` (F expressions or values) to the learner's row."""
+    LearnerStats.objects.get_or_create(user_id=user_id)
+    LearnerStats.objects.filter(user_id=user_id).update(**fields)
+
+
+def record_chat_created(chat: Chat) -> None:
+    """Count a new chat (and its score, if it was created already graded)."""
+    fields = {'chat_count': F('chat_count') + 1}
+    if chat.completed:
+        fields.update(_graded_fields(chat))
+    _increment(chat.user_id, **fields)
+
+
+def record_chat_graded(chat: Chat, was_completed: bool = False) -> None:
+    """
+    Add a chat that just finished grading to its learner's totals.
+
+    A chat that already counted as completed (marked so by an edit before
+    it was graded) is recomputed instead, so it isn't counted twice.
+    """
+    if was_completed:
+        refresh_learner_stats([chat.user_id])
+    else:
+        _increment(chat.user_id, **_graded_fields(chat))
+
+
+def _graded_fields(chat: Chat) -> dict[str, Any]:
+    fields = {'completed_count': F('completed_count') + 1}
+    if chat.score is not None:
+        fields.update(
+            score_total=F('score_total') + chat.score,
+            scored_count=F('scored_count') + 1,
+            latest_score=chat.score,
+            latest_graded_at=timezone.now(),
+        )
+    return fields
+
+
+def record_chat_edited(chat: Chat, changed_fields: Iterable[str]) -> None:
+    """Recompute the learner's row if an edit touched the score or completion."""
+    if PROGRESS_FIELDS.intersection(changed_fields):
+        refresh_learner_stats([chat.user_id])
+
+
+def computed_stats(user_ids: Iterable[int] | None = None) -> list[LearnerStats]:
+    """
+    LearnerStats computed from the chats, one aggregate query for all users.
+
+    Learners without chats get a row of zeros. ``user_ids`` limits the
+    result to those learners.
+    """
+    scored = Q(chats__completed=True, chats__score__isnull=False)
+    latest = Chat.objects.filter(
+        user=OuterRef('pk'), completed=True, score__isnull=False
+    ).order_by('-updated_at', '-id')
+    users = User.objects.annotate(
+        chat_count=Count('chats'),
+        completed_count=Count('chats', filter=Q(chats__completed=True)),
+        score_total=Sum('chats__score', filter=scored, default=0.0),
+        scored_count=Count('chats', filter=scored),
+        latest_score=Subquery(latest.values('score')[:1]),
+        latest_graded_at=Subquery(latest.values('updated_at')[:1]),
+    ).values('pk', *STATS_FIELDS)
+    if user_ids is not None:
+        users = users.filter(pk__in=list(user_ids))
+    return [LearnerStats(user_id=row.pop('pk'), **row) for row in users.order_by('pk')]
+
+
+def save_stats(rows: list[LearnerStats]) -> None:
+    """Insert or overwrite the given rows in one statement."""
+    LearnerStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=[*STATS_FIELDS, 'updated_at'],
+    )
+
+
+def refresh_learner_stats(user_ids: Iterable[int]) -> None:
+    """Recompute the given learners' rows (after deletes or direct edits)."""
+    user_ids = set(user_ids)
+    if user_ids:
+        save_stats(computed_stats(user_ids))
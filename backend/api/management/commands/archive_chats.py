@@ -0,0 +1,72 @@
+"""
+Django management command to move old graded chats into the cold archive.
+Usage: python manage.py archive_chats [--days N] [--batch-size N] [--sleep S] [--dry-run]
+
+Compresses the transcript, help and grading JSON of chats graded more than
+--days days ago into ChatArchive rows (see api/archive.py), one batch at a
+time. Archived chats still list and open as before. Safe to run while the
+site is up and to re-run.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.archive import archivable_chats, archive_completed_chats
+
+
+class Command(BaseCommand):
+    help = 'Archive the JSON payloads of old graded chats in compressed form'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.CHAT_ARCHIVE_AFTER_DAYS or 90,
+            help='Archive chats graded more than this many days ago '
+            '(default: CHAT_ARCHIVE_AFTER_DAYS, or 90)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.CHAT_ARCHIVE_BATCH_SIZE,
+            help='Chats to archive per batch (default: CHAT_ARCHIVE_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between batches to limit database load',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many chats would be archived',
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days <= 0:
+            raise CommandError('--days must be a positive number of days')
+
+        if options['dry_run']:
+            count = archivable_chats(days).count()
+            self.stdout.write(
+                f'{count} chats would be archived (graded > {days} days ago)'
+            )
+            return
+
+        total = 0
+        while True:
+            archived = archive_completed_chats(days, options['batch_size'])
+            if not archived:
+                break
+            total += archived
+            self.stdout.write(f'Archived {total} chats')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS('=== Archive Summary ==='))
+        self.stdout.write(f'Chats archived: {total}')
+        self.stdout.write(f'Chats left to archive: {archivable_chats(days).count()}')
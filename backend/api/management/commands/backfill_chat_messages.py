@@ -0,0 +1,69 @@
+"""
+Django management command to copy chat transcripts into ChatMessage rows.
+Usage: python manage.py backfill_chat_messages [--batch-size N] [--sleep S]
+
+Walks chats whose rows are not yet complete in primary-key order, one batch
+at a time, and writes a row per message from the ``messages`` JSON. Each
+chat is synced in its own short transaction, so the command can run while
+the site is up and be stopped and re-run at any point. Chats with work in
+flight are skipped and picked up by a later run. Chats archived without
+their rows (by older versions of archive_chat) get them back from the
+archive, which makes them searchable again.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.archive import rehydrate
+from api.message_store import sync_message_rows
+from api.models import Chat
+
+
+class Command(BaseCommand):
+    help = 'Copy Chat.messages JSON into per-message ChatMessage rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Chats to load per batch (default: 200)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between batches to limit database load',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pending = (
+            Chat.objects.filter(message_rows_complete=False)
+            .exclude(status__in=Chat.TRANSIENT_STATUSES)
+            .only('id', 'messages', 'archived', 'summary_through')
+            .order_by('pk')
+        )
+
+        synced = 0
+        messages = 0
+        last_pk = 0
+        while True:
+            batch = list(pending.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            for chat in batch:
+                sync_message_rows(rehydrate(chat))
+                synced += 1
+                messages += len(chat.messages or [])
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Backfilled {synced} chats (up to id {last_pk})')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        skipped = Chat.objects.filter(message_rows_complete=False).count()
+        self.stdout.write(self.style.SUCCESS('=== Backfill Summary ==='))
+        self.stdout.write(f'Chats backfilled: {synced}')
+        self.stdout.write(f'Messages in backfilled chats: {messages}')
+        self.stdout.write(f'Chats left (busy, re-run later): {skipped}')
@@ -0,0 +1,152 @@
+"""
+Django management command to verify the denormalized counters on chats.
+Usage: python manage.py check_chat_counters [--fix] [--batch-size N] [--sleep S]
+
+Recounts each chat's user and assistant messages (from its ChatMessage
+rows, or the ``messages`` JSON for chats not yet backfilled) and its
+finished help responses (from the archive for archived chats), and reports chats whose
+``interaction_count``, ``assistant_message_count`` or
+``help_response_count`` disagree. With --fix the counters are rewritten;
+a chat that changes while it is being checked is left for the next run.
+"""
+
+import time
+from collections.abc import Iterator
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from api.archive import archived_payloads
+from api.message_store import ROLE_COUNTERS, finished_help_count, message_counts
+from api.models import Chat, ChatMessage, ChatVersionConflictError
+
+
+COUNTER_FIELDS = [*ROLE_COUNTERS.values(), 'help_response_count']
+
+
+def _batched(items: Iterator[Chat], size: int) -> Iterator[list[Chat]]:
+    """Lists of up to ``size`` consecutive items."""
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Check (and optionally repair) the message and help counters on chats'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rewrite counters that do not match the stored messages',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Chats to load per batch (default: 500)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between batches to limit database load',
+        )
+
+    def handle(self, *args, **options):
+        chats = Chat.objects.only(
+            'id',
+            'version',
+            'message_rows_complete',
+            'archived',
+            'help_responses',
+            *COUNTER_FIELDS,
+        ).order_by('pk')
+
+        checked = 0
+        mismatched = 0
+        fixed = 0
+        batch_size = options['batch_size']
+        batches = _batched(chats.iterator(chunk_size=batch_size), batch_size)
+        for batch in batches:
+            for chat, expected in zip(
+                batch, self._expected_counters(batch), strict=True
+            ):
+                checked += 1
+                stored = {name: getattr(chat, name) for name in COUNTER_FIELDS}
+                if stored == expected:
+                    continue
+
+                mismatched += 1
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'Chat {chat.pk}: stored {stored}, expected {expected}'
+                    )
+                )
+                if options['fix']:
+                    try:
+                        chat.apply_update(**expected)
+                    except ChatVersionConflictError:
+                        self.stdout.write(f'Chat {chat.pk} changed, re-run to fix it')
+                    else:
+                        fixed += 1
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS('=== Counter Check Summary ==='))
+        self.stdout.write(f'Chats checked: {checked}')
+        self.stdout.write(f'Chats with wrong counters: {mismatched}')
+        if options['fix']:
+            self.stdout.write(f'Chats fixed: {fixed}')
+
+    def _expected_counters(self, batch: list[Chat]) -> list[dict[str, int]]:
+        """
+        Counter values recounted from each chat's stored messages and help.
+
+        Reads the batch's message rows, legacy ``messages`` JSON and
+        archives with one query each, whatever the batch size.
+        """
+        row_counts = self._row_counts(
+            [c.pk for c in batch if c.message_rows_complete and not c.archived]
+        )
+        legacy = dict(
+            Chat.objects.filter(
+                pk__in=[
+                    c.pk for c in batch if not (c.message_rows_complete or c.archived)
+                ]
+            ).values_list('pk', 'messages')
+        )
+        archived = archived_payloads(c.pk for c in batch if c.archived)
+
+        expected = []
+        for chat in batch:
+            help_responses = chat.help_responses
+            if chat.archived:
+                # The transcript and help responses live in the archive
+                payload = archived.get(chat.pk, {})
+                counters = message_counts(payload.get('messages') or [])
+                help_responses = payload.get('help_responses')
+            elif chat.message_rows_complete:
+                counters = {
+                    name: row_counts.get(chat.pk, {}).get(name, 0)
+                    for name in ROLE_COUNTERS.values()
+                }
+            else:
+                counters = message_counts(legacy.get(chat.pk) or [])
+            counters['help_response_count'] = finished_help_count(help_responses or [])
+            expected.append(counters)
+        return expected
+
+    @staticmethod
+    def _row_counts(chat_ids: list[int]) -> dict[int, dict[str, int]]:
+        """Per-chat counter values from the ChatMessage rows, in one query."""
+        counts = {}
+        rows = (
+            ChatMessage.objects.filter(chat_id__in=chat_ids, role__in=ROLE_COUNTERS)
+            .order_by()
+            .values_list('chat_id', 'role')
+            .annotate(total=Count('id'))
+        )
+        for chat_id, role, total in rows:
+            counts.setdefault(chat_id, {})[ROLE_COUNTERS[role]] = total
+        return counts
@@ -0,0 +1,76 @@
+"""
+Django management command to move per-chat scenario copies into Scenario rows.
+Usage: python manage.py dedupe_scenarios [--batch-size N] [--sleep S]
+
+Walks chats that still carry their own ``course_data`` in primary-key
+order, points each at the shared Scenario row for that JSON (creating it
+the first time) and clears the copy. Each chat is switched with a single
+UPDATE conditional on its version, so the command can run while the site
+is up; a chat that changes underneath it is left for the next run.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.models import Chat
+from api.scenarios import intern_scenario, scenario_hash
+
+
+class Command(BaseCommand):
+    help = 'Deduplicate Chat.course_data copies into shared Scenario rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Chats to load per batch (default: 500)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between batches to limit database load',
+        )
+
+    def handle(self, *args, **options):
+        pending = (
+            Chat.objects.filter(course_data__isnull=False)
+            .only('id', 'version', 'course_data')
+            .order_by('pk')
+        )
+
+        # Scenario id per content hash, so each distinct scenario is
+        # looked up once per run
+        scenario_ids = {}
+        moved = 0
+        skipped = 0
+        last_pk = 0
+        while True:
+            batch = list(pending.filter(pk__gt=last_pk)[: options['batch_size']])
+            if not batch:
+                break
+            for chat in batch:
+                content_hash = scenario_hash(chat.course_data)
+                if content_hash not in scenario_ids:
+                    scenario = intern_scenario(chat.course_data)
+                    scenario_ids[content_hash] = scenario.pk if scenario else None
+                # Not apply_update: the API output doesn't change, so neither
+                # do updated_at or the version clients hold
+                updated = Chat.objects.filter(pk=chat.pk, version=chat.version).update(
+                    scenario_id=scenario_ids[content_hash], course_data=None
+                )
+                if updated:
+                    moved += 1
+                else:
+                    skipped += 1
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Processed chats up to id {last_pk}')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS('=== Scenario Dedupe Summary ==='))
+        self.stdout.write(f'Chats moved to shared scenarios: {moved}')
+        self.stdout.write(f'Distinct scenarios seen: {len(scenario_ids)}')
+        self.stdout.write(f'Chats changed during the run (re-run later): {skipped}')
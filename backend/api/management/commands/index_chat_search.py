@@ -0,0 +1,64 @@
+"""
+Django management command to fill the full-text search vectors of messages.
+Usage: python manage.py index_chat_search [--batch-size N] [--sleep S]
+
+New messages are indexed as they are written; this fills ``search_vector``
+for rows written before staff search existed, in primary-key batches of
+one UPDATE each. Safe to run while the site is up and to re-run. Needs
+PostgreSQL.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import ChatMessage
+from api.search import search_supported
+
+
+class Command(BaseCommand):
+    help = 'Fill ChatMessage.search_vector for messages not yet indexed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Messages to index per UPDATE (default: 5000)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between batches to limit database load',
+        )
+
+    def handle(self, *args, **options):
+        if not search_supported():
+            raise CommandError('Full-text search needs PostgreSQL')
+
+        pending = (
+            ChatMessage.objects.filter(search_vector__isnull=True)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        vector = SearchVector('content', config=settings.CHAT_SEARCH_CONFIG)
+
+        indexed = 0
+        last_pk = 0
+        while True:
+            batch = list(pending.filter(pk__gt=last_pk)[: options['batch_size']])
+            if not batch:
+                break
+            indexed += ChatMessage.objects.filter(pk__in=batch).update(
+                search_vector=vector
+            )
+            last_pk = batch[-1]
+            self.stdout.write(f'Indexed {indexed} messages (up to id {last_pk})')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS('=== Search Index Summary ==='))
+        self.stdout.write(f'Messages indexed: {indexed}')
@@ -0,0 +1,147 @@
+"""
+Django management command to delete old chats and notes for data retention.
+Usage: python manage.py purge_chats --days N [--status S] [--user NAME] [--notes]
+       [--batch-size N] [--sleep S] [--dry-run]
+
+Deletes chats not updated for --days days, optionally only those in the
+given statuses or belonging to the given users, together with their
+messages, events, jobs and archive rows, and updates the owners'
+LearnerStats. Deletes run one batch of chats per short transaction, so
+locks are held briefly and each transaction writes a bounded amount of WAL.
+Chats with work in flight are never purged. A chat updated between being
+selected and deleted is skipped.
+"""
+
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.learner_stats import refresh_learner_stats
+from api.models import Chat, ChatMessage, Note
+
+
+PURGEABLE_STATUSES = [
+    value for value, _ in Chat.STATUS_CHOICES if value not in Chat.TRANSIENT_STATUSES
+]
+
+
+class Command(BaseCommand):
+    help = 'Delete old chats and notes in throttled batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            required=True,
+            help='Delete chats (and notes) not updated for this many days',
+        )
+        parser.add_argument(
+            '--status',
+            action='append',
+            choices=PURGEABLE_STATUSES,
+            help='Only delete chats in this status (repeatable; default: any)',
+        )
+        parser.add_argument(
+            '--user',
+            action='append',
+            help='Only delete chats (and notes) of this username (repeatable)',
+        )
+        parser.add_argument(
+            '--notes',
+            action='store_true',
+            help='Also delete notes older than --days',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Chats or notes to delete per transaction (default: 200)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between batches to limit database load',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be deleted',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] <= 0:
+            raise CommandError('--days must be a positive number of days')
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        chats = Chat.objects.filter(updated_at__lt=cutoff).exclude(
+            status__in=Chat.TRANSIENT_STATUSES
+        )
+        if options['status']:
+            chats = chats.filter(status__in=options['status'])
+        notes = Note.objects.filter(updated_at__lt=cutoff)
+        if options['user']:
+            users = list(User.objects.filter(username__in=options['user']))
+            missing = set(options['user']) - {user.username for user in users}
+            if missing:
+                raise CommandError(f'Unknown users: {", ".join(sorted(missing))}')
+            chats = chats.filter(user__in=users)
+            notes = notes.filter(author__in=users)
+        querysets = [chats, notes] if options['notes'] else [chats]
+
+        if options['dry_run']:
+            self.stdout.write(f'Chats to delete: {chats.count()}')
+            messages = ChatMessage.objects.filter(chat__in=chats).count()
+            self.stdout.write(f'Message rows to delete: {messages}')
+            if options['notes']:
+                self.stdout.write(f'Notes to delete: {notes.count()}')
+            return
+
+        deleted = Counter()
+        started = time.monotonic()
+        for queryset in querysets:
+            self._purge(queryset, deleted, options)
+        elapsed = time.monotonic() - started
+
+        total = sum(deleted.values())
+        self.stdout.write(self.style.SUCCESS('=== Purge Summary ==='))
+        for label, count in sorted(deleted.items()):
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(f'Rows deleted: {total} in {elapsed:.1f}s')
+        if elapsed:
+            self.stdout.write(f'Rows per second: {total / elapsed:.0f}')
+
+    def _purge(self, queryset, deleted: Counter, options) -> None:
+        """Delete ``queryset`` one primary-key batch per transaction."""
+        ids = queryset.order_by('pk').values_list('pk', flat=True)
+        last_pk = 0
+        while True:
+            batch = list(ids.filter(pk__gt=last_pk)[: options['batch_size']])
+            if not batch:
+                break
+            batch_started = time.monotonic()
+            with transaction.atomic():
+                # Re-apply the filters so rows changed since they were
+                # selected are left alone
+                doomed = queryset.filter(pk__in=batch)
+                learners = set()
+                if queryset.model is Chat:
+                    learners.update(doomed.values_list('user_id', flat=True))
+                total, per_model = doomed.delete()
+                refresh_learner_stats(learners)
+            deleted.update(per_model)
+            last_pk = batch[-1]
+            rate = total / max(time.monotonic() - batch_started, 1e-6)
+            self.stdout.write(
+                f'{queryset.model.__name__}: deleted {total} rows '
+                f'(up to id {last_pk}, {rate:.0f} rows/s)'
+            )
+            if options['sleep']:
+                time.sleep(options['sleep'])
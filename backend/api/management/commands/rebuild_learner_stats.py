@@ -0,0 +1,53 @@
+"""
+Django management command to recompute LearnerStats from the chats.
+Usage: python manage.py rebuild_learner_stats [--batch-size N] [--sleep S]
+
+Walks users in primary-key order and, for each batch, aggregates their
+chats in one query and writes their LearnerStats rows in one upsert. Run
+it after restoring data or if the totals ever drift; it is safe to run
+while the site is up and to re-run.
+"""
+
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from api.learner_stats import computed_stats, save_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute every learner's chat, completion and score totals"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Users to recompute per batch (default: 500)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between batches to limit database load',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+
+        rebuilt = 0
+        last_pk = 0
+        while True:
+            batch = list(user_ids.filter(pk__gt=last_pk)[: options['batch_size']])
+            if not batch:
+                break
+            save_stats(computed_stats(batch))
+            rebuilt += len(batch)
+            last_pk = batch[-1]
+            self.stdout.write(f'Rebuilt stats for {rebuilt} users (up to id {last_pk})')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS('=== Learner Stats Summary ==='))
+        self.stdout.write(f'Users rebuilt: {rebuilt}')
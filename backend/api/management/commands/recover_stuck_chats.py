@@ -0,0 +1,35 @@
+"""
+Django management command to recover chats stuck in transient statuses.
+Usage: python manage.py recover_stuck_chats
+
+Run at startup and from cron (or rely on run_llm_workers, which sweeps
+periodically). Deadlines come from CHAT_RECOVERY_DEADLINES. Finished
+jobs older than LLM_JOB_RETENTION_DAYS are deleted in the same sweep.
+
+With LLM_JOB_EXECUTION=inline this command only re-queues jobs: they are
+dispatched by the web process's own recovery sweep, since this process
+exits before a job handed to its worker pool could finish.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.recovery import recover_stuck_chats
+
+
+class Command(BaseCommand):
+    help = 'Re-queue or roll back chats stuck in thinking/getting_help/grading'
+
+    def handle(self, *args, **options):
+        summary = recover_stuck_chats(dispatch=False)
+
+        self.stdout.write(self.style.SUCCESS('=== Recovery Summary ==='))
+        self.stdout.write(f'Re-queued jobs: {summary["requeued"]}')
+        self.stdout.write(f'Failed jobs: {summary["failed_jobs"]}')
+        self.stdout.write(f'Rolled back chats: {summary["rolled_back"]}')
+        self.stdout.write(f'Purged finished jobs: {summary["purged_jobs"]}')
+        if settings.LLM_JOB_EXECUTION == 'inline' and summary['requeued']:
+            self.stdout.write(
+                'Re-queued jobs will be dispatched by the web process '
+                'on its next recovery sweep'
+            )
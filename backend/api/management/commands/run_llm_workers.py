@@ -0,0 +1,129 @@
+"""
+Django management command to run LLM job workers.
+Usage: python manage.py run_llm_workers [--concurrency N] [--poll-interval S]
+
+Claims queued LLMJob rows with SELECT ... FOR UPDATE SKIP LOCKED and runs
+them on a local thread pool. Several instances can run against the same
+Postgres database, on the same or on different hosts.
+
+Each worker also runs the stuck-chat recovery sweep at startup and every
+CHAT_RECOVERY_INTERVAL seconds, and, when CHAT_ARCHIVE_AFTER_DAYS is set,
+archives old graded chats every CHAT_ARCHIVE_INTERVAL seconds.
+"""
+
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.archive import run_archive_sweep
+from api.jobs import claim_jobs, run_job
+from api.recovery import recover_stuck_chats
+from api.task_queue import BoundedTaskExecutor
+
+
+class Command(BaseCommand):
+    help = 'Run background workers that process queued LLM jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.LLM_WORKER_POOL_SIZE,
+            help='Number of jobs to run concurrently (default: LLM_WORKER_POOL_SIZE)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between polls when the queue is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process the jobs that are currently queued, then exit',
+        )
+
+    def request_stop(self, signum, frame):
+        """Signal handler: stop claiming jobs and let in-flight ones finish."""
+        self.stdout.write(self.style.WARNING('Stopping after in-flight jobs finish...'))
+        self._stopping = True
+
+    def sweep(self):
+        """Run one stuck-chat recovery sweep and report any actions taken."""
+        try:
+            summary = recover_stuck_chats()
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'✗ Recovery sweep failed: {e!s}'))
+            return
+        if any(summary.values()):
+            self.stdout.write(self.style.WARNING(f'Recovery sweep: {summary}'))
+
+    def archive(self):
+        """Archive a batch of old graded chats and report how many moved."""
+        try:
+            archived = run_archive_sweep()
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'✗ Archive sweep failed: {e!s}'))
+            return
+        if archived:
+            self.stdout.write(f'Archived {archived} completed chats')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        poll_interval = options['poll_interval']
+        run_once = options['once']
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+
+        executor = BoundedTaskExecutor(
+            max_workers=concurrency, max_queue_size=concurrency
+        )
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ LLM worker {worker_id} started (concurrency={concurrency})'
+            )
+        )
+
+        next_sweep = next_archive = time.monotonic()
+
+        while not self._stopping:
+            if time.monotonic() >= next_sweep:
+                self.sweep()
+                next_sweep = time.monotonic() + max(
+                    settings.CHAT_RECOVERY_INTERVAL, poll_interval
+                )
+            if settings.CHAT_ARCHIVE_AFTER_DAYS > 0 and (
+                time.monotonic() >= next_archive
+            ):
+                self.archive()
+                next_archive = time.monotonic() + max(
+                    settings.CHAT_ARCHIVE_INTERVAL, poll_interval
+                )
+
+            stats = executor.stats()
+            free_slots = concurrency - stats['active_workers'] - stats['queue_depth']
+            if free_slots <= 0:
+                time.sleep(0.1)
+                continue
+
+            jobs = claim_jobs(worker_id, free_slots)
+            for job in jobs:
+                self.stdout.write(
+                    f'→ Running {job.kind} job {job.pk} (chat {job.chat_id})'
+                )
+                executor.submit(run_job, job)
+
+            if not jobs:
+                if run_once:
+                    break
+                time.sleep(poll_interval)
+
+        executor.join()
+        self.stdout.write(self.style.SUCCESS(f'✓ LLM worker {worker_id} stopped'))
@@ -0,0 +1,224 @@
+"""
+Per-message storage for chat transcripts.
+
+ChatMessage rows are the primary store: a turn inserts one row per new
+message instead of rewriting the whole transcript. ``Chat.messages`` is
+still written alongside the rows as a JSON projection for existing
+readers (the API, help and grading prompts) while chats are migrated.
+
+A chat's rows are only read back once they hold its whole transcript
+(``Chat.message_rows_complete``). New chats start that way; older chats
+get there when ``manage.py backfill_chat_messages`` or a full update
+(``sync_message_rows``) copies their JSON into rows.
+
+The per-role counters on Chat (``interaction_count`` and
+``assistant_message_count``) are bumped in the same UPDATE that appends
+messages, so limits can be checked without reading the transcript.
+``manage.py check_chat_counters`` compares them with the stored messages.
+
+Rows are inserted with their full-text ``search_vector`` (see api.search),
+so the search index is maintained as messages are appended, and with their
+``token_count`` (see api.context_budget).
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from django.db import transaction
+from django.db.models import F
+
+from .context_budget import message_content_tokens
+from .db_functions import JSONArrayAppend, JSONArrayWithout
+from .models import Chat, ChatMessage
+from .search import message_search_vector
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+ROLE_MAX_LENGTH = ChatMessage._meta.get_field('role').max_length  # noqa: SLF001
+
+# Chat.messages without a partial streamed reply, for in-place updates
+WITHOUT_PARTIAL_REPLY = JSONArrayWithout('messages', {'streaming': True})
+
+# Chat counter column for each message role that is counted
+ROLE_COUNTERS = {
+    'user': 'interaction_count',
+    'assistant': 'assistant_message_count',
+}
+
+
+def _row(chat_id: int, seq: int, message: dict[str, Any]) -> ChatMessage:
+    """Build the row for one message object."""
+    role = message.get('role')
+    content = message.get('content')
+    token_count = message_content_tokens(message)
+    extra = {k: v for k, v in message.items() if k not in ('role', 'content')}
+    # Anything that doesn't fit the typed columns round-trips through extra
+    if not isinstance(role, str) or len(role) > ROLE_MAX_LENGTH:
+        extra['role'] = role
+        role = ''
+    if not isinstance(content, str):
+        extra['content'] = content
+        content = ''
+    return ChatMessage(
+        chat_id=chat_id,
+        seq=seq,
+        role=role,
+        content=content,
+        extra=extra,
+        search_vector=message_search_vector(content),
+        token_count=token_count,
+    )
+
+
+def _create_rows(chat_id: int, start: int, messages: Iterable[dict]) -> None:
+    ChatMessage.objects.bulk_create(
+        [_row(chat_id, start + i, m) for i, m in enumerate(messages)]
+    )
+
+
+def message_counts(messages: Iterable[dict[str, Any]]) -> dict[str, int]:
+    """Values of the ROLE_COUNTERS columns for a list of messages."""
+    counts = dict.fromkeys(ROLE_COUNTERS.values(), 0)
+    for message in messages:
+        counter = ROLE_COUNTERS.get(message.get('role'))
+        if counter and not message.get('streaming'):
+            counts[counter] += 1
+    return counts
+
+
+def finished_help_count(help_responses: Iterable[dict[str, Any]]) -> int:
+    """Value of ``Chat.help_response_count`` for a list of help responses."""
+    return sum(1 for h in help_responses if h.get('status') != 'processing')
+
+
+def load_messages(chat: Chat) -> list[dict[str, Any]]:
+    """
+    Return a chat's transcript, without any partial streamed reply.
+
+    Reads the rows (one index range scan on ``(chat, seq)``) once they are
+    complete, and the JSON projection before that.
+    """
+    if chat.message_rows_complete:
+        rows = ChatMessage.objects.filter(chat_id=chat.pk).order_by('seq')
+        return [row.as_message() for row in rows]
+    return [m for m in chat.messages or [] if not m.get('streaming')]
+
+
+def load_token_counts(chat: Chat, messages: list[dict[str, Any]]) -> list[int]:
+    """
+    Content token count of each message in ``messages``.
+
+    ``messages`` is the transcript as returned by load_messages. Counts
+    come from the rows; messages whose rows have none yet (written before
+    counts were stored, or reset after a tokenizer change) are counted
+    now and the counts saved. Chats without complete rows are counted in
+    full.
+    """
+    if not chat.message_rows_complete:
+        return [message_content_tokens(m) for m in messages]
+    rows = ChatMessage.objects.filter(chat_id=chat.pk, seq__lt=len(messages))
+    counts = [None] * len(messages)
+    missing = []
+    for pk, seq, stored in rows.values_list('pk', 'seq', 'token_count'):
+        counts[seq] = stored
+        if stored is None:
+            counts[seq] = message_content_tokens(messages[seq])
+            missing.append(ChatMessage(pk=pk, token_count=counts[seq]))
+    if missing:
+        ChatMessage.objects.bulk_update(missing, ['token_count'])
+    return [
+        message_content_tokens(m) if n is None else n
+        for m, n in zip(messages, counts, strict=True)
+    ]
+
+
+def append_messages(
+    chat: Chat,
+    messages: list[dict[str, Any]],
+    new_messages: list[dict[str, Any]],
+    **fields: Any,
+) -> list[dict[str, Any]]:
+    """
+    Append messages to a chat's transcript.
+
+    Inserts a row per new message, numbered on from ``messages`` (the
+    transcript as returned by load_messages), and appends them to the
+    ``Chat.messages`` projection in place (dropping any partial streamed
+    reply), together with any other ``fields``, in one transaction. The
+    role counters are incremented in the same UPDATE.
+
+    Raises:
+        ChatVersionConflictError: If the chat changed since it was read;
+            no rows are inserted
+
+    Returns:
+        The extended transcript
+    """
+    added = {name: n for name, n in message_counts(new_messages).items() if n}
+    counters = {name: getattr(chat, name) + n for name, n in added.items()}
+    with transaction.atomic():
+        # Version check first: a concurrent append fails here with
+        # ChatVersionConflictError (which callers retry) rather than on the
+        # unique (chat, seq) constraint, and holds the row lock until commit
+        chat.apply_update(
+            messages=JSONArrayAppend(WITHOUT_PARTIAL_REPLY, new_messages),
+            **{name: F(name) + n for name, n in added.items()},
+            **fields,
+        )
+        _create_rows(chat.pk, len(messages), new_messages)
+    # The update only matched the version this instance was read at, so
+    # its old counts plus ours are what the row now holds
+    for name, value in counters.items():
+        setattr(chat, name, value)
+    chat.messages = [*messages, *new_messages]
+    return chat.messages
+
+
+def sync_message_rows(chat: Chat) -> None:
+    """
+    Make a chat's rows match its ``messages`` JSON and mark them complete.
+
+    Used after the JSON was replaced wholesale (chat create/update through
+    the API) and by the backfill. Rows up to the first difference are
+    kept; the rest are replaced, and the conversation summary is dropped
+    if it covered any of them. Does not touch ``updated_at``.
+
+    The chat row is locked while the rows are synced, so appends wait for
+    it. If the chat changed since ``chat`` was read (e.g. a turn finished
+    while the backfill held an older snapshot), its current JSON is synced
+    instead and loaded onto ``chat``.
+    """
+    with transaction.atomic():
+        current = (
+            Chat.objects.select_for_update()
+            .filter(pk=chat.pk)
+            .values('version', 'summary_through')
+            .get()
+        )
+        if current['version'] != chat.version:
+            chat.messages = Chat.objects.values_list('messages', flat=True).get(
+                pk=chat.pk
+            )
+            chat.version = current['version']
+        chat.summary_through = current['summary_through']
+        messages = [m for m in chat.messages or [] if not m.get('streaming')]
+        rows = list(ChatMessage.objects.filter(chat_id=chat.pk).order_by('seq'))
+        keep = 0
+        for row, message in zip(rows, messages, strict=False):
+            if row.seq != keep or row.as_message() != message:
+                break
+            keep += 1
+        if keep < len(rows):
+            ChatMessage.objects.filter(chat_id=chat.pk, seq__gte=keep).delete()
+        _create_rows(chat.pk, keep, messages[keep:])
+        fields = {'message_rows_complete': True}
+        # A summary of messages that were changed no longer applies
+        if keep < chat.summary_through:
+            fields.update(summary='', summary_through=0)
+        Chat.objects.filter(pk=chat.pk).update(**fields)
+    for name, value in fields.items():
+        setattr(chat, name, value)
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0007_add_user_profile_openwebui_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMJob',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'kind',
+                    models.CharField(
+                        choices=[
+                            ('chat_message', 'Chat Message'),
+                            ('help', 'Help Request'),
+                            ('grading', 'Grading'),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    'payload',
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text='Job arguments, e.g. {message: "...", is_action: false}',
+                    ),
+                ),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[
+                            ('queued', 'Queued'),
+                            ('running', 'Running'),
+                            ('done', 'Done'),
+                            ('failed', 'Failed'),
+                        ],
+                        default='queued',
+                        max_length=20,
+                    ),
+                ),
+                ('attempts', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                (
+                    'available_at',
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        help_text='Job is not claimed before this time',
+                    ),
+                ),
+                ('locked_by', models.CharField(blank=True, default='', max_length=100)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                (
+                    'chat',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='llm_jobs',
+                        to='api.chat',
+                    ),
+                ),
+            ],
+            options={
+                'ordering': ['available_at', 'id'],
+                'indexes': [
+                    models.Index(
+                        fields=['status', 'available_at'],
+                        name='api_llmjob_status_45188b_idx',
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0008_llmjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatEvent',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'kind',
+                    models.CharField(choices=[('recovery', 'Recovery')], max_length=20),
+                ),
+                ('message', models.TextField()),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(
+                condition=models.Q(
+                    (
+                        'status__in',
+                        ['in_progress', 'thinking', 'getting_help', 'grading'],
+                    )
+                ),
+                fields=['status', 'updated_at'],
+                name='api_chat_transient_idx',
+            ),
+        ),
+        migrations.AddField(
+            model_name='chatevent',
+            name='chat',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='events',
+                to='api.chat',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='chatevent',
+            index=models.Index(
+                fields=['chat', 'created_at'], name='api_chateve_chat_id_2b61a0_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:12
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+if TYPE_CHECKING:
+    from django.apps.registry import Apps
+    from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+
+
+def number_existing_messages(
+    apps: Apps,
+    schema_editor: BaseDatabaseSchemaEditor,  # noqa: ARG001
+) -> None:
+    """Give rows written before seq existed their order within each chat."""
+    ChatMessage = apps.get_model('api', 'ChatMessage')
+    chat_ids = ChatMessage.objects.values_list('chat_id', flat=True).distinct()
+    for chat_id in chat_ids.iterator():
+        rows = ChatMessage.objects.filter(chat_id=chat_id).order_by('timestamp', 'id')
+        for seq, row in enumerate(rows):
+            ChatMessage.objects.filter(pk=row.pk).update(seq=seq)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0009_chat_recovery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='message_rows_complete',
+            field=models.BooleanField(
+                default=False,
+                help_text='Whether ChatMessage rows hold the whole transcript',
+            ),
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='seq',
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text='Position of the message in the chat transcript (0-based)',
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='extra',
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text='Any other keys of the message object, e.g. a client timestamp',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='role',
+            field=models.CharField(
+                choices=[
+                    ('user', 'User'),
+                    ('assistant', 'Assistant'),
+                    ('system', 'System'),
+                    ('scenario', 'Scenario'),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterModelOptions(
+            name='chatmessage',
+            options={'ordering': ['chat', 'seq']},
+        ),
+        migrations.RunPython(number_existing_messages, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='chatmessage',
+            constraint=models.UniqueConstraint(
+                fields=('chat', 'seq'), name='api_chatmessage_chat_seq_uniq'
+            ),
+        ),
+    ]
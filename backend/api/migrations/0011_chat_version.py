@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0010_chatmessage_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='version',
+            field=models.PositiveIntegerField(
+                default=1,
+                help_text='Incremented on every update; writes are conditional on it',
+            ),
+        ),
+    ]
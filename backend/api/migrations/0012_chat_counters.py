@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:05
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.db import migrations, models
+
+
+if TYPE_CHECKING:
+    from django.apps.registry import Apps
+    from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+
+
+def count_existing_chats(
+    apps: Apps,
+    schema_editor: BaseDatabaseSchemaEditor,  # noqa: ARG001
+) -> None:
+    """Fill the new counters (and refresh interaction_count) from the JSON."""
+    Chat = apps.get_model('api', 'Chat')
+    chats = Chat.objects.only('id', 'messages', 'help_responses').order_by('pk')
+    for chat in chats.iterator(chunk_size=500):
+        messages = [m for m in chat.messages or [] if not m.get('streaming')]
+        roles = [m.get('role') for m in messages]
+        Chat.objects.filter(pk=chat.pk).update(
+            interaction_count=roles.count('user'),
+            assistant_message_count=roles.count('assistant'),
+            help_response_count=sum(
+                1 for h in chat.help_responses or [] if h.get('status') != 'processing'
+            ),
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0011_chat_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='assistant_message_count',
+            field=models.IntegerField(
+                default=0,
+                help_text='Number of resident (assistant) replies in this chat',
+            ),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='help_response_count',
+            field=models.IntegerField(
+                default=0,
+                help_text='Number of finished (completed or failed) help responses',
+            ),
+        ),
+        migrations.RunPython(count_existing_chats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0012_chat_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Scenario',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'content_hash',
+                    models.CharField(
+                        editable=False,
+                        help_text='SHA-256 of the canonical JSON of data',
+                        max_length=64,
+                        unique=True,
+                    ),
+                ),
+                (
+                    'data',
+                    models.JSONField(help_text='Scenario JSON as sent by the client'),
+                ),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='chat',
+            name='course_data',
+            field=models.JSONField(
+                blank=True,
+                help_text='JSON data for the course being tutored (legacy copy)',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='scenario',
+            field=models.ForeignKey(
+                blank=True,
+                help_text='Course scenario being tutored',
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='chats',
+                to='api.scenario',
+            ),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:45
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.contrib.postgres import operations as postgres_operations
+from django.db import migrations, models
+
+
+if TYPE_CHECKING:
+    from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+    from django.db.migrations.state import ProjectState
+
+
+class PostgresConcurrentlyMixin:
+    """
+    Run a concurrent index operation on PostgreSQL and the plain one elsewhere.
+
+    The chat table is hot, so on PostgreSQL its indexes are built and
+    dropped without blocking writes. SQLite (tests and local development)
+    has no concurrent index DDL.
+    """
+
+    # The plain operation this one falls back to
+    plain_operation: type[migrations.AddIndex | migrations.RemoveIndex]
+
+    def database_forwards(
+        self,
+        app_label: str,
+        schema_editor: BaseDatabaseSchemaEditor,
+        from_state: ProjectState,
+        to_state: ProjectState,
+    ) -> None:
+        """Apply the operation, concurrently if the database supports it."""
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            self.plain_operation.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(
+        self,
+        app_label: str,
+        schema_editor: BaseDatabaseSchemaEditor,
+        from_state: ProjectState,
+        to_state: ProjectState,
+    ) -> None:
+        """Reverse the operation, concurrently if the database supports it."""
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            self.plain_operation.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+
+class AddIndexConcurrently(
+    PostgresConcurrentlyMixin, postgres_operations.AddIndexConcurrently
+):
+    plain_operation = migrations.AddIndex
+
+
+class RemoveIndexConcurrently(
+    PostgresConcurrentlyMixin, postgres_operations.RemoveIndexConcurrently
+):
+    plain_operation = migrations.RemoveIndex
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0013_scenario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='chat',
+            index=models.Index(
+                fields=['user', '-updated_at', '-id'],
+                include=(
+                    'title',
+                    'status',
+                    'avatar_id',
+                    'score',
+                    'interaction_count',
+                    'assistant_message_count',
+                    'help_response_count',
+                    'completed',
+                    'created_at',
+                    'openwebui_chat_id',
+                ),
+                name='api_chat_user_list_idx',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='chat',
+            index=models.Index(
+                condition=models.Q(('completed', True)),
+                fields=['user', '-score'],
+                name='api_chat_user_score_idx',
+            ),
+        ),
+        # Dropped only once its replacement exists
+        RemoveIndexConcurrently(
+            model_name='chat',
+            name='api_chat_user_id_295c9b_idx',
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0014_chat_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatArchive',
+            fields=[
+                (
+                    'chat',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='archive',
+                        serialize=False,
+                        to='api.chat',
+                    ),
+                ),
+                (
+                    'payload',
+                    models.BinaryField(help_text='gzip-compressed JSON payloads'),
+                ),
+                (
+                    'original_size',
+                    models.PositiveIntegerField(
+                        help_text='Size of the uncompressed JSON in bytes'
+                    ),
+                ),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='archived',
+            field=models.BooleanField(
+                default=False,
+                help_text='Whether the JSON payloads were moved to the cold archive',
+            ),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:20
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+
+
+if TYPE_CHECKING:
+    from django.apps.registry import Apps
+    from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+
+
+def compute_learner_stats(
+    apps: Apps,
+    schema_editor: BaseDatabaseSchemaEditor,  # noqa: ARG001
+) -> None:
+    """Fill LearnerStats for existing users (as rebuild_learner_stats does)."""
+    User = apps.get_model('auth', 'User')
+    Chat = apps.get_model('api', 'Chat')
+    LearnerStats = apps.get_model('api', 'LearnerStats')
+    scored = Q(chats__completed=True, chats__score__isnull=False)
+    latest = Chat.objects.filter(
+        user=OuterRef('pk'), completed=True, score__isnull=False
+    ).order_by('-updated_at', '-id')
+    users = User.objects.annotate(
+        chat_count=Count('chats'),
+        completed_count=Count('chats', filter=Q(chats__completed=True)),
+        score_total=Sum('chats__score', filter=scored, default=0.0),
+        scored_count=Count('chats', filter=scored),
+        latest_score=Subquery(latest.values('score')[:1]),
+        latest_graded_at=Subquery(latest.values('updated_at')[:1]),
+    ).values(
+        'pk',
+        'chat_count',
+        'completed_count',
+        'score_total',
+        'scored_count',
+        'latest_score',
+        'latest_graded_at',
+    )
+    LearnerStats.objects.bulk_create(
+        (LearnerStats(user_id=row.pop('pk'), **row) for row in users.iterator()),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0015_chat_archive'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LearnerStats',
+            fields=[
+                (
+                    'user',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='learner_stats',
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ('chat_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('score_total', models.FloatField(default=0)),
+                ('scored_count', models.PositiveIntegerField(default=0)),
+                (
+                    'latest_score',
+                    models.FloatField(
+                        blank=True,
+                        help_text='Score of the most recently graded chat',
+                        null=True,
+                    ),
+                ),
+                ('latest_graded_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(compute_learner_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0016_learner_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False,
+                help_text='tsvector of content, set when the row is written',
+                null=True,
+            ),
+        ),
+        # The new column is NULL everywhere, so the index builds quickly;
+        # manage.py index_chat_search fills it in batches afterwards
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['search_vector'], name='api_chatmessage_search_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0017_chat_message_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='token_count',
+            field=models.PositiveIntegerField(
+                blank=True,
+                editable=False,
+                help_text='Tokens in content per LLM_TOKENIZER; NULL until counted',
+                null=True,
+            ),
+        ),
+    ]
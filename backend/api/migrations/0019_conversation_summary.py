@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0018_chat_message_token_count'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='llmjob',
+            options={'ordering': ['priority', 'available_at', 'id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='llmjob',
+            name='api_llmjob_status_45188b_idx',
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='summary',
+            field=models.TextField(
+                blank=True,
+                default='',
+                help_text='Summary of the first summary_through messages',
+            ),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='summary_through',
+            field=models.PositiveIntegerField(
+                default=0, help_text='Number of leading messages the summary covers'
+            ),
+        ),
+        migrations.AddField(
+            model_name='llmjob',
+            name='priority',
+            field=models.SmallIntegerField(
+                default=0, help_text='Lower values are claimed first'
+            ),
+        ),
+        migrations.AlterField(
+            model_name='llmjob',
+            name='kind',
+            field=models.CharField(
+                choices=[
+                    ('chat_message', 'Chat Message'),
+                    ('help', 'Help Request'),
+                    ('grading', 'Grading'),
+                    ('summary', 'Conversation Summary'),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='llmjob',
+            index=models.Index(
+                fields=['status', 'priority', 'available_at'],
+                name='api_llmjob_status_e0db35_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0019_conversation_summary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chatevent',
+            name='kind',
+            field=models.CharField(
+                choices=[('recovery', 'Recovery'), ('error', 'Error')], max_length=20
+            ),
+        ),
+    ]
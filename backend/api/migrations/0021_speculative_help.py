@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0020_chat_error_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HelpPrecomputeStats',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                (
+                    'help_requests',
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text='Help requests made while precomputation was on',
+                    ),
+                ),
+                (
+                    'served',
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text='Help requests answered with precomputed help',
+                    ),
+                ),
+                (
+                    'precomputed',
+                    models.PositiveIntegerField(
+                        default=0, help_text='LLM calls made to precompute help'
+                    ),
+                ),
+                (
+                    'cancelled',
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text='Precompute jobs dropped before calling the LLM',
+                    ),
+                ),
+            ],
+            options={
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='speculative_help',
+            field=models.TextField(
+                blank=True,
+                default='',
+                help_text='Help text precomputed for the current turn',
+            ),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='speculative_help_version',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='Chat version speculative_help was computed at',
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name='llmjob',
+            name='kind',
+            field=models.CharField(
+                choices=[
+                    ('chat_message', 'Chat Message'),
+                    ('help', 'Help Request'),
+                    ('grading', 'Grading'),
+                    ('summary', 'Conversation Summary'),
+                    ('help_precompute', 'Help Precompute'),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name='llmjob',
+            name='status',
+            field=models.CharField(
+                choices=[
+                    ('queued', 'Queued'),
+                    ('running', 'Running'),
+                    ('done', 'Done'),
+                    ('failed', 'Failed'),
+                    ('cancelled', 'Cancelled'),
+                ],
+                default='queued',
+                max_length=20,
+            ),
+        ),
+    ]
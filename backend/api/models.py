@@ -1,5 +1,11 @@
+from typing import Any
+
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 
 
 class UserProfile(models.Model):
@@ -30,6 +36,38 @@ class Note(models.Model):
         ordering = ['-created_at']
 
 
+class Scenario(models.Model):
+    """
+    A course scenario (resident, must_disclose, end_conditions, max_turns...).
+
+    Content-addressed: ``content_hash`` is the SHA-256 of the canonical JSON,
+    so every chat started from the same scenario shares one row. Rows are
+    never modified; use ``api.scenarios.intern_scenario`` to get one.
+    """
+
+    content_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        editable=False,
+        help_text='SHA-256 of the canonical JSON of data',
+    )
+    data = models.JSONField(help_text='Scenario JSON as sent by the client')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Scenario {self.content_hash[:12]}'
+
+
+class ChatVersionConflictError(Exception):
+    """A conditional chat write found the chat at a different version."""
+
+    def __init__(self, chat_id: int, version: int) -> None:
+        """Record which chat and version the write expected."""
+        super().__init__(f'Chat {chat_id} is no longer at version {version}')
+        self.chat_id = chat_id
+        self.version = version
+
+
 class Chat(models.Model):
     """
     Stores AI tutor chat sessions with associated metadata and scoring.
@@ -54,6 +92,14 @@ class Chat(models.Model):
         (STATUS_COMPLETE, 'Complete'),
     ]
 
+    # Statuses that only last while background work is in flight
+    TRANSIENT_STATUSES = [
+        STATUS_IN_PROGRESS,
+        STATUS_THINKING,
+        STATUS_GETTING_HELP,
+        STATUS_GRADING,
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chats')
     title = models.CharField(max_length=200, help_text='Chat session title')
 
@@ -65,9 +111,18 @@ class Chat(models.Model):
         help_text='Current status of the chat session',
     )
 
-    # Course and avatar data
+    # Course and avatar data; the scenario is shared between chats, course_data
+    # is only set on chats not yet moved to it (manage.py dedupe_scenarios)
+    scenario = models.ForeignKey(
+        Scenario,
+        on_delete=models.PROTECT,
+        related_name='chats',
+        null=True,
+        blank=True,
+        help_text='Course scenario being tutored',
+    )
     course_data = models.JSONField(
-        help_text='JSON data for the course being tutored',
+        help_text='JSON data for the course being tutored (legacy copy)',
         null=True,
         blank=True,
     )
@@ -78,11 +133,44 @@ class Chat(models.Model):
         blank=True,
     )
 
-    # Chat messages stored as JSON array
+    # Chat messages as a JSON array; a projection of the ChatMessage rows
     messages = models.JSONField(
         default=list,
         help_text="Array of chat messages: [{role: 'user'|'assistant', content: '...', timestamp: '...'}]",
     )
+    message_rows_complete = models.BooleanField(
+        default=False,
+        help_text='Whether ChatMessage rows hold the whole transcript',
+    )
+    # Rolling summary of the start of the transcript, sent to the resident
+    # in place of those messages once the chat outgrows its context window
+    # (see api.context_budget)
+    summary = models.TextField(
+        blank=True,
+        default='',
+        help_text='Summary of the first summary_through messages',
+    )
+    summary_through = models.PositiveIntegerField(
+        default=0,
+        help_text='Number of leading messages the summary covers',
+    )
+    # Help text precomputed after the latest resident reply (see
+    # api.speculative_help); served only while the chat is at that version
+    speculative_help = models.TextField(
+        blank=True,
+        default='',
+        help_text='Help text precomputed for the current turn',
+    )
+    speculative_help_version = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text='Chat version speculative_help was computed at',
+    )
+    # Set when the transcript, help and grading JSON live in ChatArchive
+    archived = models.BooleanField(
+        default=False,
+        help_text='Whether the JSON payloads were moved to the cold archive',
+    )
 
     # Scoring and analytics
     score = models.FloatField(
@@ -99,10 +187,20 @@ class Chat(models.Model):
         default=list,
         help_text="Array of help responses: [{turn: 1, timestamp: '...', help_text: '...'}]",
     )
+    # Counters kept in step with the transcript by the code that appends to
+    # it (see message_store); ``manage.py check_chat_counters`` verifies them
     interaction_count = models.IntegerField(
         default=0,
         help_text='Number of user messages in this chat',
     )
+    assistant_message_count = models.IntegerField(
+        default=0,
+        help_text='Number of resident (assistant) replies in this chat',
+    )
+    help_response_count = models.IntegerField(
+        default=0,
+        help_text='Number of finished (completed or failed) help responses',
+    )
     completed = models.BooleanField(
         default=False,
         help_text='Whether the chat session is marked as completed',
@@ -112,6 +210,12 @@ class Chat(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Optimistic concurrency: bumped by every write, also used as the ETag
+    version = models.PositiveIntegerField(
+        default=1,
+        help_text='Incremented on every update; writes are conditional on it',
+    )
+
     # OpenWebUI reference (optional - for sync if needed)
     openwebui_chat_id = models.CharField(
         max_length=100,
@@ -123,35 +227,348 @@ class Chat(models.Model):
     def __str__(self):
         return f'{self.title} - {self.user.username}'
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save, counting the write as a new version (e.g. edits in the admin)."""
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+
+    def apply_update(self, **fields: Any) -> None:
+        """
+        Write ``fields`` if the chat is still at this instance's version.
+
+        Sends a single ``UPDATE ... WHERE version = n`` that also sets
+        ``updated_at`` and ``version = n + 1``; no row is locked. Values may
+        be query expressions (e.g. an in-place JSON append). Plain values
+        are set on this instance; expression fields are reloaded on next
+        access.
+
+        Raises:
+            ChatVersionConflictError: If another writer got there first (or
+                the chat was deleted); nothing is written
+        """
+        now = timezone.now()
+        updated = Chat.objects.filter(pk=self.pk, version=self.version).update(
+            updated_at=now, version=F('version') + 1, **fields
+        )
+        if not updated:
+            raise ChatVersionConflictError(self.pk, self.version)
+        self.updated_at = now
+        self.version += 1
+        for name, value in fields.items():
+            if hasattr(value, 'resolve_expression'):
+                self.__dict__.pop(name, None)
+            else:
+                setattr(self, name, value)
+
     class Meta:
         ordering = ['-updated_at']
         indexes = [
-            models.Index(fields=['user', '-updated_at']),
+            # Chat listings (a learner's own and staff per-user listings) in
+            # keyset order. Covers the summary columns so Postgres can answer
+            # a page with an index-only scan
+            models.Index(
+                fields=['user', '-updated_at', '-id'],
+                name='api_chat_user_list_idx',
+                include=[
+                    'title',
+                    'status',
+                    'avatar_id',
+                    'score',
+                    'interaction_count',
+                    'assistant_message_count',
+                    'help_response_count',
+                    'completed',
+                    'created_at',
+                    'openwebui_chat_id',
+                ],
+            ),
             models.Index(fields=['completed']),
+            # A learner's graded chats by score (best attempt first)
+            models.Index(
+                fields=['user', '-score'],
+                name='api_chat_user_score_idx',
+                condition=models.Q(completed=True),
+            ),
+            # Partial index for the stuck-chat sweeper; stays tiny because
+            # only chats with in-flight work are included
+            models.Index(
+                fields=['status', 'updated_at'],
+                name='api_chat_transient_idx',
+                condition=models.Q(
+                    status__in=['in_progress', 'thinking', 'getting_help', 'grading']
+                ),
+            ),
         ]
 
 
 class ChatMessage(models.Model):
     """
-    Individual messages within a chat (alternative to storing in JSON).
-    Use this if you need to query/filter individual messages.
+    One message of a chat transcript, stored as its own row.
+
+    This is the primary store for messages: turns append rows instead of
+    rewriting the whole transcript. ``seq`` is the message's index in the
+    transcript. ``Chat.messages`` is kept as a JSON projection of the rows
+    for existing readers until every chat has been backfilled
+    (``manage.py backfill_chat_messages``); ``Chat.message_rows_complete``
+    says whether a chat's rows hold its whole transcript.
     """
 
+    ROLE_CHOICES = [
+        ('user', 'User'),
+        ('assistant', 'Assistant'),
+        ('system', 'System'),
+        ('scenario', 'Scenario'),
+    ]
+
     chat = models.ForeignKey(
         Chat, on_delete=models.CASCADE, related_name='chat_messages'
     )
-    role = models.CharField(
-        max_length=20,
-        choices=[('user', 'User'), ('assistant', 'Assistant'), ('system', 'System')],
+    seq = models.PositiveIntegerField(
+        help_text='Position of the message in the chat transcript (0-based)',
     )
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     content = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    extra = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Any other keys of the message object, e.g. a client timestamp',
+    )
+    timestamp = models.DateTimeField(default=timezone.now)
 
     # Optional: track message-level scoring
     relevance_score = models.FloatField(null=True, blank=True)
 
+    # Cached for context budgeting (see api.context_budget)
+    token_count = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Tokens in content per LLM_TOKENIZER; NULL until counted',
+    )
+
+    # Full-text search (Postgres only; see api.search)
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text='tsvector of content, set when the row is written',
+    )
+
     class Meta:
-        ordering = ['timestamp']
+        ordering = ['chat', 'seq']
+        constraints = [
+            # Also the (chat, seq) index used to read transcripts in order
+            models.UniqueConstraint(
+                fields=['chat', 'seq'], name='api_chatmessage_chat_seq_uniq'
+            ),
+        ]
+        indexes = [
+            # Staff transcript search (a plain index on SQLite)
+            GinIndex(fields=['search_vector'], name='api_chatmessage_search_idx'),
+        ]
 
     def __str__(self):
         return f'{self.role}: {self.content[:50]}...'
+
+    def as_message(self) -> dict:
+        """Return the message object as stored in ``Chat.messages``."""
+        return {'role': self.role, 'content': self.content, **self.extra}
+
+
+class ChatArchive(models.Model):
+    """
+    Cold storage for a completed chat's large JSON columns.
+
+    ``payload`` is the gzip-compressed JSON of the chat's ``messages``,
+    ``help_responses`` and ``grading_data``. While a chat is archived those
+    columns are empty in ``api_chat``; its ChatMessage rows are kept for
+    transcript search. ``api.archive`` reads the payloads back (see
+    ``manage.py archive_chats``).
+    """
+
+    chat = models.OneToOneField(
+        Chat, on_delete=models.CASCADE, primary_key=True, related_name='archive'
+    )
+    payload = models.BinaryField(help_text='gzip-compressed JSON payloads')
+    original_size = models.PositiveIntegerField(
+        help_text='Size of the uncompressed JSON in bytes'
+    )
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Archive of chat {self.chat_id}'
+
+
+class LearnerStats(models.Model):
+    """
+    Per-learner progress totals for staff dashboards.
+
+    Kept up to date as chats are created, graded and deleted (see
+    ``api.learner_stats``), so user listings don't aggregate over every
+    chat; ``manage.py rebuild_learner_stats`` recomputes them from the chats.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='learner_stats'
+    )
+    chat_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    # Average score = score_total / scored_count (completed chats with a score)
+    score_total = models.FloatField(default=0)
+    scored_count = models.PositiveIntegerField(default=0)
+    latest_score = models.FloatField(
+        null=True, blank=True, help_text='Score of the most recently graded chat'
+    )
+    latest_graded_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Stats for {self.user.username}'
+
+    @property
+    def average_score(self) -> float | None:
+        """Mean score over the learner's graded chats (None if none)."""
+        if not self.scored_count:
+            return None
+        return self.score_total / self.scored_count
+
+
+class HelpPrecomputeStats(models.Model):
+    """
+    Daily counts of speculative help precomputation (see api.speculative_help).
+
+    Hit rate is served / help_requests; the share of wasted LLM calls is
+    (precomputed - served) / precomputed.
+    """
+
+    day = models.DateField(primary_key=True)
+    help_requests = models.PositiveIntegerField(
+        default=0, help_text='Help requests made while precomputation was on'
+    )
+    served = models.PositiveIntegerField(
+        default=0, help_text='Help requests answered with precomputed help'
+    )
+    precomputed = models.PositiveIntegerField(
+        default=0, help_text='LLM calls made to precompute help'
+    )
+    cancelled = models.PositiveIntegerField(
+        default=0, help_text='Precompute jobs dropped before calling the LLM'
+    )
+
+    def __str__(self):
+        return f'Help precompute stats for {self.day}'
+
+    class Meta:
+        ordering = ['-day']
+
+
+class ChatEvent(models.Model):
+    """
+    Diagnostics log of a chat: system actions (e.g. stuck-chat recovery) and
+    failed LLM operations.
+
+    Kept apart from the transcript so that error details are never shown to
+    the resident, helper or grader models. Served by
+    ``/api/chats/<id>/diagnostics/``.
+    """
+
+    KIND_RECOVERY = 'recovery'
+    KIND_ERROR = 'error'
+
+    KIND_CHOICES = [
+        (KIND_RECOVERY, 'Recovery'),
+        (KIND_ERROR, 'Error'),
+    ]
+
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='events')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    message = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.kind} event for chat {self.chat_id}: {self.message[:50]}'
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['chat', 'created_at']),
+        ]
+
+
+class LLMJob(models.Model):
+    """
+    Durable queue entry for background LLM work (messages, help, grading).
+
+    Jobs are claimed by workers with SELECT ... FOR UPDATE SKIP LOCKED, so
+    several worker processes can share the same table safely.
+    """
+
+    KIND_CHAT_MESSAGE = 'chat_message'
+    KIND_HELP = 'help'
+    KIND_GRADING = 'grading'
+    KIND_SUMMARY = 'summary'
+    KIND_HELP_PRECOMPUTE = 'help_precompute'
+
+    KIND_CHOICES = [
+        (KIND_CHAT_MESSAGE, 'Chat Message'),
+        (KIND_HELP, 'Help Request'),
+        (KIND_GRADING, 'Grading'),
+        (KIND_SUMMARY, 'Conversation Summary'),
+        (KIND_HELP_PRECOMPUTE, 'Help Precompute'),
+    ]
+
+    # Claimed in ascending order, so learner-facing work goes first
+    PRIORITY_NORMAL = 0
+    PRIORITY_LOW = 10
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    ]
+
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='llm_jobs')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    payload = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Job arguments, e.g. {message: "...", is_action: false}',
+    )
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED
+    )
+    priority = models.SmallIntegerField(
+        default=PRIORITY_NORMAL, help_text='Lower values are claimed first'
+    )
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+
+    # Claim bookkeeping
+    available_at = models.DateTimeField(
+        default=timezone.now, help_text='Job is not claimed before this time'
+    )
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.kind} job {self.pk} for chat {self.chat_id} ({self.status})'
+
+    class Meta:
+        ordering = ['priority', 'available_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'available_at']),
+        ]
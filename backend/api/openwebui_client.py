@@ -3,10 +3,59 @@ OpenWebUI client service for making LLM completion requests.
 """
 
 import os
+import socket
+import threading
+from collections.abc import Iterator
+from http.cookiejar import DefaultCookiePolicy
 from typing import Any
 
 import requests
+from django.conf import settings
 from django.contrib.auth.models import User
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that enables TCP keep-alive on pooled connections."""
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        if settings.OPENWEBUI_TCP_KEEPALIVE:
+            kwargs['socket_options'] = [
+                *HTTPConnection.default_socket_options,
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+            ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Return the process-wide pooled HTTP session used for OpenWebUI calls.
+
+    Connections are reused across LLM turns (no new TCP/TLS handshake per
+    call). The underlying urllib3 pool is thread-safe, so one session is
+    shared by all background worker threads. Cookies are never stored, so
+    one user's login can't leak into another user's requests.
+    """
+    global _session  # noqa: PLW0603
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = KeepAliveHTTPAdapter(
+                    pool_connections=settings.OPENWEBUI_POOL_CONNECTIONS,
+                    pool_maxsize=settings.OPENWEBUI_POOL_MAXSIZE,
+                    pool_block=True,
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
 
 
 class OpenWebUIClient:
@@ -64,7 +113,11 @@ class OpenWebUIClient:
             'password': password,
         }
 
-        response = requests.post(url, json=payload, timeout=30)
+        response = get_http_session().post(
+            url,
+            json=payload,
+            timeout=(settings.OPENWEBUI_CONNECT_TIMEOUT, 30),
+        )
         response.raise_for_status()
 
         data = response.json()
@@ -105,7 +158,7 @@ class OpenWebUIClient:
             messages: List of message objects with 'role' and 'content'
             temperature: Sampling temperature (optional)
             max_tokens: Maximum tokens in response (optional)
-            timeout: Request timeout in seconds (default: 180 for longer operations)
+            timeout: Read timeout in seconds (default: OPENWEBUI_READ_TIMEOUT, 180)
 
         Returns:
             Response from OpenWebUI API
@@ -129,8 +182,10 @@ class OpenWebUIClient:
         if max_tokens is not None:
             payload['max_tokens'] = max_tokens
 
-        # Default timeout is 180 seconds (3 minutes) to handle long-running LLM operations
-        request_timeout = timeout if timeout is not None else 180
+        # Default read timeout is 180 seconds (3 minutes) to handle long-running LLM operations
+        request_timeout = (
+            timeout if timeout is not None else settings.OPENWEBUI_READ_TIMEOUT
+        )
 
         # Log request details for debugging environment differences
         logger.info(
@@ -140,11 +195,11 @@ class OpenWebUIClient:
         )
 
         try:
-            response = requests.post(
+            response = get_http_session().post(
                 url,
                 headers=self._get_headers(),
                 json=payload,
-                timeout=request_timeout,
+                timeout=(settings.OPENWEBUI_CONNECT_TIMEOUT, request_timeout),
             )
 
             # Check for error before raising
@@ -188,85 +243,94 @@ class OpenWebUIClient:
                 f'OpenWebUI request timed out after {request_timeout} seconds'
             )
         except requests.RequestException as e:
-            # Enhanced error logging to capture full error details from OpenRouter
-            import logging
+            raise self._request_error(e, payload)
 
-            logger = logging.getLogger(__name__)
+    def _request_error(
+        self, e: requests.RequestException, payload: dict[str, Any]
+    ) -> Exception:
+        """
+        Log full details of a failed OpenWebUI request and build the exception to raise.
 
-            error_detail = str(e)
-            full_error_info = {
-                'status_code': None,
-                'response_text': None,
-                'response_json': None,
-                'error_type': type(e).__name__,
-            }
+        Args:
+            e: The requests exception
+            payload: The request payload (for model and message previews)
 
-            if hasattr(e, 'response') and e.response is not None:
-                full_error_info['status_code'] = e.response.status_code
-                full_error_info['response_text'] = e.response.text
+        Returns:
+            Exception carrying the most meaningful error message available
+        """
+        # Enhanced error logging to capture full error details from OpenRouter
+        import logging
 
-                try:
-                    error_json = e.response.json()
-                    full_error_info['response_json'] = error_json
-
-                    # Try to extract the most meaningful error message
-                    if isinstance(error_json, dict):
-                        # OpenWebUI/OpenRouter might return error in different formats
-                        error_detail = (
-                            error_json.get('detail')
-                            or error_json.get('error')
-                            or error_json.get('message')
-                            or str(error_json)
-                        )
-
-                        # If it's a nested error object
-                        if isinstance(error_detail, dict):
-                            error_detail = error_detail.get('message') or str(
-                                error_detail
-                            )
-                    else:
-                        error_detail = str(error_json)
-                except:
-                    error_detail = e.response.text or str(e)
+        logger = logging.getLogger(__name__)
 
-            # Log the full error for debugging
-            logger.error(f'OpenWebUI API Error - Full details: {full_error_info}')
-            logger.error(
-                f'Request details: base_url={self.base_url}, model={payload.get("model")}, messages_count={len(payload.get("messages", []))}'
-            )
+        error_detail = str(e)
+        full_error_info = {
+            'status_code': None,
+            'response_text': None,
+            'response_json': None,
+            'error_type': type(e).__name__,
+        }
 
-            # Log message preview for debugging (first and last message)
-            messages_preview = payload.get('messages', [])
-            if messages_preview:
-                logger.error(f'First message: {messages_preview[0]}')
-                if len(messages_preview) > 1:
-                    logger.error(f'Last message: {messages_preview[-1]}')
+        if hasattr(e, 'response') and e.response is not None:
+            full_error_info['status_code'] = e.response.status_code
+            full_error_info['response_text'] = e.response.text
 
-            # Raise exception with enhanced error message
-            raise Exception(
-                f'OpenWebUI API error: {full_error_info["status_code"]}: {error_detail}'
-            )
+            try:
+                error_json = e.response.json()
+                full_error_info['response_json'] = error_json
+
+                # Try to extract the most meaningful error message
+                if isinstance(error_json, dict):
+                    # OpenWebUI/OpenRouter might return error in different formats
+                    error_detail = (
+                        error_json.get('detail')
+                        or error_json.get('error')
+                        or error_json.get('message')
+                        or str(error_json)
+                    )
 
-    def get_conversation_response(
-        self,
-        model: str,
-        messages: list[dict[str, str]],
-    ) -> str:
+                    # If it's a nested error object
+                    if isinstance(error_detail, dict):
+                        error_detail = error_detail.get('message') or str(error_detail)
+                else:
+                    error_detail = str(error_json)
+            except:
+                error_detail = e.response.text or str(e)
+
+        # Log the full error for debugging
+        logger.error(f'OpenWebUI API Error - Full details: {full_error_info}')
+        logger.error(
+            f'Request details: base_url={self.base_url}, model={payload.get("model")}, messages_count={len(payload.get("messages", []))}'
+        )
+
+        # Log message preview for debugging (first and last message)
+        messages_preview = payload.get('messages', [])
+        if messages_preview:
+            logger.error(f'First message: {messages_preview[0]}')
+            if len(messages_preview) > 1:
+                logger.error(f'Last message: {messages_preview[-1]}')
+
+        # Exception with enhanced error message
+        return Exception(
+            f'OpenWebUI API error: {full_error_info["status_code"]}: {error_detail}'
+        )
+
+    def _validate_conversation_messages(
+        self, messages: list[dict[str, str]]
+    ) -> list[dict[str, str]]:
         """
-        Get a response from the resident model during conversation.
+        Drop invalid messages and strip extra keys before sending a conversation.
 
         Args:
-            model: Model ID (e.g., 'slc-resident')
             messages: Conversation history
 
         Returns:
-            The assistant's response text
+            Messages containing only string 'role' and 'content' fields
         """
         import logging
 
         logger = logging.getLogger(__name__)
 
-        # Validate and sanitize messages before sending
         validated_messages = []
         total_chars = 0
 
@@ -298,6 +362,30 @@ class OpenWebUIClient:
                 f'Large conversation: {total_chars} characters (~{total_chars // 4} tokens), may hit limits with Qwen model'
             )
 
+        return validated_messages
+
+    def get_conversation_response(
+        self,
+        model: str,
+        messages: list[dict[str, str]],
+    ) -> str:
+        """
+        Get a response from the resident model during conversation.
+
+        Args:
+            model: Model ID (e.g., 'slc-resident')
+            messages: Conversation history
+
+        Returns:
+            The assistant's response text
+        """
+        import logging
+
+        logger = logging.getLogger(__name__)
+
+        # Validate and sanitize messages before sending
+        validated_messages = self._validate_conversation_messages(messages)
+
         # Regular conversation uses default timeout (180s)
         response = self.chat_completion(model=model, messages=validated_messages)
 
@@ -319,6 +407,125 @@ class OpenWebUIClient:
             logger.error(f'Failed to extract content from response: {response}')
             raise Exception(f'Invalid response structure: {e}. Response: {response}')
 
+    def chat_completion_stream(
+        self,
+        model: str,
+        messages: list[dict[str, str]],
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        timeout: int | None = None,
+    ) -> Iterator[str]:
+        """
+        Make a streaming (``stream: true``) chat completion request to OpenWebUI.
+
+        Reads the server-sent event stream and yields content deltas as they
+        arrive, so callers can show text before the full completion is done.
+
+        Args:
+            model: Model ID to use (e.g., 'slc-resident')
+            messages: List of message objects with 'role' and 'content'
+            temperature: Sampling temperature (optional)
+            max_tokens: Maximum tokens in response (optional)
+            timeout: Seconds to wait between chunks (default: OPENWEBUI_READ_TIMEOUT)
+
+        Yields:
+            Content deltas, in order
+
+        Raises:
+            Exception: If the request fails, times out or the stream reports an error
+        """
+        import json
+        import logging
+
+        logger = logging.getLogger(__name__)
+
+        url = f'{self.base_url}/api/chat/completions'
+
+        payload = {
+            'model': model,
+            'messages': messages,
+            'stream': True,
+        }
+
+        if temperature is not None:
+            payload['temperature'] = temperature
+        if max_tokens is not None:
+            payload['max_tokens'] = max_tokens
+
+        request_timeout = (
+            timeout if timeout is not None else settings.OPENWEBUI_READ_TIMEOUT
+        )
+
+        logger.info(
+            f'OpenWebUI Stream Request: base_url={self.base_url}, model={model}, '
+            f'messages_count={len(messages)}, timeout={request_timeout}'
+        )
+
+        try:
+            with get_http_session().post(
+                url,
+                headers=self._get_headers(),
+                json=payload,
+                stream=True,
+                timeout=(settings.OPENWEBUI_CONNECT_TIMEOUT, request_timeout),
+            ) as response:
+                if response.status_code == 401:
+                    raise Exception(
+                        'OpenWebUI token expired - user needs to log in again'
+                    )
+                if response.status_code >= 400:
+                    # Load the error body so it can still be reported once the
+                    # stream is closed
+                    response.content  # noqa: B018
+                response.raise_for_status()
+
+                for line in response.iter_lines(decode_unicode=True):
+                    # SSE frames are "data: {...}"; skip comments and keep-alives
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[len('data:') :].strip()
+                    if data == '[DONE]':
+                        return
+
+                    try:
+                        chunk = json.loads(data)
+                    except json.JSONDecodeError:
+                        logger.warning(f'Skipping malformed stream chunk: {data}')
+                        continue
+
+                    if chunk.get('error'):
+                        raise Exception(f'OpenWebUI stream error: {chunk["error"]}')
+
+                    for choice in chunk.get('choices') or []:
+                        content = (choice.get('delta') or {}).get('content')
+                        if content:
+                            yield content
+
+        except requests.Timeout:
+            raise Exception(
+                f'OpenWebUI request timed out after {request_timeout} seconds'
+            )
+        except requests.RequestException as e:
+            raise self._request_error(e, payload)
+
+    def stream_conversation_response(
+        self,
+        model: str,
+        messages: list[dict[str, str]],
+    ) -> Iterator[str]:
+        """
+        Stream a response from the resident model during conversation.
+
+        Args:
+            model: Model ID (e.g., 'slc-resident')
+            messages: Conversation history
+
+        Yields:
+            Content deltas of the assistant's response
+        """
+        validated_messages = self._validate_conversation_messages(messages)
+        yield from self.chat_completion_stream(model=model, messages=validated_messages)
+
     def get_help_response(
         self,
         messages: list[dict[str, str]],
@@ -356,6 +563,31 @@ class OpenWebUIClient:
             logger.error(f'Failed to extract help content: {response}')
             raise Exception(f'Invalid help response structure: {e}')
 
+    def get_summary_response(
+        self,
+        messages: list[dict[str, str]],
+    ) -> str:
+        """
+        Get an updated conversation summary (see run_summary).
+
+        Args:
+            messages: Formatted messages for the summary request
+
+        Returns:
+            Summary text
+        """
+        response = self.chat_completion(
+            model=settings.LLM_SUMMARY_MODEL,
+            messages=messages,
+            temperature=0.2,
+            max_tokens=settings.LLM_SUMMARY_MAX_TOKENS,
+        )
+
+        try:
+            return response['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError) as e:
+            raise Exception(f'Invalid summary response structure: {e}')
+
     def get_grading_response(
         self,
         messages: list[dict[str, str]],
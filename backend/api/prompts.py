@@ -194,3 +194,18 @@ META
 - If the user types “/ooc”, pause roleplay and answer plainly.
 - If a request conflicts with boundaries, refuse briefly and offer a safe alternative.
 """
+
+# ============================================================================
+# CONVERSATION SUMMARY - Condenses older turns the resident can no longer see
+# ============================================================================
+
+CONVERSATION_SUMMARY_SYSTEM_PROMPT = """You keep a running summary of a care worker training conversation between a care worker (the learner) and a simulated care home resident.
+
+You will receive the summary so far and the next part of the conversation. Reply with an updated summary that covers both.
+
+- Keep every fact the resident has disclosed (health, feelings, family, preferences, worries) and every promise, question or action by the care worker.
+- Keep names, times and numbers exactly as stated.
+- Write in the third person, in plain British English, as short bullet points.
+- Do not add anything that was not said, and do not give advice or evaluate the care worker.
+- Keep it under 250 words.
+"""
@@ -0,0 +1,240 @@
+"""
+Recovery of chats stuck in transient statuses.
+
+If a worker dies mid-call, a chat can be left in ``thinking``,
+``getting_help`` or ``grading`` (with a ``processing`` help placeholder)
+forever, and the frontend keeps polling it. The sweeper finds chats whose
+transient status is older than a per-operation deadline and either
+re-queues their job or rolls the chat back to a safe state, recording a
+ChatEvent for every action it takes. It also deletes finished jobs older
+than LLM_JOB_RETENTION_DAYS.
+
+In inline mode, jobs run on the web process's worker pool. A sweep from the
+web process hands re-queued and orphaned jobs straight to that pool; a
+one-shot run (``manage.py recover_stuck_chats``) only puts them back in the
+queue, since its process exits before they could finish, and leaves
+dispatching them to the web process's next sweep.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .chat_events import EVENT_SYNC, publish_chat_event
+from .jobs import dispatch_inline, purge_finished_jobs
+from .message_store import WITHOUT_PARTIAL_REPLY
+from .models import Chat, ChatEvent, ChatVersionConflictError, LLMJob
+from .task_queue import TaskQueueFullError, submit_task
+
+
+logger = logging.getLogger(__name__)
+
+# Which job kind drives each transient chat status
+STATUS_JOB_KINDS = {
+    Chat.STATUS_IN_PROGRESS: LLMJob.KIND_CHAT_MESSAGE,
+    Chat.STATUS_THINKING: LLMJob.KIND_CHAT_MESSAGE,
+    Chat.STATUS_GETTING_HELP: LLMJob.KIND_HELP,
+    Chat.STATUS_GRADING: LLMJob.KIND_GRADING,
+}
+
+# Chat status whose CHAT_RECOVERY_DEADLINES entry applies to each job kind
+JOB_KIND_DEADLINE_STATUS = {
+    LLMJob.KIND_CHAT_MESSAGE: Chat.STATUS_THINKING,
+    LLMJob.KIND_HELP: Chat.STATUS_GETTING_HELP,
+    LLMJob.KIND_GRADING: Chat.STATUS_GRADING,
+    # Summaries and precomputed help don't change the chat's status; they
+    # get the deadline of the learner-facing operation closest to them
+    LLMJob.KIND_SUMMARY: Chat.STATUS_THINKING,
+    LLMJob.KIND_HELP_PRECOMPUTE: Chat.STATUS_GETTING_HELP,
+}
+
+
+def _deadline(status: str) -> timedelta:
+    return timedelta(seconds=settings.CHAT_RECOVERY_DEADLINES[status])
+
+
+def _record(chat_id: int, message: str, **data: object) -> None:
+    ChatEvent.objects.create(
+        chat_id=chat_id, kind=ChatEvent.KIND_RECOVERY, message=message, data=data
+    )
+    logger.warning(f'Chat {chat_id}: {message}')
+
+
+def _requeue_stale_jobs(
+    now: datetime, summary: dict[str, int], *, dispatch: bool
+) -> None:
+    """Re-queue (or fail) running jobs whose worker did not finish in time."""
+    for kind, status in JOB_KIND_DEADLINE_STATUS.items():
+        stale_jobs = LLMJob.objects.filter(
+            kind=kind,
+            status=LLMJob.STATUS_RUNNING,
+            locked_at__lt=now - _deadline(status),
+        )
+        for job in stale_jobs:
+            if job.attempts < settings.LLM_JOB_MAX_ATTEMPTS:
+                updated = LLMJob.objects.filter(
+                    pk=job.pk, status=LLMJob.STATUS_RUNNING, locked_at=job.locked_at
+                ).update(
+                    status=LLMJob.STATUS_QUEUED,
+                    locked_by='',
+                    locked_at=None,
+                    available_at=now,
+                )
+                if updated:
+                    if dispatch:
+                        dispatch_inline(job.pk)
+                    _record(
+                        job.chat_id,
+                        f'Re-queued stale {kind} job {job.pk} '
+                        f'(attempt {job.attempts} of {settings.LLM_JOB_MAX_ATTEMPTS})',
+                        action='requeued',
+                        job_id=job.pk,
+                        locked_by=job.locked_by,
+                    )
+                    summary['requeued'] += 1
+            else:
+                LLMJob.objects.filter(pk=job.pk, status=LLMJob.STATUS_RUNNING).update(
+                    status=LLMJob.STATUS_FAILED,
+                    last_error='Worker did not finish before the recovery deadline',
+                    finished_at=now,
+                )
+                summary['failed_jobs'] += 1
+
+
+def _redispatch_orphaned_jobs(now: datetime, summary: dict[str, int]) -> None:
+    """In inline mode, re-submit queued jobs whose web process went away."""
+    if settings.LLM_JOB_EXECUTION != 'inline':
+        return
+    for kind, status in JOB_KIND_DEADLINE_STATUS.items():
+        orphaned = LLMJob.objects.filter(
+            kind=kind,
+            status=LLMJob.STATUS_QUEUED,
+            available_at__lt=now - _deadline(status),
+        )
+        for job in orphaned:
+            # Reset the clock so the job is not re-dispatched on every sweep
+            LLMJob.objects.filter(pk=job.pk, status=LLMJob.STATUS_QUEUED).update(
+                available_at=now
+            )
+            if dispatch_inline(job.pk):
+                _record(
+                    job.chat_id,
+                    f'Re-dispatched orphaned {kind} job {job.pk}',
+                    action='redispatched',
+                    job_id=job.pk,
+                )
+                summary['redispatched'] += 1
+
+
+def _roll_back(chat: Chat) -> bool:
+    """
+    Return a stuck chat to a safe state.
+
+    The update is conditional on the chat's version so a task that
+    finishes concurrently is never overwritten.
+    """
+    updates = {}
+    if chat.status in (Chat.STATUS_IN_PROGRESS, Chat.STATUS_THINKING):
+        updates['status'] = Chat.STATUS_READY
+        # Drop any partial streamed reply; the learner can send the message again
+        updates['messages'] = WITHOUT_PARTIAL_REPLY
+    elif chat.status == Chat.STATUS_GETTING_HELP:
+        updates['status'] = Chat.STATUS_READY
+        # Drop placeholders so the learner can ask for help again
+        updates['help_responses'] = [
+            h for h in (chat.help_responses or []) if h.get('status') != 'processing'
+        ]
+    elif chat.status == Chat.STATUS_GRADING:
+        updates['status'] = Chat.STATUS_READY_FOR_GRADING
+        updates['grading_data'] = {
+            'error': 'Grading did not finish in time. Please try again.',
+            'status': 'failed',
+            'error_type': 'RecoveryTimeout',
+        }
+
+    try:
+        chat.apply_update(**updates)
+    except ChatVersionConflictError:
+        return False
+    return True
+
+
+def recover_stuck_chats(*, dispatch: bool = True) -> dict[str, int]:
+    """
+    Run one recovery sweep.
+
+    Args:
+        dispatch: Hand re-queued and orphaned jobs to this process's worker
+            pool in inline mode. Pass False from processes that exit after
+            the sweep.
+
+    Returns:
+        Counts of actions taken: requeued, redispatched, failed_jobs,
+        rolled_back and purged_jobs (finished jobs past their retention)
+    """
+    now = timezone.now()
+    summary = {'requeued': 0, 'redispatched': 0, 'failed_jobs': 0, 'rolled_back': 0}
+
+    _requeue_stale_jobs(now, summary, dispatch=dispatch)
+    if dispatch:
+        _redispatch_orphaned_jobs(now, summary)
+
+    for status, kind in STATUS_JOB_KINDS.items():
+        # Served by the partial index api_chat_transient_idx
+        stuck_chats = Chat.objects.filter(
+            status=status, updated_at__lt=now - _deadline(status)
+        ).only('id', 'status', 'updated_at', 'version', 'help_responses')
+
+        for chat in stuck_chats:
+            has_active_job = LLMJob.objects.filter(
+                chat_id=chat.pk,
+                kind=kind,
+                status__in=[LLMJob.STATUS_QUEUED, LLMJob.STATUS_RUNNING],
+            ).exists()
+            if has_active_job:
+                continue
+            stuck_since = chat.updated_at
+            if _roll_back(chat):
+                publish_chat_event(chat.pk, EVENT_SYNC, {'reason': 'recovery'})
+                _record(
+                    chat.pk,
+                    f'Rolled back chat stuck in {status!r} since '
+                    f'{stuck_since.isoformat()}',
+                    action='rolled_back',
+                    previous_status=status,
+                )
+                summary['rolled_back'] += 1
+
+    summary['purged_jobs'] = purge_finished_jobs(now)
+    return summary
+
+
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+
+def schedule_sweep_if_due() -> None:
+    """
+    Queue a background sweep if CHAT_RECOVERY_INTERVAL has elapsed.
+
+    Called from request paths that see a chat in a transient status, so a
+    web process without a standalone worker still recovers stuck chats.
+    """
+    global _last_sweep  # noqa: PLW0603
+    interval = settings.CHAT_RECOVERY_INTERVAL
+    if interval <= 0:
+        return
+    with _sweep_lock:
+        if time.monotonic() - _last_sweep < interval:
+            return
+        _last_sweep = time.monotonic()
+    try:
+        submit_task(recover_stuck_chats)
+    except TaskQueueFullError:
+        logger.info('Skipping recovery sweep: worker pool is full')
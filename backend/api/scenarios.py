@@ -0,0 +1,65 @@
+"""
+Shared, content-addressed storage for course scenarios.
+
+Chats reference a Scenario row instead of carrying their own copy of the
+scenario JSON. Because a row's data never changes, parsed scenarios are
+kept in a per-process LRU cache (SCENARIO_CACHE_SIZE entries) that never
+needs invalidating.
+
+Readers should go through scenario_data(), which falls back to the legacy
+``Chat.course_data`` copy for chats that ``manage.py dedupe_scenarios``
+hasn't moved yet.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+
+from .models import Scenario
+
+
+if TYPE_CHECKING:
+    from .models import Chat
+
+
+def scenario_hash(data: Any) -> str:
+    """SHA-256 of the canonical JSON form of ``data`` (key order ignored)."""
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def intern_scenario(data: Any) -> Scenario | None:
+    """
+    Return the Scenario row for ``data``, creating it the first time it's seen.
+
+    Returns:
+        The shared row, or None for chats without a scenario
+    """
+    if data is None:
+        return None
+    scenario, _created = Scenario.objects.get_or_create(
+        content_hash=scenario_hash(data), defaults={'data': data}
+    )
+    return scenario
+
+
+@lru_cache(maxsize=settings.SCENARIO_CACHE_SIZE)
+def get_scenario_data(scenario_id: int) -> Any:
+    """
+    Parsed data of a Scenario row, cached per process.
+
+    The returned object is shared between callers and must not be modified.
+    """
+    return Scenario.objects.values_list('data', flat=True).get(pk=scenario_id)
+
+
+def scenario_data(chat: Chat) -> Any:
+    """A chat's scenario JSON, from the shared row or its legacy copy."""
+    if chat.scenario_id is not None:
+        return get_scenario_data(chat.scenario_id)
+    return chat.course_data
@@ -0,0 +1,119 @@
+"""
+Full-text search over chat transcripts (PostgreSQL).
+
+Each ChatMessage row carries a ``search_vector`` (``to_tsvector`` of its
+content in CHAT_SEARCH_CONFIG), written in the same INSERT as the row
+(see message_store), and a GIN index on it. A search is one bitmap scan
+of that index, grouped by chat: a chat ranks by its best matching message.
+Snippets are only built for the chats on the page being returned.
+
+Rows written before the column existed are filled in by
+``manage.py index_chat_search``. Archiving a chat keeps its message rows,
+so archived chats are found like any other; chats archived before that
+get their rows back from ``manage.py backfill_chat_messages``. On SQLite
+(the tests) vectors are left NULL and search_supported() is False.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection
+from django.db.models import Count, F, Max, Value
+
+from .models import ChatMessage
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from django.db.models import QuerySet
+
+
+# ts_headline options for the snippet shown with each result
+HEADLINE_OPTIONS = {
+    'start_sel': '<mark>',
+    'stop_sel': '</mark>',
+    'max_words': 30,
+    'min_words': 10,
+    'max_fragments': 2,
+}
+
+
+def search_supported() -> bool:
+    """Whether the database has full-text search (PostgreSQL)."""
+    return connection.vendor == 'postgresql'
+
+
+def message_search_vector(content: str) -> SearchVector | None:
+    """Value for ChatMessage.search_vector when inserting ``content``."""
+    if not search_supported():
+        return None
+    return SearchVector(Value(content), config=settings.CHAT_SEARCH_CONFIG)
+
+
+def parse_query(text: str) -> SearchQuery:
+    """A web-search style query (quoted phrases, ``or``, ``-word``)."""
+    return SearchQuery(
+        text, config=settings.CHAT_SEARCH_CONFIG, search_type='websearch'
+    )
+
+
+def matching_messages(query: SearchQuery, role: str | None = None) -> QuerySet:
+    """Messages matching ``query`` (optionally only those with ``role``)."""
+    messages = ChatMessage.objects.filter(search_vector=query)
+    if role:
+        messages = messages.filter(role=role)
+    return messages
+
+
+def chat_hits(query: SearchQuery, role: str | None = None) -> QuerySet:
+    """
+    One row per matching chat: ``chat_id``, ``rank`` and ``match_count``.
+
+    ``rank`` is the best ts_rank of the chat's matching messages. Order
+    by ``('-rank', '-chat_id')`` to page through the results.
+    """
+    return (
+        matching_messages(query, role)
+        .values('chat_id')
+        .annotate(
+            rank=Max(SearchRank(F('search_vector'), query)),
+            match_count=Count('id'),
+        )
+    )
+
+
+def best_snippets(
+    chat_ids: Iterable[int], query: SearchQuery, role: str | None = None
+) -> dict[int, dict[str, Any]]:
+    """
+    The best matching message of each chat, with a highlighted snippet.
+
+    Returns:
+        ``{chat_id: {'seq': ..., 'role': ..., 'snippet': ...}}``
+    """
+    messages = (
+        matching_messages(query, role)
+        .filter(chat_id__in=list(chat_ids))
+        .annotate(
+            rank=SearchRank(F('search_vector'), query),
+            snippet=SearchHeadline(
+                'content',
+                query,
+                config=settings.CHAT_SEARCH_CONFIG,
+                **HEADLINE_OPTIONS,
+            ),
+        )
+        .order_by('chat_id', '-rank', 'seq')
+        .distinct('chat_id')
+        .values('chat_id', 'seq', 'role', 'snippet')
+    )
+    return {row.pop('chat_id'): row for row in messages}
@@ -1,11 +1,27 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
-from .models import Chat, ChatMessage, Note
+from .models import Chat, ChatEvent, ChatMessage, Note
+from .scenarios import intern_scenario, scenario_data
+
+
+if TYPE_CHECKING:
+    from django.db.models import QuerySet
+
+
+# Progress totals annotated onto users by the staff listing (from LearnerStats)
+USER_STATS_FIELDS = ('chat_count', 'completed_count', 'average_score', 'latest_score')
 
 
 class UserSerializer(serializers.ModelSerializer):
     chat_count = serializers.IntegerField(read_only=True, required=False)
+    completed_count = serializers.IntegerField(read_only=True, required=False)
+    average_score = serializers.FloatField(read_only=True, required=False)
+    latest_score = serializers.FloatField(read_only=True, required=False)
 
     class Meta:
         model = User
@@ -17,7 +33,7 @@ class UserSerializer(serializers.ModelSerializer):
             'last_name',
             'email',
             'is_staff',
-            'chat_count',
+            *USER_STATS_FIELDS,
         ]
         extra_kwargs = {
             'password': {'write_only': True},
@@ -45,15 +61,27 @@ class ChatMessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ChatMessage
-        fields = ['id', 'role', 'content', 'timestamp', 'relevance_score']
+        fields = ['id', 'seq', 'role', 'content', 'timestamp', 'relevance_score']
         read_only_fields = ['id', 'timestamp']
 
 
+class ChatEventSerializer(serializers.ModelSerializer):
+    """Serializer for a chat's diagnostics log entries."""
+
+    class Meta:
+        model = ChatEvent
+        fields = ['id', 'kind', 'message', 'data', 'created_at']
+        read_only_fields = fields
+
+
 class ChatSerializer(serializers.ModelSerializer):
     """Serializer for chat sessions."""
 
     user = UserSerializer(read_only=True)
-    chat_messages = ChatMessageSerializer(many=True, read_only=True)
+    # From the shared (cached) scenario row, or the chat's legacy copy
+    course_data = serializers.SerializerMethodField()
+    # A string, like the version in status and delta responses
+    version = serializers.CharField(read_only=True)
 
     class Meta:
         model = Chat
@@ -69,13 +97,72 @@ class ChatSerializer(serializers.ModelSerializer):
             'grading_data',
             'help_responses',
             'interaction_count',
+            'assistant_message_count',
+            'help_response_count',
+            'completed',
+            'created_at',
+            'updated_at',
+            'openwebui_chat_id',
+            'version',
+        ]
+        read_only_fields = [
+            'id',
+            'user',
+            'interaction_count',
+            'assistant_message_count',
+            'help_response_count',
+            'created_at',
+            'updated_at',
+            'version',
+        ]
+
+    def get_course_data(self, obj: Chat) -> Any:
+        """Return the chat's scenario JSON."""
+        return scenario_data(obj)
+
+
+class ChatSummarySerializer(serializers.ModelSerializer):
+    """
+    Serializer for chat listings.
+
+    Leaves out the transcript, help, grading and course JSON. Pass the
+    queryset through setup_queryset() so those columns are never loaded
+    and the user comes from the same query.
+    """
+
+    user = UserSerializer(read_only=True)
+
+    class Meta:
+        model = Chat
+        fields = [
+            'id',
+            'user',
+            'title',
+            'status',
+            'avatar_id',
+            'score',
+            'interaction_count',
+            'assistant_message_count',
+            'help_response_count',
             'completed',
             'created_at',
             'updated_at',
             'openwebui_chat_id',
-            'chat_messages',
         ]
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+    @staticmethod
+    def setup_queryset(queryset: QuerySet[Chat]) -> QuerySet[Chat]:
+        """Load only the listed columns, joining the user in one query."""
+        user_fields = [
+            f'user__{name}'
+            for name in UserSerializer.Meta.fields
+            if name != 'password' and name not in USER_STATS_FIELDS
+        ]
+        chat_fields = [
+            name for name in ChatSummarySerializer.Meta.fields if name != 'user'
+        ]
+        return queryset.select_related('user').only(*chat_fields, 'user', *user_fields)
 
 
 class ChatCreateUpdateSerializer(serializers.ModelSerializer):
@@ -94,7 +181,27 @@ class ChatCreateUpdateSerializer(serializers.ModelSerializer):
             'completed',
             'openwebui_chat_id',
         ]
-        read_only_fields = ['id']
+        # Counters follow the messages (see message_store.message_counts)
+        read_only_fields = ['id', 'interaction_count']
+
+    def create(self, validated_data):
+        """Create the chat, pointing it at the shared scenario row."""
+        return super().create(self._with_scenario(validated_data))
+
+    def update(self, instance, validated_data):
+        """Write only the submitted fields, if the chat is unchanged since read."""
+        instance.apply_update(**self._with_scenario(validated_data))
+        return instance
+
+    @staticmethod
+    def _with_scenario(validated_data: dict) -> dict:
+        """Swap submitted course_data for a reference to its Scenario row."""
+        if 'course_data' in validated_data:
+            validated_data['scenario'] = intern_scenario(
+                validated_data.pop('course_data')
+            )
+            validated_data['course_data'] = None
+        return validated_data
 
     def validate_messages(self, value):
         """Ensure messages is a list of valid message objects."""
@@ -0,0 +1,66 @@
+"""
+Speculative help: precomputing "Get help" for the current turn.
+
+Learners mostly ask for help when they are stuck, and then wait for a full
+LLM round trip. With LLM_SPECULATIVE_HELP on, each resident reply queues a
+low-priority job (LLMJob.KIND_HELP_PRECOMPUTE, see
+background_tasks.run_help_precompute) that asks the helper model for help
+on the turn and stores it on the chat (``Chat.speculative_help``) without
+bumping its version, so clients never see it. ChatGetHelpView answers
+straight from it while the chat is still at the version it was computed
+at.
+
+Any write to the chat makes the stored help stale. Sending a message also
+cancels the chat's queued precompute jobs; one already running finishes
+its call, but its result is thrown away when the chat has moved on.
+
+Outcomes are counted per day in HelpPrecomputeStats: help requests,
+requests served from precomputed help, LLM calls made to precompute and
+jobs dropped before their call. LLMQueueStatsView reports the totals with
+the hit rate and the share of wasted calls.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Chat, HelpPrecomputeStats
+
+
+COUNTERS = ['help_requests', 'served', 'precomputed', 'cancelled']
+
+
+def record_speculative_help(**counts: int) -> None:
+    """Add ``counts`` (e.g. ``served=1``) to today's HelpPrecomputeStats row."""
+    day = timezone.localdate()
+    HelpPrecomputeStats.objects.get_or_create(day=day)
+    HelpPrecomputeStats.objects.filter(day=day).update(
+        **{name: F(name) + n for name, n in counts.items()}
+    )
+
+
+def precomputed_help(chat: Chat) -> str:
+    """The chat's precomputed help, or '' if there is none for its version."""
+    if chat.speculative_help_version != chat.version:
+        return ''
+    return chat.speculative_help
+
+
+def speculative_help_totals() -> dict[str, Any]:
+    """All-time counts with the hit rate and the share of wasted calls."""
+    totals = HelpPrecomputeStats.objects.aggregate(
+        **{name: Sum(name, default=0) for name in COUNTERS}
+    )
+    requests, served, calls = (
+        totals['help_requests'],
+        totals['served'],
+        totals['precomputed'],
+    )
+    return {
+        **totals,
+        'hit_rate': served / requests if requests else None,
+        'wasted_call_rate': (calls - served) / calls if calls else None,
+    }
@@ -0,0 +1,165 @@
+"""
+Bounded worker pool for background LLM tasks.
+
+All background work (chat messages, help requests, grading) is executed by a
+single process-wide pool of worker threads fed from a bounded queue. This caps
+the number of concurrent OpenWebUI calls and database connections, and lets
+views reject work with a retry hint instead of spawning unbounded threads.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+class TaskQueueFullError(Exception):
+    """Raised when the worker pool queue is full and cannot accept new work."""
+
+    def __init__(self, retry_after: int) -> None:
+        """Store the retry hint (in seconds) for the client."""
+        super().__init__('LLM task queue is full')
+        self.retry_after = retry_after
+
+
+class BoundedTaskExecutor:
+    """
+    Fixed-size pool of daemon worker threads consuming a bounded queue.
+
+    Workers are started lazily on first submit, so importing this module
+    (e.g. from management commands or tests) does not spawn threads.
+    """
+
+    def __init__(
+        self, max_workers: int, max_queue_size: int, retry_after: int = 5
+    ) -> None:
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Number of worker threads
+            max_queue_size: Maximum number of tasks waiting for a worker
+            retry_after: Seconds clients should wait before retrying when full
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max(1, max_queue_size)
+        self.retry_after = retry_after
+
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_queue_size)
+        self._lock = threading.Lock()
+        self._workers: list[threading.Thread] = []
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    def _ensure_workers(self) -> None:
+        """Start worker threads if they are not running yet."""
+        with self._lock:
+            self._workers = [w for w in self._workers if w.is_alive()]
+            for i in range(len(self._workers), self.max_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f'llm-worker-{i}',
+                    daemon=True,
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _worker_loop(self) -> None:
+        """Take tasks off the queue and run them until the process exits."""
+        while True:
+            func, args, kwargs = self._queue.get()
+            with self._lock:
+                self._active += 1
+            # Each worker thread keeps its own DB connection; drop it if stale
+            close_old_connections()
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                logger.exception(f'Unhandled error in background task {func!r}')
+                with self._lock:
+                    self._failed += 1
+            else:
+                with self._lock:
+                    self._completed += 1
+            finally:
+                close_old_connections()
+                with self._lock:
+                    self._active -= 1
+                self._queue.task_done()
+
+    def submit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """
+        Queue a callable for execution on a worker thread.
+
+        Raises:
+            TaskQueueFullError: If the queue is at capacity
+        """
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait((func, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            logger.warning(
+                f'LLM task queue full ({self.max_queue_size} waiting), rejecting task'
+            )
+            raise TaskQueueFullError(self.retry_after) from None
+        with self._lock:
+            self._submitted += 1
+
+    def join(self) -> None:
+        """Block until every queued task has finished."""
+        self._queue.join()
+
+    def stats(self) -> dict[str, int]:
+        """Return a snapshot of queue depth and worker utilisation."""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'live_workers': sum(1 for w in self._workers if w.is_alive()),
+                'active_workers': self._active,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_size': self.max_queue_size,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+            }
+
+
+_executor: BoundedTaskExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_task_executor() -> BoundedTaskExecutor:
+    """Return the process-wide executor, creating it from settings on first use."""
+    global _executor  # noqa: PLW0603
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = BoundedTaskExecutor(
+                    max_workers=settings.LLM_WORKER_POOL_SIZE,
+                    max_queue_size=settings.LLM_WORKER_QUEUE_SIZE,
+                    retry_after=settings.LLM_WORKER_RETRY_AFTER,
+                )
+    return _executor
+
+
+def submit_task(func: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+    """Submit a callable to the shared LLM worker pool."""
+    get_task_executor().submit(func, *args, **kwargs)
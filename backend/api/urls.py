@@ -13,7 +13,9 @@ urlpatterns = [
     path('users/', views.AllUsersView.as_view(), name='all-users'),
     # Chat endpoints
     path('chats/', views.Chats.as_view(), name='chat-list'),
+    path('chats/search/', views.ChatSearchView.as_view(), name='chat-search'),
     path('chats/<int:pk>/', views.ChatDetail.as_view(), name='chat-detail'),
+    path('chats/<int:pk>/status/', views.ChatStatusView.as_view(), name='chat-status'),
     # Staff-only chat endpoints
     path('users/<int:user_id>/chats/', views.UserChats.as_view(), name='user-chats'),
     # LLM operation endpoints
@@ -28,4 +30,22 @@ urlpatterns = [
         name='chat-get-help',
     ),
     path('chats/<int:pk>/grade/', views.ChatGradeView.as_view(), name='chat-grade'),
+    # Diagnostics log (errors and recovery actions)
+    path(
+        'chats/<int:pk>/diagnostics/',
+        views.ChatDiagnosticsView.as_view(),
+        name='chat-diagnostics',
+    ),
+    # Server-sent events push channel
+    path(
+        'chats/<int:pk>/events/',
+        views.ChatEventsView.as_view(),
+        name='chat-events',
+    ),
+    # Background worker pool metrics (staff only)
+    path(
+        'llm/queue/stats/',
+        views.LLMQueueStatsView.as_view(),
+        name='llm-queue-stats',
+    ),
 ]
@@ -5,16 +5,35 @@ This package contains shared utilities extracted from views.py for better
 maintainability and reusability.
 """
 
+from .conditional import (
+    chat_etag,
+    chat_version,
+    if_match_failed,
+    not_modified_response,
+    retry_version_conflicts,
+    set_cache_headers,
+    version_conflict_response,
+)
 from .formatting import format_conversation_for_llm
 from .openwebui_helpers import get_openwebui_token
-from .pagination import get_pagination_data
+from .pagination import get_pagination_data, paginate_queryset
+from .task_helpers import task_queue_full_response
 from .validation import check_chat_not_completed, check_max_turns_not_exceeded
 
 
 __all__ = [
+    'chat_etag',
+    'chat_version',
     'check_chat_not_completed',
     'check_max_turns_not_exceeded',
     'format_conversation_for_llm',
     'get_openwebui_token',
     'get_pagination_data',
+    'if_match_failed',
+    'not_modified_response',
+    'paginate_queryset',
+    'retry_version_conflicts',
+    'set_cache_headers',
+    'task_queue_full_response',
+    'version_conflict_response',
 ]
@@ -0,0 +1,114 @@
+"""Conditional request (ETag / If-None-Match / If-Match) helpers for chat views."""
+
+from __future__ import annotations
+
+import functools
+import logging
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.models import ChatVersionConflictError
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from django.http import HttpRequest, HttpResponse
+
+
+logger = logging.getLogger(__name__)
+
+
+def chat_version(version: int) -> str:
+    """Opaque version token for a chat, from its version column."""
+    return str(version)
+
+
+def chat_etag(version: int) -> str:
+    """Quoted ETag for a chat, from its version column."""
+    return f'"{chat_version(version)}"'
+
+
+def not_modified_response(request: HttpRequest, etag: str) -> HttpResponse | None:
+    """
+    Return a 304 response if the client's If-None-Match matches ``etag``.
+
+    Only the ETag is compared: a chat changes several times a second while
+    a reply streams, which Last-Modified's one-second resolution can't
+    represent.
+
+    Returns:
+        HttpResponseNotModified if unchanged, None if the full response is needed
+    """
+    return get_conditional_response(request, etag=etag)
+
+
+def set_cache_headers(response: HttpResponse, etag: str) -> HttpResponse:
+    """Attach the ETag and make clients revalidate on every request."""
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def if_match_failed(request: HttpRequest, etag: str) -> bool:
+    """Whether the request has an If-Match header that ``etag`` doesn't satisfy."""
+    header = request.headers.get('If-Match')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' not in etags and etag not in etags
+
+
+def version_conflict_response(version: int | None = None) -> Response:
+    """
+    Build a 409 response for a write that lost an optimistic concurrency race.
+
+    Args:
+        version: The chat's current version, if known, so the client can
+            reload and retry.
+
+    Returns:
+        Response telling the client to reload the chat and try again.
+    """
+    body = {
+        'status': 'fail',
+        'message': 'This chat was changed by another request. Reload and try again.',
+        'error_code': 'VERSION_CONFLICT',
+    }
+    if version is not None:
+        body['version'] = chat_version(version)
+    return Response(body, status=status.HTTP_409_CONFLICT)
+
+
+def retry_version_conflicts(view_method: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Re-run a view method whose chat write lost an optimistic concurrency race.
+
+    The method loads the chat, checks it and writes it, letting
+    ChatVersionConflictError propagate from the write. A request with an
+    If-Match header asked to change only that version, so it gets a 409.
+    Any other request is run again from the start, up to
+    CHAT_WRITE_RETRIES times, so its checks (completed, max turns...) see
+    the chat as the other writer left it.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(view: Any, request: Any, *args: Any, **kwargs: Any) -> Any:
+        for attempt in range(settings.CHAT_WRITE_RETRIES + 1):
+            try:
+                return view_method(view, request, *args, **kwargs)
+            except ChatVersionConflictError as e:
+                if (
+                    'If-Match' in request.headers
+                    or attempt == settings.CHAT_WRITE_RETRIES
+                ):
+                    return version_conflict_response()
+                logger.info(f'Chat {e.chat_id} changed concurrently, retrying request')
+        raise AssertionError('unreachable')  # pragma: no cover
+
+    return wrapper
@@ -5,6 +5,9 @@ from __future__ import annotations
 import json
 from typing import TYPE_CHECKING
 
+from api.context_budget import is_conversational
+from api.scenarios import scenario_data
+
 
 if TYPE_CHECKING:
     from api.models import Chat
@@ -26,13 +29,13 @@ def format_conversation_for_llm(chat: Chat, include_json_metadata: bool = True)
     """
     metadata = {
         'title': chat.title,
-        'course_data': chat.course_data,
+        'course_data': scenario_data(chat),
         'avatar_id': chat.avatar_id,
         'interaction_count': chat.interaction_count,
     }
 
     transcript_lines = []
-    for msg in chat.messages:
+    for msg in filter(is_conversational, chat.messages):
         role = 'User' if msg.get('role') == 'user' else 'Resident'
         transcript_lines.append(f'{role}: {msg.get("content", "")}')
 
@@ -1,15 +1,36 @@
-"""Pagination utility for API views."""
+"""
+Pagination utilities for API views.
+
+List endpoints support two modes. Page-number mode (``?page=N``, the
+default) counts the rows and slices with OFFSET, so deep pages and large
+tables get slower. Cursor mode is opted into with a ``cursor`` query
+parameter (empty for the first page): rows are fetched with a keyset
+filter on the view's ordering, so every page costs the same index range
+scan, and the total count is only run when ``include_total=true``.
+"""
 
 from __future__ import annotations
 
+import base64
+import binascii
+import datetime as dt
+import json
 import math
-from typing import TYPE_CHECKING, TypedDict
+from typing import TYPE_CHECKING, Any, TypedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
 
 
 if TYPE_CHECKING:
+    from django.db.models import Model, QuerySet
     from rest_framework.request import Request
 
 
+DEFAULT_PAGE_SIZE = 10
+
+
 class PaginationData(TypedDict):
     """Type definition for pagination response data."""
 
@@ -42,15 +63,10 @@ def get_pagination_data(request: Request, total_items: int) -> PaginationData:
         page = int(request.GET.get('page', 1))
     except (TypeError, ValueError):
         page = 1
-    try:
-        page_size = int(request.GET.get('page_size', 10))
-    except (TypeError, ValueError):
-        page_size = 10
+    page_size = get_page_size(request)
 
     if page < 1:
         page = 1
-    if page_size <= 0:
-        page_size = 10
 
     total_pages = max(1, math.ceil(total_items / page_size)) if page_size > 0 else 1
     next_page = page + 1 if page < total_pages else None
@@ -74,3 +90,135 @@ def get_pagination_data(request: Request, total_items: int) -> PaginationData:
         'end_index': end_index,
         'total_items': total_items,
     }
+
+
+class CursorPaginationData(TypedDict):
+    """Type definition for cursor-mode pagination response data."""
+
+    page_size: int
+    next_cursor: str | None
+    has_more: bool
+    total_items: int | None
+
+
+def get_page_size(request: Request) -> int:
+    """
+    Read ``page_size`` from the query string.
+
+    Invalid or non-positive values fall back to the default; large values
+    are clamped to API_MAX_PAGE_SIZE.
+    """
+    try:
+        page_size = int(request.GET.get('page_size', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        page_size = DEFAULT_PAGE_SIZE
+    if page_size <= 0:
+        page_size = DEFAULT_PAGE_SIZE
+    return min(page_size, settings.API_MAX_PAGE_SIZE)
+
+
+def paginate_queryset(
+    request: Request, queryset: QuerySet, ordering: tuple[str, ...]
+) -> tuple[list[Any], PaginationData | CursorPaginationData]:
+    """
+    Return one page of ``queryset`` and its pagination metadata.
+
+    Uses cursor mode when the request has a ``cursor`` parameter and
+    page-number mode otherwise (the original response shape).
+
+    Args:
+        request: The DRF request object containing query parameters.
+        queryset: Unordered or ordered queryset to page through.
+        ordering: Non-null model fields or annotations, ending in a unique
+            one, e.g. ``('-updated_at', '-id')``. Put the leading fields in
+            an index. The queryset may be a ``.values()`` one.
+
+    Returns:
+        The rows on the page and the pagination dict for the response.
+    """
+    queryset = queryset.order_by(*ordering)
+    if 'cursor' not in request.GET:
+        pagination = get_pagination_data(request, queryset.count())
+        rows = queryset[pagination['start_index'] : pagination['end_index']]
+        return list(rows), pagination
+
+    page_size = get_page_size(request)
+    total_items = None
+    if request.GET.get('include_total', '').lower() in ('1', 'true'):
+        total_items = queryset.count()
+
+    # An unreadable cursor starts from the first page, like a bad ?page=
+    key = _decode_cursor(request.GET['cursor'], queryset.model, ordering)
+    if key is not None:
+        queryset = queryset.filter(_after(ordering, key))
+
+    rows = list(queryset[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = _encode_cursor(rows[-1], ordering) if has_more else None
+
+    return rows, {
+        'page_size': page_size,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'total_items': total_items,
+    }
+
+
+def _after(ordering: tuple[str, ...], key: list[Any]) -> Q:
+    """Rows that sort after ``key`` under ``ordering``."""
+    fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+    condition = Q()
+    for i, (name, descending) in enumerate(fields):
+        lookup = 'lt' if descending else 'gt'
+        branch = Q(**{f'{name}__{lookup}': key[i]})
+        for j in range(i):
+            branch &= Q(**{fields[j][0]: key[j]})
+        condition |= branch
+    # Redundant bound on the leading column so the index gives a range scan
+    name, descending = fields[0]
+    leading = Q(**{f'{name}__{"lte" if descending else "gte"}': key[0]})
+    return leading & condition
+
+
+def _encode_cursor(row: Model | dict[str, Any], ordering: tuple[str, ...]) -> str:
+    values = []
+    for name in ordering:
+        # Rows of a .values() queryset are dicts
+        if isinstance(row, dict):
+            value = row[name.lstrip('-')]
+        else:
+            value = getattr(row, name.lstrip('-'))
+        # Keep microseconds; DjangoJSONEncoder would round to milliseconds
+        if isinstance(value, dt.datetime):
+            value = value.isoformat()
+        values.append(value)
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _decode_cursor(
+    cursor: str, model: type[Model], ordering: tuple[str, ...]
+) -> list[Any] | None:
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            return None
+        return [
+            _cursor_value(model, name.lstrip('-'), value)
+            for name, value in zip(ordering, values, strict=True)
+        ]
+    except (binascii.Error, UnicodeError, ValueError, ValidationError):
+        return None
+
+
+def _cursor_value(model: type[Model], name: str, value: Any) -> Any:
+    try:
+        field = model._meta.get_field(name)  # noqa: SLF001
+    except FieldDoesNotExist:
+        # An annotation (e.g. a search rank); only plain JSON values are sortable
+        if isinstance(value, int | float | str):
+            return value
+        raise ValueError(f'Bad cursor value for {name}') from None
+    return field.to_python(value)
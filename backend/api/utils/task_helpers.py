@@ -0,0 +1,34 @@
+"""Helpers for responding to background task submission failures."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from rest_framework import status
+from rest_framework.response import Response
+
+
+if TYPE_CHECKING:
+    from api.task_queue import TaskQueueFullError
+
+
+def task_queue_full_response(error: TaskQueueFullError) -> Response:
+    """
+    Build a 503 response telling the client to retry later.
+
+    Args:
+        error: The TaskQueueFullError raised by the worker pool.
+
+    Returns:
+        Response with a Retry-After header and retry hint in the body.
+    """
+    return Response(
+        {
+            'status': 'fail',
+            'message': 'The tutor is busy right now. Please try again shortly.',
+            'error_code': 'QUEUE_FULL',
+            'retry_after': error.retry_after,
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(error.retry_after)},
+    )
@@ -7,6 +7,8 @@ from typing import TYPE_CHECKING
 from rest_framework import status
 from rest_framework.response import Response
 
+from api.scenarios import scenario_data
+
 
 if TYPE_CHECKING:
     from api.models import Chat
@@ -43,37 +45,24 @@ def check_max_turns_not_exceeded(chat: Chat) -> Response | None:
     """
     Check if the maximum number of turns has been reached for a chat.
 
+    Uses the ``interaction_count`` counter and the cached scenario, so
+    neither the transcript nor the scenario JSON is read.
+
     Args:
         chat: The Chat model instance to check.
 
     Returns:
         Error Response if max turns exceeded, None otherwise.
     """
-    if chat.course_data and isinstance(chat.course_data, dict):
-        max_turns = chat.course_data.get('max_turns')
-        if max_turns is not None:
-            current_turn_count = len(
-                [m for m in chat.messages if m.get('role') == 'user']
+    course_data = scenario_data(chat)
+    if course_data and isinstance(course_data, dict):
+        max_turns = course_data.get('max_turns')
+        if max_turns is not None and chat.interaction_count >= max_turns:
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': f'Maximum turns ({max_turns}) reached for this chat',
+                },
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            if current_turn_count >= max_turns:
-                return Response(
-                    {
-                        'status': 'fail',
-                        'message': f'Maximum turns ({max_turns}) reached for this chat',
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
     return None
-
-
-def count_user_messages(messages: list) -> int:
-    """
-    Count the number of user messages in a message list.
-
-    Args:
-        messages: List of message dictionaries.
-
-    Returns:
-        Count of messages with role 'user'.
-    """
-    return len([m for m in messages if m.get('role') == 'user'])
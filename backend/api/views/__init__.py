@@ -11,14 +11,19 @@ from .auth_views import (
     GetLoggedInUserView,
     TokenObtainPairView,
 )
+from .chat_diagnostics_views import ChatDiagnosticsView
+from .chat_events_views import ChatEventsView
 from .chat_operations_views import (
     ChatGetHelpView,
     ChatGradeView,
     ChatSendMessageView,
+    LLMQueueStatsView,
 )
+from .chat_search_views import ChatSearchView
 from .chat_views import (
     ChatDetail,
     Chats,
+    ChatStatusView,
     UserChats,
 )
 from .note_views import (
@@ -40,9 +45,16 @@ __all__ = [
     # Chat views
     'ChatDetail',
     'Chats',
+    'ChatStatusView',
     'UserChats',
+    'ChatSearchView',
     # Chat operations views
     'ChatGetHelpView',
     'ChatGradeView',
     'ChatSendMessageView',
+    'LLMQueueStatsView',
+    # Chat event stream
+    'ChatEventsView',
+    # Chat diagnostics log
+    'ChatDiagnosticsView',
 ]
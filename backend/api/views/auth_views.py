@@ -1,6 +1,8 @@
 """Authentication and user management views."""
 
 from django.contrib.auth.models import User
+from django.db.models import F
+from django.db.models.functions import Coalesce, NullIf
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -8,9 +10,10 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView as BaseTokenObtainPairView,
 )
 
+from ..db_router import replica_reads
 from ..openwebui_client import OpenWebUIClient
 from ..serializers import UserSerializer
-from ..utils import get_pagination_data
+from ..utils import paginate_queryset
 
 
 class TokenObtainPairView(BaseTokenObtainPairView):
@@ -74,9 +77,8 @@ class AllUsersView(generics.GenericAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @replica_reads
     def get(self, request):
-        from django.db.models import Count
-
         # Only allow staff users
         if not request.user.is_staff:
             return Response(
@@ -87,16 +89,16 @@ class AllUsersView(generics.GenericAPIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
+        # Totals are kept in LearnerStats; users without a row have no chats
         users = User.objects.annotate(
-            chat_count=Count('chats'),
-        ).order_by('username')
-        total_items = users.count()
-        pagination = get_pagination_data(request, total_items)
-
-        serializer = self.serializer_class(
-            users[pagination['start_index'] : pagination['end_index']],
-            many=True,
+            chat_count=Coalesce('learner_stats__chat_count', 0),
+            completed_count=Coalesce('learner_stats__completed_count', 0),
+            average_score=F('learner_stats__score_total')
+            / NullIf('learner_stats__scored_count', 0),
+            latest_score=F('learner_stats__latest_score'),
         )
+        page, pagination = paginate_queryset(request, users, ('username', 'id'))
+        serializer = self.serializer_class(page, many=True)
 
         return Response(
             {
@@ -0,0 +1,70 @@
+"""A chat's diagnostics log: failed LLM operations and recovery actions."""
+
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+
+from ..db_router import replica_reads
+from ..models import Chat, ChatEvent
+from ..serializers import ChatEventSerializer
+from ..utils import paginate_queryset
+
+
+# Newest first; the (chat, created_at) index serves it
+EVENT_ORDERING = ('-created_at', '-id')
+
+EVENT_KINDS = {value for value, _ in ChatEvent.KIND_CHOICES}
+
+
+class ChatDiagnosticsView(generics.GenericAPIView):
+    """List a chat's diagnostics events (owner or staff)."""
+
+    serializer_class = ChatEventSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        # Staff users can access all chats
+        if user.is_staff:
+            return Chat.objects.all()
+        return Chat.objects.filter(user=user)
+
+    @replica_reads
+    def get(self, request, pk):
+        """
+        Events recorded for a chat, newest first.
+
+        ``kind`` limits the list to one kind of event (``error`` or
+        ``recovery``). Supports the usual page-number and cursor pagination.
+        """
+        if not self.get_queryset().filter(pk=pk).exists():
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': 'Chat not found',
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        kind = request.query_params.get('kind') or None
+        if kind is not None and kind not in EVENT_KINDS:
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': f'Unknown event kind: {kind}',
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        events = ChatEvent.objects.filter(chat_id=pk)
+        if kind:
+            events = events.filter(kind=kind)
+        events, pagination = paginate_queryset(request, events, EVENT_ORDERING)
+
+        return Response(
+            {
+                'status': 'success',
+                'pagination': pagination,
+                'items': self.serializer_class(events, many=True).data,
+            },
+            status=status.HTTP_200_OK,
+        )
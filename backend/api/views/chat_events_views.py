@@ -0,0 +1,60 @@
+"""Server-sent events stream of chat updates."""
+
+from django.http import StreamingHttpResponse
+from rest_framework import serializers, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..chat_events import ensure_listener, stream_chat_events
+from ..models import Chat
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets clients send ``Accept: text/event-stream``."""
+
+    media_type = 'text/event-stream'
+    format = 'txt'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class ChatEventsView(APIView):
+    """Push status transitions and message deltas for one chat over SSE."""
+
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    def get(self, request, pk):
+        """Open an event stream for a chat the user can see."""
+        chats = Chat.objects.all()
+        if not request.user.is_staff:
+            chats = chats.filter(user=request.user)
+        if not chats.filter(pk=pk).exists():
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': 'Chat not found',
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        def load_snapshot() -> dict | None:
+            chat = Chat.objects.filter(pk=pk).only('status', 'updated_at').first()
+            if chat is None:
+                return None
+            # Same format as ChatSerializer so clients can compare it directly
+            updated_at = serializers.DateTimeField().to_representation(chat.updated_at)
+            return {'status': chat.status, 'updated_at': updated_at}
+
+        ensure_listener()
+        response = StreamingHttpResponse(
+            stream_chat_events(pk, load_snapshot),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx-style proxies from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -1,22 +1,42 @@
 """Chat LLM operation views (send message, get help, grade)."""
 
+from contextlib import suppress
+
+from django.conf import settings
+from django.db.models import Count, F, IntegerField
+from django.db.models.functions import Cast
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ..background_tasks import (
-    process_chat_message_async,
-    process_grading_async,
-    process_help_request_async,
+from ..archive import rehydrate
+from ..chat_events import publish_chat_event
+from ..db_functions import (
+    JSONArrayAppend,
+    JSONArrayLength,
+    JSONArrayWithout,
+    JSONLastElementKey,
 )
-from ..models import Chat
+from ..jobs import cancel_help_precompute, enqueue_job
+from ..models import Chat, ChatVersionConflictError, LLMJob
 from ..serializers import ChatSerializer
+from ..speculative_help import (
+    precomputed_help,
+    record_speculative_help,
+    speculative_help_totals,
+)
+from ..task_queue import TaskQueueFullError, get_task_executor
 from ..utils import (
+    chat_etag,
     check_chat_not_completed,
     check_max_turns_not_exceeded,
     get_openwebui_token,
+    if_match_failed,
+    retry_version_conflicts,
+    task_queue_full_response,
+    version_conflict_response,
 )
 
 
@@ -25,6 +45,7 @@ class ChatSendMessageView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @retry_version_conflicts
     def post(self, request, pk):
         """Send message to chat and start async LLM processing."""
         try:
@@ -61,17 +82,32 @@ class ChatSendMessageView(APIView):
         # Check if this is an action message (for scenario display)
         is_action = request.data.get('is_action', False)
 
-        # Get OpenWebUI token from user profile
-        openwebui_token, token_error = get_openwebui_token(request.user)
+        # Fail fast if the OpenWebUI token is missing (workers read it at run time)
+        _token, token_error = get_openwebui_token(request.user)
         if token_error:
             return token_error
 
+        if if_match_failed(request, chat_etag(chat.version)):
+            return version_conflict_response(chat.version)
+
         # Update chat status to in_progress immediately
-        chat.status = Chat.STATUS_IN_PROGRESS
-        chat.save()
+        previous_status = chat.status
+        chat.apply_update(status=Chat.STATUS_IN_PROGRESS)
+        # Help precomputed for the previous turn is no longer wanted
+        cancel_help_precompute(chat)
 
-        # Start async processing with is_action flag
-        process_chat_message_async(chat.id, user_message, openwebui_token, is_action)
+        # Queue async processing with is_action flag
+        try:
+            enqueue_job(
+                chat,
+                LLMJob.KIND_CHAT_MESSAGE,
+                {'message': user_message, 'is_action': is_action},
+            )
+        except TaskQueueFullError as e:
+            # If another writer got in first it has already moved the chat on
+            with suppress(ChatVersionConflictError):
+                chat.apply_update(status=previous_status)
+            return task_queue_full_response(e)
 
         # Return immediately with current chat state
         serializer = ChatSerializer(chat)
@@ -91,11 +127,24 @@ class ChatGetHelpView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @retry_version_conflicts
     def post(self, request, pk):
         """Start async help request processing."""
-        try:
-            chat = Chat.objects.get(pk=pk, user=request.user)
-        except Chat.DoesNotExist:
+        # Help entries are appended in turn order, so the last one is the
+        # only one that can be for the current turn; the JSON isn't loaded
+        chat = (
+            Chat.objects.filter(pk=pk, user=request.user)
+            .defer('messages', 'help_responses', 'grading_data')
+            .annotate(
+                last_help_turn=Cast(
+                    JSONLastElementKey('help_responses', 'turn'), IntegerField()
+                ),
+                last_help_status=JSONLastElementKey('help_responses', 'status'),
+                help_count=JSONArrayLength('help_responses'),
+            )
+            .first()
+        )
+        if chat is None:
             return Response(
                 {
                     'status': 'fail',
@@ -104,6 +153,9 @@ class ChatGetHelpView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
+        if if_match_failed(request, chat_etag(chat.version)):
+            return version_conflict_response(chat.version)
+
         # Check if chat is completed or graded
         error = check_chat_not_completed(chat, 'request help for')
         if error:
@@ -114,7 +166,7 @@ class ChatGetHelpView(APIView):
         if error:
             return error
 
-        if not chat.messages:
+        if not (chat.interaction_count or chat.assistant_message_count):
             return Response(
                 {
                     'status': 'fail',
@@ -123,16 +175,13 @@ class ChatGetHelpView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Calculate current turn (number of user messages)
-        current_turn = len([m for m in chat.messages if m.get('role') == 'user'])
+        # Current turn is the number of user messages
+        current_turn = chat.interaction_count
 
         # Check if help was already requested for this turn
-        help_responses = chat.help_responses or []
-        existing_help = [h for h in help_responses if h.get('turn') == current_turn]
-
-        if existing_help:
+        if chat.last_help_turn == current_turn:
             # Check if it's still processing
-            if existing_help[-1].get('status') == 'processing':
+            if chat.last_help_status == 'processing':
                 return Response(
                     {
                         'status': 'success',
@@ -151,24 +200,74 @@ class ChatGetHelpView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Get OpenWebUI token from user profile
-        openwebui_token, token_error = get_openwebui_token(request.user)
+        # Fail fast if the OpenWebUI token is missing (workers read it at run time)
+        _token, token_error = get_openwebui_token(request.user)
         if token_error:
             return token_error
 
-        # Add "processing" placeholder
+        # Answer at once if help for this turn was precomputed
+        speculative = settings.LLM_SPECULATIVE_HELP
+        help_text = precomputed_help(chat) if speculative else ''
+        if help_text:
+            help_entry = {
+                'turn': current_turn,
+                'timestamp': timezone.now().isoformat(),
+                'help_text': help_text,
+                'status': 'completed',
+            }
+            chat.apply_update(
+                help_responses=JSONArrayAppend('help_responses', [help_entry]),
+                help_response_count=F('help_response_count') + 1,
+                speculative_help='',
+                speculative_help_version=None,
+            )
+            record_speculative_help(help_requests=1, served=1)
+            publish_chat_event(
+                chat.pk, 'help', {'index': chat.help_count, 'help_response': help_entry}
+            )
+            return Response(
+                {
+                    'status': 'success',
+                    'message': 'Help is ready',
+                    'processing': False,
+                    'turn': current_turn,
+                    'help_text': help_text,
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        # Add "processing" placeholder and mark the chat busy now so the
+        # recovery sweeper can see a stuck request
         help_entry = {
             'turn': current_turn,
             'timestamp': timezone.now().isoformat(),
             'help_text': '',
             'status': 'processing',
         }
-        help_responses.append(help_entry)
-        chat.help_responses = help_responses
-        chat.save()
+        previous_status = chat.status
+        chat.apply_update(
+            status=Chat.STATUS_GETTING_HELP,
+            help_responses=JSONArrayAppend('help_responses', [help_entry]),
+        )
 
-        # Start async processing
-        process_help_request_async(chat.id, openwebui_token)
+        # Queue async processing
+        try:
+            enqueue_job(chat, LLMJob.KIND_HELP)
+        except TaskQueueFullError as e:
+            # Drop the placeholder so the learner can ask again for this turn
+            with suppress(ChatVersionConflictError):
+                chat.apply_update(
+                    status=previous_status,
+                    help_responses=JSONArrayWithout(
+                        'help_responses', {'status': 'processing', 'turn': current_turn}
+                    ),
+                )
+            return task_queue_full_response(e)
+
+        if speculative:
+            # The help job makes any queued precompute redundant
+            cancel_help_precompute(chat)
+            record_speculative_help(help_requests=1)
 
         return Response(
             {
@@ -186,10 +285,11 @@ class ChatGradeView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    @retry_version_conflicts
     def post(self, request, pk):
         """Start async grading process."""
         try:
-            chat = Chat.objects.get(pk=pk, user=request.user)
+            chat = rehydrate(Chat.objects.get(pk=pk, user=request.user))
         except Chat.DoesNotExist:
             return Response(
                 {
@@ -199,6 +299,9 @@ class ChatGradeView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
+        if if_match_failed(request, chat_etag(chat.version)):
+            return version_conflict_response(chat.version)
+
         if not chat.messages:
             return Response(
                 {
@@ -242,17 +345,23 @@ class ChatGradeView(APIView):
                 status=status.HTTP_202_ACCEPTED,
             )
 
-        # Get OpenWebUI token from user profile
-        openwebui_token, token_error = get_openwebui_token(request.user)
+        # Fail fast if the OpenWebUI token is missing (workers read it at run time)
+        _token, token_error = get_openwebui_token(request.user)
         if token_error:
             return token_error
 
         # Update chat status to grading
-        chat.status = Chat.STATUS_GRADING
-        chat.save()
+        previous_status = chat.status
+        chat.apply_update(status=Chat.STATUS_GRADING)
 
-        # Start async processing
-        process_grading_async(chat.id, openwebui_token)
+        # Queue async processing
+        try:
+            enqueue_job(chat, LLMJob.KIND_GRADING)
+        except TaskQueueFullError as e:
+            # If another writer got in first it has already moved the chat on
+            with suppress(ChatVersionConflictError):
+                chat.apply_update(status=previous_status)
+            return task_queue_full_response(e)
 
         return Response(
             {
@@ -262,3 +371,43 @@ class ChatGradeView(APIView):
             },
             status=status.HTTP_202_ACCEPTED,
         )
+
+
+class LLMQueueStatsView(APIView):
+    """Expose worker pool utilisation and durable job backlog (staff only)."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Return queue depth, job counts and speculative help outcomes."""
+        # Only allow staff users
+        if not request.user.is_staff:
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': 'Only staff users can access this endpoint',
+                },
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        job_counts = dict(
+            LLMJob.objects.filter(
+                status__in=[LLMJob.STATUS_QUEUED, LLMJob.STATUS_RUNNING]
+            )
+            .order_by()
+            .values_list('status')
+            .annotate(total=Count('id'))
+        )
+
+        return Response(
+            {
+                'status': 'success',
+                'queue': get_task_executor().stats(),
+                'jobs': {
+                    'queued': job_counts.get(LLMJob.STATUS_QUEUED, 0),
+                    'running': job_counts.get(LLMJob.STATUS_RUNNING, 0),
+                },
+                'speculative_help': speculative_help_totals(),
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -0,0 +1,102 @@
+"""Staff full-text search over chat transcripts."""
+
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+
+from ..db_router import replica_reads
+from ..models import Chat, ChatMessage
+from ..search import best_snippets, chat_hits, parse_query, search_supported
+from ..serializers import ChatSummarySerializer
+from ..utils import paginate_queryset
+
+
+# Best match first; the chat id breaks ties and keys the cursor
+SEARCH_ORDERING = ('-rank', '-chat_id')
+
+MESSAGE_ROLES = {value for value, _ in ChatMessage.ROLE_CHOICES}
+
+
+class ChatSearchView(generics.GenericAPIView):
+    """Search every chat's messages (staff only)."""
+
+    serializer_class = ChatSummarySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    @replica_reads
+    def get(self, request):
+        """
+        Chats whose messages match ``?q=``, best match first.
+
+        ``q`` takes web-search syntax ("quoted phrase", ``or``, ``-word``);
+        ``role`` limits matches to one message role (e.g. ``user`` for what
+        learners wrote). Each item has the chat summary, its rank, how many
+        of its messages matched and a highlighted snippet of the best one.
+        Supports the usual page-number and cursor pagination.
+        """
+        # Only allow staff users
+        if not request.user.is_staff:
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': 'Only staff users can access this endpoint',
+                },
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        text = request.query_params.get('q', '').strip()
+        role = request.query_params.get('role') or None
+        if not text:
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': 'Search query (q) is required',
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if role is not None and role not in MESSAGE_ROLES:
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': f'Unknown role: {role}',
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not search_supported():
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': 'Search needs a PostgreSQL database',
+                },
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+
+        query = parse_query(text)
+        hits, pagination = paginate_queryset(
+            request, chat_hits(query, role), SEARCH_ORDERING
+        )
+        chat_ids = [hit['chat_id'] for hit in hits]
+        chats = ChatSummarySerializer.setup_queryset(Chat.objects.all()).in_bulk(
+            chat_ids
+        )
+        snippets = best_snippets(chat_ids, query, role)
+
+        items = [
+            {
+                'chat': self.serializer_class(chats[hit['chat_id']]).data,
+                'rank': hit['rank'],
+                'match_count': hit['match_count'],
+                'message': snippets.get(hit['chat_id']),
+            }
+            # A chat deleted since the search ran is left out
+            for hit in hits
+            if hit['chat_id'] in chats
+        ]
+
+        return Response(
+            {
+                'status': 'success',
+                'pagination': pagination,
+                'items': items,
+            },
+            status=status.HTTP_200_OK,
+        )
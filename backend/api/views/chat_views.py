@@ -1,12 +1,40 @@
 """Chat CRUD views."""
 
 from django.contrib.auth.models import User
-from rest_framework import generics, permissions, status
+from django.db.models.functions import Coalesce
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.response import Response
 
-from ..models import Chat
-from ..serializers import ChatCreateUpdateSerializer, ChatSerializer, UserSerializer
-from ..utils import get_pagination_data
+from ..archive import rehydrate, restore_chat
+from ..db_functions import JSONArrayLength, JSONArraySlice, JSONLastElementKey
+from ..db_router import replica_reads
+from ..learner_stats import (
+    record_chat_created,
+    record_chat_edited,
+    refresh_learner_stats,
+)
+from ..message_store import message_counts, sync_message_rows
+from ..models import Chat, ChatVersionConflictError
+from ..recovery import schedule_sweep_if_due
+from ..serializers import (
+    ChatCreateUpdateSerializer,
+    ChatSerializer,
+    ChatSummarySerializer,
+    UserSerializer,
+)
+from ..utils import (
+    chat_etag,
+    chat_version,
+    if_match_failed,
+    not_modified_response,
+    paginate_queryset,
+    set_cache_headers,
+    version_conflict_response,
+)
+
+
+# Keyset for chat listings; the (user, -updated_at) index serves it
+CHAT_LIST_ORDERING = ('-updated_at', '-id')
 
 
 class Chats(generics.GenericAPIView):
@@ -19,17 +47,13 @@ class Chats(generics.GenericAPIView):
         user = self.request.user
         return Chat.objects.filter(user=user).order_by('-updated_at')
 
+    @replica_reads
     def get(self, request):
         """List all chats with pagination."""
-        chats = self.get_queryset()
-        total_items = chats.count()
-        pagination = get_pagination_data(self.request, total_items)
-
-        # Use ChatSerializer for GET (includes full user object)
-        serializer = ChatSerializer(
-            chats[pagination['start_index'] : pagination['end_index']],
-            many=True,
-        )
+        # Summaries only: a fixed number of queries whatever the page size
+        chats = ChatSummarySerializer.setup_queryset(self.get_queryset())
+        page, pagination = paginate_queryset(request, chats, CHAT_LIST_ORDERING)
+        serializer = ChatSummarySerializer(page, many=True)
 
         return Response(
             {
@@ -44,7 +68,10 @@ class Chats(generics.GenericAPIView):
         """Create a new chat."""
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
-            chat = serializer.save(user=request.user)
+            messages = serializer.validated_data.get('messages', [])
+            chat = serializer.save(user=request.user, **message_counts(messages))
+            sync_message_rows(chat)
+            record_chat_created(chat)
             # Return with full user object
             response_serializer = ChatSerializer(chat)
             return Response(
@@ -68,9 +95,10 @@ class Chats(generics.GenericAPIView):
 class UserChats(generics.GenericAPIView):
     """List all chats for a specific user (staff only)."""
 
-    serializer_class = ChatSerializer
+    serializer_class = ChatSummarySerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @replica_reads
     def get(self, request, user_id):
         """List all chats for specified user with pagination."""
         # Only allow staff users
@@ -95,14 +123,11 @@ class UserChats(generics.GenericAPIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        chats = Chat.objects.filter(user=target_user).order_by('-updated_at')
-        total_items = chats.count()
-        pagination = get_pagination_data(request, total_items)
-
-        serializer = self.serializer_class(
-            chats[pagination['start_index'] : pagination['end_index']],
-            many=True,
+        chats = ChatSummarySerializer.setup_queryset(
+            Chat.objects.filter(user=target_user)
         )
+        page, pagination = paginate_queryset(request, chats, CHAT_LIST_ORDERING)
+        serializer = self.serializer_class(page, many=True)
 
         return Response(
             {
@@ -134,25 +159,146 @@ class ChatDetail(generics.GenericAPIView):
         except Chat.DoesNotExist:
             return None
 
+    @replica_reads
     def get(self, request, pk):
-        """Get a specific chat by ID."""
+        """
+        Get a specific chat by ID.
+
+        Supports conditional GET: the ETag is the chat's version and a
+        matching If-None-Match returns 304 without loading the chat's JSON.
+        With ``?since=N`` only the changes after the client's copy are
+        returned (see get_delta).
+        """
+        current = (
+            self.get_queryset().filter(pk=pk).values_list('status', 'version').first()
+        )
+        if current is None:
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': 'Chat not found',
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        chat_status, version = current
+        # Clients poll chats with in-flight work; make sure stuck ones recover
+        if chat_status in Chat.TRANSIENT_STATUSES:
+            schedule_sweep_if_due()
+
+        not_modified = not_modified_response(request, chat_etag(version))
+        if not_modified is not None:
+            return not_modified
+
+        if 'since' in request.query_params:
+            return self.get_delta(request, pk)
+
         chat = self.get_chat(pk)
-        if chat:
-            serializer = ChatSerializer(chat)  # Use full serializer
+        if chat is None:
             return Response(
                 {
-                    'status': 'success',
-                    'chat': serializer.data,
+                    'status': 'fail',
+                    'message': 'Chat not found',
                 },
-                status=status.HTTP_200_OK,
+                status=status.HTTP_404_NOT_FOUND,
             )
-        return Response(
+
+        serializer = ChatSerializer(rehydrate(chat))  # Use full serializer
+        response = Response(
             {
-                'status': 'fail',
-                'message': 'Chat not found',
+                'status': 'success',
+                'chat': serializer.data,
             },
-            status=status.HTTP_404_NOT_FOUND,
+            status=status.HTTP_200_OK,
+        )
+        return set_cache_headers(response, chat_etag(chat.version))
+
+    def get_delta(self, request, pk):
+        """
+        Return only messages after index ``since`` and help responses after
+        index ``help_since`` (default 0), sliced in SQL.
+
+        Clients should not count a trailing streaming message or processing
+        help placeholder, since those are replaced in place. If
+        ``message_count`` comes back lower than ``since`` the client's copy
+        is out of date and it should fetch the full chat.
+        """
+        try:
+            since = int(request.query_params['since'])
+            help_since = int(request.query_params.get('help_since', 0))
+        except ValueError:
+            since = help_since = -1
+        if since < 0 or help_since < 0:
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': 'since and help_since must be non-negative integers',
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        chat = (
+            self.get_queryset()
+            .filter(pk=pk)
+            .only(
+                'id',
+                'status',
+                'interaction_count',
+                'completed',
+                'score',
+                'updated_at',
+                'version',
+                'archived',
+            )
+            .annotate(
+                message_count=Coalesce(JSONArrayLength('messages'), 0),
+                help_count=Coalesce(JSONArrayLength('help_responses'), 0),
+                new_messages=JSONArraySlice('messages', since),
+                new_help_responses=JSONArraySlice('help_responses', help_since),
+            )
+            .first()
+        )
+        if chat is None:
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': 'Chat not found',
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        if chat.archived:
+            # The JSON is in the archive; slice it here instead of in SQL
+            rehydrate(chat)
+            chat.message_count = len(chat.messages)
+            chat.help_count = len(chat.help_responses)
+            chat.new_messages = chat.messages[since:]
+            chat.new_help_responses = chat.help_responses[help_since:]
+
+        response = Response(
+            {
+                'status': 'success',
+                'chat': {
+                    'id': chat.id,
+                    'status': chat.status,
+                    'interaction_count': chat.interaction_count,
+                    'completed': chat.completed,
+                    'score': chat.score,
+                    'updated_at': serializers.DateTimeField().to_representation(
+                        chat.updated_at
+                    ),
+                    'version': chat_version(chat.version),
+                    'message_count': chat.message_count,
+                    'since': since,
+                    'messages': chat.new_messages,
+                    'help_count': chat.help_count,
+                    'help_since': help_since,
+                    'help_responses': chat.new_help_responses,
+                },
+            },
+            status=status.HTTP_200_OK,
         )
+        return set_cache_headers(response, chat_etag(chat.version))
 
     def put(self, request, pk):
         """Update a chat (full update)."""
@@ -168,13 +314,22 @@ class ChatDetail(generics.GenericAPIView):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
+            if if_match_failed(request, chat_etag(chat.version)):
+                return version_conflict_response(chat.version)
+
             serializer = self.serializer_class(chat, data=request.data)
             if serializer.is_valid():
-                chat = serializer.save()
-                # Update interaction count based on messages
-                user_messages = [m for m in chat.messages if m.get('role') == 'user']
-                chat.interaction_count = len(user_messages)
-                chat.save()
+                # Only an accepted update brings an archived chat back
+                restore_chat(chat)
+                # A replaced transcript gets its counters recomputed
+                messages = serializer.validated_data.get('messages')
+                counts = message_counts(messages) if messages is not None else {}
+                try:
+                    chat = serializer.save(**counts)
+                except ChatVersionConflictError:
+                    return version_conflict_response()
+                record_chat_edited(chat, serializer.validated_data)
+                sync_message_rows(chat)
 
                 response_serializer = ChatSerializer(chat)
                 return Response(
@@ -215,16 +370,23 @@ class ChatDetail(generics.GenericAPIView):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
+            if if_match_failed(request, chat_etag(chat.version)):
+                return version_conflict_response(chat.version)
+
             serializer = self.serializer_class(chat, data=request.data, partial=True)
             if serializer.is_valid():
-                chat = serializer.save()
-                # Update interaction count if messages were updated
-                if 'messages' in request.data:
-                    user_messages = [
-                        m for m in chat.messages if m.get('role') == 'user'
-                    ]
-                    chat.interaction_count = len(user_messages)
-                    chat.save()
+                # Only an accepted update brings an archived chat back
+                restore_chat(chat)
+                # A replaced transcript gets its counters recomputed
+                messages = serializer.validated_data.get('messages')
+                counts = message_counts(messages) if messages is not None else {}
+                try:
+                    chat = serializer.save(**counts)
+                except ChatVersionConflictError:
+                    return version_conflict_response()
+                record_chat_edited(chat, serializer.validated_data)
+                if messages is not None:
+                    sync_message_rows(chat)
 
                 response_serializer = ChatSerializer(chat)
                 return Response(
@@ -266,6 +428,7 @@ class ChatDetail(generics.GenericAPIView):
                 )
 
             chat.delete()
+            refresh_learner_stats([request.user.pk])
             return Response(
                 {
                     'status': 'success',
@@ -280,3 +443,84 @@ class ChatDetail(generics.GenericAPIView):
             },
             status=status.HTTP_404_NOT_FOUND,
         )
+
+
+class ChatStatusView(generics.GenericAPIView):
+    """Lightweight chat state for pollers, with ETag/304 support."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        # Staff users can access all chats
+        if user.is_staff:
+            return Chat.objects.all()
+        return Chat.objects.filter(user=user)
+
+    @replica_reads
+    def get(self, request, pk):
+        """Get a chat's status, counts and version without its JSON columns."""
+        version = (
+            self.get_queryset().filter(pk=pk).values_list('version', flat=True).first()
+        )
+        if version is None:
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': 'Chat not found',
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        not_modified = not_modified_response(request, chat_etag(version))
+        if not_modified is not None:
+            return not_modified
+
+        # Counts are computed in SQL; messages/help_responses are never fetched
+        chat = (
+            self.get_queryset()
+            .filter(pk=pk)
+            .only(
+                'id', 'status', 'interaction_count', 'completed', 'version', 'archived'
+            )
+            .annotate(
+                message_count=Coalesce(JSONArrayLength('messages'), 0),
+                help_count=Coalesce(JSONArrayLength('help_responses'), 0),
+                help_status=JSONLastElementKey('help_responses', 'status'),
+            )
+            .first()
+        )
+        if chat is None:
+            return Response(
+                {
+                    'status': 'fail',
+                    'message': 'Chat not found',
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        if chat.status in Chat.TRANSIENT_STATUSES:
+            schedule_sweep_if_due()
+        if chat.archived:
+            rehydrate(chat)
+            chat.message_count = len(chat.messages)
+            chat.help_count = len(chat.help_responses)
+            chat.help_status = (chat.help_responses or [{}])[-1].get('status')
+
+        response = Response(
+            {
+                'status': 'success',
+                'chat': {
+                    'id': chat.id,
+                    'status': chat.status,
+                    'interaction_count': chat.interaction_count,
+                    'message_count': chat.message_count,
+                    'help_count': chat.help_count,
+                    'help_status': chat.help_status,
+                    'completed': chat.completed,
+                    'version': chat_version(chat.version),
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
+        return set_cache_headers(response, chat_etag(chat.version))
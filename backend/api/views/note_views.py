@@ -5,7 +5,7 @@ from rest_framework.response import Response
 
 from ..models import Note
 from ..serializers import NoteSerializer
-from ..utils import get_pagination_data
+from ..utils import paginate_queryset
 
 
 class Notes(generics.GenericAPIView):
@@ -17,13 +17,9 @@ class Notes(generics.GenericAPIView):
         return Note.objects.filter(author=user).order_by('-id')
 
     def get(self, request):
-        notes = self.get_queryset()
-        total_items = notes.count()
-        pagination = get_pagination_data(self.request, total_items)
-        # use zero-based slice indices
-        serializer = self.serializer_class(
-            notes[pagination['start_index'] : pagination['end_index']], many=True
-        )
+        notes = self.get_queryset().select_related('author')
+        page, pagination = paginate_queryset(self.request, notes, ('-id',))
+        serializer = self.serializer_class(page, many=True)
         return Response(
             {
                 'status': 'success',
@@ -75,6 +75,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'api.db_router.ReplicaStickinessMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -112,6 +113,20 @@ DATABASES = {
     },
 }
 
+# Optional read replica (see api/db_router.py)
+# Set DB_REPLICA_HOST to send polling GETs to a streaming replica of the
+# database above. Clients that wrote within REPLICA_STICKY_SECONDS keep
+# reading from the primary so they see their own writes.
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', os.getenv('DB_PORT')),
+    }
+DATABASE_REPLICA = 'replica' if 'replica' in DATABASES else None
+DATABASE_ROUTERS = ['api.db_router.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -154,6 +169,107 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# LLM background worker pool
+# Background LLM calls run on a fixed pool of threads fed by a bounded queue.
+# When the queue is full, LLM endpoints return 503 with a Retry-After hint.
+LLM_WORKER_POOL_SIZE = int(os.getenv('LLM_WORKER_POOL_SIZE', '8'))
+LLM_WORKER_QUEUE_SIZE = int(os.getenv('LLM_WORKER_QUEUE_SIZE', '200'))
+LLM_WORKER_RETRY_AFTER = int(os.getenv('LLM_WORKER_RETRY_AFTER', '5'))
+
+# Durable LLM job queue
+# 'inline': the web process runs jobs on its own worker pool as they are queued.
+# 'worker': jobs are only run by `manage.py run_llm_workers` processes.
+LLM_JOB_EXECUTION = os.getenv('LLM_JOB_EXECUTION', 'inline')
+LLM_JOB_QUEUE_MAX = int(os.getenv('LLM_JOB_QUEUE_MAX', '500'))
+LLM_JOB_MAX_ATTEMPTS = int(os.getenv('LLM_JOB_MAX_ATTEMPTS', '3'))
+# Finished jobs (done/failed/cancelled) keep the learner's message and any
+# error; the recovery sweep deletes them this many days after they finish.
+# 0 keeps them forever.
+LLM_JOB_RETENTION_DAYS = int(os.getenv('LLM_JOB_RETENTION_DAYS', '7'))
+
+# OpenWebUI HTTP connection pool
+# One keep-alive session per process is shared by all worker threads.
+# Pool size should be at least LLM_WORKER_POOL_SIZE so workers never wait.
+OPENWEBUI_POOL_CONNECTIONS = int(os.getenv('OPENWEBUI_POOL_CONNECTIONS', '4'))
+OPENWEBUI_POOL_MAXSIZE = int(
+    os.getenv('OPENWEBUI_POOL_MAXSIZE', str(max(10, LLM_WORKER_POOL_SIZE)))
+)
+OPENWEBUI_TCP_KEEPALIVE = os.getenv('OPENWEBUI_TCP_KEEPALIVE', 'True') == 'True'
+OPENWEBUI_CONNECT_TIMEOUT = float(os.getenv('OPENWEBUI_CONNECT_TIMEOUT', '5'))
+OPENWEBUI_READ_TIMEOUT = int(os.getenv('OPENWEBUI_READ_TIMEOUT', '180'))
+
+# Streaming resident replies
+# When enabled, resident replies are requested with stream: true and the
+# partial assistant message is saved at most this many times per second.
+LLM_STREAM_RESPONSES = os.getenv('LLM_STREAM_RESPONSES', 'False') == 'True'
+LLM_STREAM_WRITES_PER_SECOND = float(os.getenv('LLM_STREAM_WRITES_PER_SECOND', '4'))
+
+# Conversation context budget (see api/context_budget.py)
+# Context window per model in tokens; the history sent is packed into the
+# window minus the reply reserve. LLM_TOKENIZER is a dotted path to a
+# callable returning the token count of a string.
+LLM_CONTEXT_LIMITS = {
+    'slc-resident': int(os.getenv('LLM_CONTEXT_TOKENS_RESIDENT', '8192')),
+}
+LLM_DEFAULT_CONTEXT_TOKENS = int(os.getenv('LLM_DEFAULT_CONTEXT_TOKENS', '8192'))
+LLM_RESPONSE_RESERVE_TOKENS = int(os.getenv('LLM_RESPONSE_RESERVE_TOKENS', '1024'))
+LLM_TOKENIZER = os.getenv('LLM_TOKENIZER', 'api.context_budget.approximate_tokens')
+# When history is left out, a low-priority job summarizes it with this model
+LLM_SUMMARY_MODEL = os.getenv('LLM_SUMMARY_MODEL', 'slc-conversation-helper')
+LLM_SUMMARY_MAX_TOKENS = int(os.getenv('LLM_SUMMARY_MAX_TOKENS', '400'))
+
+# Speculative help (see api/speculative_help.py)
+# When enabled, help for the current turn is precomputed by a low-priority
+# job after each resident reply, so "Get help" can answer at once.
+LLM_SPECULATIVE_HELP = os.getenv('LLM_SPECULATIVE_HELP', 'False') == 'True'
+
+# Stuck-chat recovery
+# A chat whose transient status is older than its deadline (seconds) is either
+# re-queued or rolled back by the sweeper (`manage.py recover_stuck_chats`,
+# run at startup, by run_llm_workers, and periodically by the web process).
+CHAT_RECOVERY_DEADLINES = {
+    'in_progress': int(os.getenv('CHAT_RECOVERY_MESSAGE_SECONDS', '300')),
+    'thinking': int(os.getenv('CHAT_RECOVERY_MESSAGE_SECONDS', '300')),
+    'getting_help': int(os.getenv('CHAT_RECOVERY_HELP_SECONDS', '300')),
+    'grading': int(os.getenv('CHAT_RECOVERY_GRADING_SECONDS', '600')),
+}
+CHAT_RECOVERY_INTERVAL = int(os.getenv('CHAT_RECOVERY_INTERVAL', '60'))
+
+# Optimistic concurrency on Chat
+# Background tasks reload the chat and retry a write this many times when
+# another writer bumped its version first; API clients get a 409 instead.
+CHAT_WRITE_RETRIES = int(os.getenv('CHAT_WRITE_RETRIES', '3'))
+
+# Cold archive of graded chats (see api/archive.py)
+# run_llm_workers moves up to CHAT_ARCHIVE_BATCH_SIZE chats graded more than
+# CHAT_ARCHIVE_AFTER_DAYS days ago into compressed ChatArchive rows every
+# CHAT_ARCHIVE_INTERVAL seconds. 0 days disables the periodic job;
+# `manage.py archive_chats` can still be run by hand.
+CHAT_ARCHIVE_AFTER_DAYS = int(os.getenv('CHAT_ARCHIVE_AFTER_DAYS', '0'))
+CHAT_ARCHIVE_INTERVAL = int(os.getenv('CHAT_ARCHIVE_INTERVAL', '3600'))
+CHAT_ARCHIVE_BATCH_SIZE = int(os.getenv('CHAT_ARCHIVE_BATCH_SIZE', '200'))
+
+# Parsed Scenario rows cached per process (rows never change, so the cache
+# is never invalidated; this only bounds its memory)
+SCENARIO_CACHE_SIZE = int(os.getenv('SCENARIO_CACHE_SIZE', '256'))
+
+# Chat event push channel (SSE)
+# 'postgres' relays events through LISTEN/NOTIFY so they reach every web
+# process; 'inprocess' only reaches the publishing process; 'auto' uses
+# postgres when the database is Postgres.
+CHAT_EVENTS_BROKER = os.getenv('CHAT_EVENTS_BROKER', 'auto')
+CHAT_EVENTS_HEARTBEAT = int(os.getenv('CHAT_EVENTS_HEARTBEAT', '15'))
+CHAT_EVENTS_MAX_STREAM_SECONDS = int(os.getenv('CHAT_EVENTS_MAX_STREAM_SECONDS', '300'))
+CHAT_EVENTS_QUEUE_SIZE = int(os.getenv('CHAT_EVENTS_QUEUE_SIZE', '100'))
+
+# Staff transcript search (Postgres full-text search, see api/search.py)
+# Text search configuration used to index and query messages
+CHAT_SEARCH_CONFIG = os.getenv('CHAT_SEARCH_CONFIG', 'english')
+
+# List endpoint pagination
+# page_size is clamped to this in both page-number and cursor mode.
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '100'))
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 
@@ -12,7 +12,19 @@ DATABASES = {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
     },
+    # Mirror of default for the read-replica routing tests, which opt in
+    # with override_settings(DATABASE_REPLICA='replica')
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
+DATABASE_REPLICA = None
+
+# Covering indexes (Index.include) only exist on Postgres; SQLite builds the
+# plain index, which is all the tests need
+SILENCED_SYSTEM_CHECKS = ['models.W040']
 
 # Faster password hashing for tests
 PASSWORD_HASHERS = [
@@ -24,3 +36,9 @@ LOGGING = {}
 
 # Speed up tests
 DEBUG = False
+
+# Views only enqueue LLM jobs; tests run them explicitly
+LLM_JOB_EXECUTION = 'worker'
+
+# No periodic recovery sweeps from request threads; tests call the sweeper
+CHAT_RECOVERY_INTERVAL = 0
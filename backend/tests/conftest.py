@@ -9,12 +9,19 @@ This file is automatically loaded by pytest and provides:
 
 import pytest
 import responses as responses_lib
+from api.scenarios import get_scenario_data
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from .factories import ChatFactory, NoteFactory, UserFactory, UserProfileFactory
 
 
+@pytest.fixture(autouse=True)
+def _clear_scenario_cache():
+    """Forget cached scenarios; test databases reuse primary keys."""
+    get_scenario_data.cache_clear()
+
+
 @pytest.fixture
 def responses():
     """Activate responses mock for HTTP requests.
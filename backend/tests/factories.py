@@ -6,6 +6,8 @@ making it easy to generate test data without specifying every field.
 """
 
 import factory
+from api.learner_stats import record_chat_created
+from api.message_store import finished_help_count, message_counts
 from api.models import Chat, ChatMessage, Note, UserProfile
 from django.contrib.auth.models import User
 
@@ -59,6 +61,7 @@ class ChatFactory(factory.django.DjangoModelFactory):
 
     class Meta:
         model = Chat
+        skip_postgeneration_save = True
 
     user = factory.SubFactory(UserFactory)
     title = factory.Sequence(lambda n: f'Test Chat {n}')
@@ -72,12 +75,27 @@ class ChatFactory(factory.django.DjangoModelFactory):
         },
     )
     avatar_id = 'test-avatar'
-    interaction_count = 0
+    # Counters follow the messages, as they do when the app writes them
+    interaction_count = factory.LazyAttribute(
+        lambda o: message_counts(o.messages)['interaction_count']
+    )
+    assistant_message_count = factory.LazyAttribute(
+        lambda o: message_counts(o.messages)['assistant_message_count']
+    )
+    help_response_count = factory.LazyAttribute(
+        lambda o: finished_help_count(o.help_responses)
+    )
     completed = False
     score = None
     grading_data = None
     help_responses = factory.LazyFunction(list)
 
+    @factory.post_generation
+    def learner_stats(self, create, extracted, **kwargs):
+        """Count the chat in its learner's stats, as creating it via the API does."""
+        if create:
+            record_chat_created(self)
+
 
 class ChatWithMessagesFactory(ChatFactory):
     """Factory for creating Chat instances with pre-populated messages."""
@@ -92,7 +110,6 @@ class ChatWithMessagesFactory(ChatFactory):
             },
         ],
     )
-    interaction_count = 1
 
 
 class CompletedChatFactory(ChatFactory):
@@ -124,16 +141,16 @@ class CompletedChatFactory(ChatFactory):
             {'role': 'assistant', 'content': 'Sure, go ahead!'},
         ],
     )
-    interaction_count = 2
 
 
 class ChatMessageFactory(factory.django.DjangoModelFactory):
-    """Factory for creating ChatMessage instances (separate model, rarely used)."""
+    """Factory for creating ChatMessage rows."""
 
     class Meta:
         model = ChatMessage
 
     chat = factory.SubFactory(ChatFactory)
+    seq = factory.Sequence(lambda n: n)
     role = 'user'
     content = factory.Faker('sentence')
     relevance_score = None
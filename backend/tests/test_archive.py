@@ -0,0 +1,203 @@
+"""Tests for the cold archive of completed chats."""
+
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from api.archive import archive_chat, archive_completed_chats, rehydrate
+from api.message_store import sync_message_rows
+from api.models import Chat, ChatArchive, ChatMessage
+from django.core.management import call_command
+from django.utils import timezone
+
+from .factories import ChatFactory, CompletedChatFactory
+
+
+def make_old(chat, days=100):
+    """Backdate a chat's last update."""
+    Chat.objects.filter(pk=chat.pk).update(
+        updated_at=timezone.now() - timedelta(days=days)
+    )
+    chat.refresh_from_db()
+    return chat
+
+
+@pytest.fixture
+def graded_chat(user):
+    """An old graded chat with help responses and message rows."""
+    chat = CompletedChatFactory(
+        user=user,
+        help_responses=[{'turn': 1, 'help_text': 'Listen', 'status': 'completed'}],
+    )
+    sync_message_rows(chat)
+    return make_old(chat)
+
+
+@pytest.mark.django_db
+class TestArchiveChat:
+    """Tests for archive_chat and rehydrate."""
+
+    def test_counter_check_reads_archived_help(self, graded_chat):
+        """check_chat_counters sees an archived chat's help responses."""
+        call_command('check_chat_counters', '--fix', stdout=StringIO())
+        graded_chat.refresh_from_db()
+        assert graded_chat.help_response_count == 1
+        archive_chat(graded_chat)
+        version = graded_chat.version
+
+        out = StringIO()
+        call_command('check_chat_counters', '--fix', stdout=out)
+
+        assert 'Chats with wrong counters: 0' in out.getvalue()
+        chat = Chat.objects.get(pk=graded_chat.pk)
+        assert (chat.help_response_count, chat.version) == (1, version)
+
+    def test_moves_payloads_into_compressed_row(self, graded_chat):
+        """The hot row is emptied and the archive holds the JSON, compressed."""
+        messages = graded_chat.messages
+        grading_data = graded_chat.grading_data
+        version = graded_chat.version
+        updated_at = graded_chat.updated_at
+
+        assert archive_chat(graded_chat) is True
+
+        chat = Chat.objects.get(pk=graded_chat.pk)
+        assert chat.archived is True
+        assert chat.messages == []
+        assert chat.grading_data is None
+        assert chat.help_responses == []
+        assert (chat.version, chat.updated_at) == (version, updated_at)
+        # Message rows stay for transcript search
+        assert ChatMessage.objects.filter(chat=chat).count() == len(messages)
+        archive = ChatArchive.objects.get(chat=chat)
+        assert len(archive.payload) < archive.original_size
+
+        rehydrate(chat)
+        assert chat.messages == messages
+        assert chat.grading_data == grading_data
+        assert chat.help_responses[0]['help_text'] == 'Listen'
+
+    def test_only_old_graded_chats_are_archived(self, user):
+        """Recent, ungraded and already archived chats are skipped."""
+        old = make_old(CompletedChatFactory(user=user))
+        CompletedChatFactory(user=user)
+        make_old(ChatFactory(user=user, status=Chat.STATUS_READY_FOR_GRADING))
+
+        assert archive_completed_chats(older_than_days=30, limit=10) == 1
+        assert archive_completed_chats(older_than_days=30, limit=10) == 0
+        assert list(Chat.objects.filter(archived=True)) == [old]
+
+    def test_stale_instance_is_not_archived(self, graded_chat):
+        """A chat changed after it was read is left in the hot table."""
+        Chat.objects.get(pk=graded_chat.pk).apply_update(title='Renamed')
+
+        assert archive_chat(graded_chat) is False
+        assert not ChatArchive.objects.exists()
+
+
+@pytest.mark.django_db
+class TestArchivedChatApi:
+    """Archived chats read and write through the API as before."""
+
+    def test_detail_is_rehydrated(self, authenticated_client, graded_chat):
+        """GET returns the same chat, with the same ETag, once archived."""
+        before = authenticated_client.get(f'/api/chats/{graded_chat.id}/')
+        archive_chat(graded_chat)
+
+        after = authenticated_client.get(f'/api/chats/{graded_chat.id}/')
+
+        assert after.status_code == 200
+        assert after.data == before.data
+        assert after['ETag'] == before['ETag']
+
+    def test_delta_and_status(self, authenticated_client, graded_chat):
+        """Delta and status responses count the archived JSON."""
+        archive_chat(graded_chat)
+
+        delta = authenticated_client.get(
+            f'/api/chats/{graded_chat.id}/', {'since': 3, 'help_since': 1}
+        ).data['chat']
+        assert delta['message_count'] == 4
+        assert delta['messages'] == [
+            {'role': 'assistant', 'content': 'Sure, go ahead!'}
+        ]
+        assert (delta['help_count'], delta['help_responses']) == (1, [])
+
+        chat_status = authenticated_client.get(
+            f'/api/chats/{graded_chat.id}/status/'
+        ).data['chat']
+        assert chat_status['message_count'] == 4
+        assert (chat_status['help_count'], chat_status['help_status']) == (
+            1,
+            'completed',
+        )
+
+    def test_update_restores_chat(self, authenticated_client, graded_chat):
+        """Writing to an archived chat moves it back to the hot table first."""
+        archive_chat(graded_chat)
+
+        response = authenticated_client.patch(
+            f'/api/chats/{graded_chat.id}/', {'title': 'Renamed'}, format='json'
+        )
+
+        assert response.status_code == 200
+        assert len(response.data['chat']['messages']) == 4
+        chat = Chat.objects.get(pk=graded_chat.pk)
+        assert chat.archived is False
+        assert chat.title == 'Renamed'
+        assert len(chat.messages) == 4
+        assert chat.grading_data is not None
+        assert ChatMessage.objects.filter(chat=chat).count() == 4
+        assert not ChatArchive.objects.exists()
+
+    def test_rejected_update_leaves_chat_archived(
+        self, authenticated_client, graded_chat
+    ):
+        """An invalid update doesn't move the chat out of the archive."""
+        archive_chat(graded_chat)
+
+        response = authenticated_client.put(
+            f'/api/chats/{graded_chat.id}/', {'messages': 'oops'}, format='json'
+        )
+
+        assert response.status_code == 400
+        chat = Chat.objects.get(pk=graded_chat.pk)
+        assert chat.archived is True
+        assert ChatArchive.objects.filter(chat=chat).exists()
+
+    def test_grade_returns_archived_results(
+        self, authenticated_client_with_profile, user_with_profile
+    ):
+        """Grading an archived chat returns the archived report, not a re-grade."""
+        chat = make_old(CompletedChatFactory(user=user_with_profile))
+        archive_chat(chat)
+
+        response = authenticated_client_with_profile.post(
+            f'/api/chats/{chat.id}/grade/', {}, format='json'
+        )
+
+        assert response.status_code == 200
+        assert response.data['grading'] == CompletedChatFactory.grading_data.function()
+
+
+@pytest.mark.django_db
+class TestArchiveCommand:
+    """Tests for the archive_chats command."""
+
+    def test_archives_in_batches(self, user):
+        """All eligible chats are archived; --dry-run only counts them."""
+        for _ in range(3):
+            make_old(CompletedChatFactory(user=user))
+
+        out = StringIO()
+        call_command('archive_chats', '--days=30', '--dry-run', stdout=out)
+        assert '3 chats would be archived' in out.getvalue()
+        assert not Chat.objects.filter(archived=True).exists()
+
+        call_command('archive_chats', '--days=30', '--batch-size=2', stdout=out)
+        assert Chat.objects.filter(archived=True).count() == 3
+
+        # Archived chats' counters still check out
+        out = StringIO()
+        call_command('check_chat_counters', stdout=out)
+        assert 'Chats with wrong counters: 0' in out.getvalue()
@@ -1,50 +1,29 @@
 """Characterization tests for background tasks.
 
 These tests document the CURRENT behavior of the background task functions:
-- process_chat_message_async: Sends messages to LLM and stores responses
-- process_help_request_async: Gets help from tutor and stores in help_responses
-- process_grading_async: Grades conversation and stores results
+- run_chat_message: Sends messages to LLM and stores responses
+- run_help_request: Gets help from tutor and stores in help_responses
+- run_grading: Grades conversation and stores results
 
 All OpenWebUI API calls are mocked. We test database updates directly.
 """
 
-import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
-from api.background_tasks import (
-    process_chat_message_async,
-    process_grading_async,
-    process_help_request_async,
-)
-from api.models import Chat
+from api.background_tasks import run_chat_message, run_grading, run_help_request
+from api.models import Chat, ChatEvent
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from .factories import ChatFactory, UserProfileFactory
 
 
-class SyncThread:
-    """Mock Thread class that runs target synchronously for testing."""
-
-    def __init__(self, target, daemon=None):
-        self.target = target
-        self.daemon = daemon
-
-    def start(self):
-        self.target()
-
-
-@pytest.fixture
-def sync_threads():
-    """Patch threading.Thread to run synchronously."""
-    with patch.object(threading, 'Thread', SyncThread):
-        yield
-
-
 @pytest.mark.django_db
-class TestProcessChatMessageAsync:
-    """Tests for process_chat_message_async background task."""
+class TestRunChatMessage:
+    """Tests for the run_chat_message background task."""
 
-    def test_process_message_updates_chat(self, sync_threads):
+    def test_process_message_updates_chat(self):
         """After completion, chat has assistant response in messages."""
         profile = UserProfileFactory(openwebui_token='test-token')
         chat = ChatFactory(
@@ -60,7 +39,7 @@ class TestProcessChatMessageAsync:
             )
             mock_client_class.return_value = mock_client
 
-            process_chat_message_async(
+            run_chat_message(
                 chat_id=chat.id,
                 user_message='Hi there',
                 openwebui_token='test-token',
@@ -81,8 +60,8 @@ class TestProcessChatMessageAsync:
         # Interaction count should be updated
         assert chat.interaction_count == 1
 
-    def test_process_message_error_stored(self, sync_threads):
-        """LLM error is stored in messages as system message."""
+    def test_process_message_error_stored(self):
+        """LLM error is logged as a chat event, not added to the transcript."""
         profile = UserProfileFactory(openwebui_token='test-token')
         chat = ChatFactory(
             user=profile.user,
@@ -95,7 +74,7 @@ class TestProcessChatMessageAsync:
             mock_client.get_conversation_response.side_effect = Exception('API timeout')
             mock_client_class.return_value = mock_client
 
-            process_chat_message_async(
+            run_chat_message(
                 chat_id=chat.id,
                 user_message='New message',
                 openwebui_token='test-token',
@@ -103,21 +82,105 @@ class TestProcessChatMessageAsync:
 
         chat.refresh_from_db()
 
-        # Error should be stored as system message
-        last_message = chat.messages[-1]
-        assert last_message['role'] == 'system'
-        assert 'error' in last_message['content'].lower()
-        assert 'API timeout' in last_message['content']
+        # The transcript ends with the unanswered message
+        assert chat.messages[-1] == {'role': 'user', 'content': 'New message'}
+
+        # Error should be stored in the chat's diagnostics log
+        event = ChatEvent.objects.get(chat=chat)
+        assert event.kind == ChatEvent.KIND_ERROR
+        assert 'API timeout' in event.message
+        assert event.data == {'operation': 'chat_message', 'error_type': 'Exception'}
 
         # Status should be reset to ready
         assert chat.status == Chat.STATUS_READY
 
 
 @pytest.mark.django_db
-class TestProcessHelpRequestAsync:
-    """Tests for process_help_request_async background task."""
+class TestStreamedChatMessage:
+    """Tests for streamed resident replies (LLM_STREAM_RESPONSES)."""
+
+    def test_partial_reply_persisted_while_streaming(self, settings):
+        """The partial assistant message is saved as chunks arrive."""
+        settings.LLM_STREAM_RESPONSES = True
+        settings.LLM_STREAM_WRITES_PER_SECOND = 1000
+        profile = UserProfileFactory(openwebui_token='test-token')
+        chat = ChatFactory(user=profile.user, messages=[])
+        seen = []
+
+        def stream(model, messages):
+            for chunk in ['Hello', ', ', 'there']:
+                yield chunk
+                seen.append(Chat.objects.get(pk=chat.pk).messages[-1])
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client = MagicMock()
+            mock_client.stream_conversation_response.side_effect = stream
+            mock_client_class.return_value = mock_client
+
+            run_chat_message(
+                chat_id=chat.id, user_message='Hi', openwebui_token='test-token'
+            )
+
+        assert seen[0] == {'role': 'assistant', 'content': 'Hello', 'streaming': True}
+        chat.refresh_from_db()
+        assert chat.messages[-1] == {'role': 'assistant', 'content': 'Hello, there'}
+        assert chat.status == Chat.STATUS_READY
+
+    def test_writes_are_throttled(self, settings):
+        """Only the first chunk is written when chunks arrive faster than the limit."""
+        settings.LLM_STREAM_RESPONSES = True
+        settings.LLM_STREAM_WRITES_PER_SECOND = 0.001
+        profile = UserProfileFactory(openwebui_token='test-token')
+        chat = ChatFactory(user=profile.user, messages=[])
+        seen = []
+
+        def stream(model, messages):
+            for chunk in ['a', 'b', 'c']:
+                yield chunk
+                seen.append(Chat.objects.get(pk=chat.pk).messages[-1]['content'])
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client = MagicMock()
+            mock_client.stream_conversation_response.side_effect = stream
+            mock_client_class.return_value = mock_client
+
+            run_chat_message(
+                chat_id=chat.id, user_message='Hi', openwebui_token='test-token'
+            )
+
+        assert seen == ['a', 'a', 'a']
+
+    def test_stream_failure_drops_partial_reply(self, settings):
+        """A stream that fails part-way logs an error and drops the half reply."""
+        settings.LLM_STREAM_RESPONSES = True
+        profile = UserProfileFactory(openwebui_token='test-token')
+        chat = ChatFactory(user=profile.user, messages=[])
 
-    def test_process_help_updates_help_responses(self, sync_threads):
+        def stream(model, messages):
+            yield 'Partial'
+            raise Exception('connection dropped')
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client = MagicMock()
+            mock_client.stream_conversation_response.side_effect = stream
+            mock_client_class.return_value = mock_client
+
+            run_chat_message(
+                chat_id=chat.id, user_message='Hi', openwebui_token='test-token'
+            )
+
+        chat.refresh_from_db()
+        assert [m['role'] for m in chat.messages] == ['user']
+        assert chat.chat_messages.count() == 1
+        assert chat.events.get().kind == ChatEvent.KIND_ERROR
+        assert chat.status == Chat.STATUS_READY
+
+
+@pytest.mark.django_db
+class TestRunHelpRequest:
+    """Tests for the run_help_request background task."""
+
+    def test_process_help_updates_help_responses(self):
         """Help text is added to help_responses array."""
         profile = UserProfileFactory(openwebui_token='test-token')
         chat = ChatFactory(
@@ -137,7 +200,7 @@ class TestProcessHelpRequestAsync:
             )
             mock_client_class.return_value = mock_client
 
-            process_help_request_async(
+            run_help_request(
                 chat_id=chat.id,
                 user_token='test-token',
             )
@@ -156,10 +219,10 @@ class TestProcessHelpRequestAsync:
 
 
 @pytest.mark.django_db
-class TestProcessGradingAsync:
-    """Tests for process_grading_async background task."""
+class TestRunGrading:
+    """Tests for the run_grading background task."""
 
-    def test_process_grading_sets_score(self, sync_threads):
+    def test_process_grading_sets_score(self):
         """grading_data and score are populated after grading."""
         profile = UserProfileFactory(openwebui_token='test-token')
         chat = ChatFactory(
@@ -185,7 +248,7 @@ class TestProcessGradingAsync:
             mock_client.get_grading_response.return_value = grading_result
             mock_client_class.return_value = mock_client
 
-            process_grading_async(
+            run_grading(
                 chat_id=chat.id,
                 openwebui_token='test-token',
             )
@@ -196,7 +259,7 @@ class TestProcessGradingAsync:
         assert chat.grading_data == grading_result
         assert chat.score == 85
 
-    def test_process_grading_marks_complete(self, sync_threads):
+    def test_process_grading_marks_complete(self):
         """Chat.completed=True and status=complete after grading."""
         profile = UserProfileFactory(openwebui_token='test-token')
         chat = ChatFactory(
@@ -216,7 +279,7 @@ class TestProcessGradingAsync:
             mock_client.get_grading_response.return_value = grading_result
             mock_client_class.return_value = mock_client
 
-            process_grading_async(
+            run_grading(
                 chat_id=chat.id,
                 openwebui_token='test-token',
             )
@@ -227,7 +290,7 @@ class TestProcessGradingAsync:
         assert chat.completed is True
         assert chat.status == Chat.STATUS_COMPLETE
 
-    def test_process_grading_error_stored(self, sync_threads):
+    def test_process_grading_error_stored(self):
         """Failed grading stores error in grading_data."""
         profile = UserProfileFactory(openwebui_token='test-token')
         chat = ChatFactory(
@@ -244,7 +307,7 @@ class TestProcessGradingAsync:
             )
             mock_client_class.return_value = mock_client
 
-            process_grading_async(
+            run_grading(
                 chat_id=chat.id,
                 openwebui_token='test-token',
             )
@@ -257,3 +320,66 @@ class TestProcessGradingAsync:
 
         # Status should be reset to ready_for_grading (allow retry)
         assert chat.status == Chat.STATUS_READY_FOR_GRADING
+
+
+@pytest.mark.django_db
+class TestInPlaceUpdates:
+    """Task writes touch only their own fields, so overlapping tasks don't clash."""
+
+    def test_help_during_reply_is_not_overwritten(self):
+        """Help stored while the resident is replying survives the reply write."""
+        profile = UserProfileFactory(openwebui_token='test-token')
+        chat = ChatFactory(
+            user=profile.user,
+            messages=[{'role': 'user', 'content': 'Hello'}],
+            help_responses=[],
+        )
+
+        def help_while_reply_runs(model, messages):
+            # The helper answers while the resident is still generating
+            with patch('api.background_tasks.OpenWebUIClient') as help_client:
+                help_client.return_value.get_help_response.return_value = (
+                    'Ask an open question.'
+                )
+                run_help_request(chat_id=chat.id, user_token='test-token')
+            return 'Hi there!'
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client_class.return_value.get_conversation_response.side_effect = (
+                help_while_reply_runs
+            )
+            run_chat_message(chat.id, 'How are you?', 'test-token')
+
+        chat.refresh_from_db()
+        assert [m['content'] for m in chat.messages] == [
+            'Hello',
+            'How are you?',
+            'Hi there!',
+        ]
+        assert [h['status'] for h in chat.help_responses] == ['completed']
+        assert chat.help_responses[0]['help_text'] == 'Ask an open question.'
+        assert chat.interaction_count == 2
+        assert chat.assistant_message_count == 1
+        assert chat.help_response_count == 1
+
+    def test_grading_update_writes_only_its_columns(self):
+        """The grading write doesn't send the transcript or help columns."""
+        profile = UserProfileFactory(openwebui_token='test-token')
+        chat = ChatFactory(user=profile.user, status=Chat.STATUS_GRADING)
+
+        with (
+            patch('api.background_tasks.OpenWebUIClient') as mock_client_class,
+            CaptureQueriesContext(connection) as queries,
+        ):
+            mock_client_class.return_value.get_grading_response.return_value = {
+                'score': {'percentage': 80}
+            }
+            run_grading(chat_id=chat.id, openwebui_token='test-token')
+
+        updates = [
+            q['sql'] for q in queries if q['sql'].startswith('UPDATE "api_chat"')
+        ]
+        assert len(updates) == 1
+        assert '"grading_data"' in updates[0]
+        assert '"messages"' not in updates[0]
+        assert '"help_responses"' not in updates[0]
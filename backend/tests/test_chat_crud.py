@@ -5,6 +5,8 @@ They test the Chats and ChatDetail views.
 """
 
 import pytest
+from api.models import Chat, ChatVersionConflictError
+from api.utils import chat_etag
 
 from .factories import ChatFactory, UserFactory
 
@@ -88,6 +90,54 @@ class TestListChats:
         assert response.status_code == 200
         assert response.data['pagination']['page_size'] == 10
 
+    def test_list_chats_returns_summaries(self, authenticated_client, user):
+        """Listings leave out the transcript and other heavy JSON fields."""
+        ChatFactory(user=user, messages=[{'role': 'user', 'content': 'Hi'}])
+
+        response = authenticated_client.get('/api/chats/')
+
+        assert response.status_code == 200
+        item = response.data['items'][0]
+        assert item['user']['username'] == user.username
+        for heavy in ('messages', 'grading_data', 'course_data', 'chat_messages'):
+            assert heavy not in item
+
+    @pytest.mark.parametrize('page_size', [1, 20])
+    def test_list_chats_query_count_is_constant(
+        self, authenticated_client, user, page_size, django_assert_num_queries
+    ):
+        """One count and one page query, however many chats are on the page."""
+        ChatFactory.create_batch(20, user=user)
+
+        with django_assert_num_queries(3):  # auth user lookup + count + page
+            response = authenticated_client.get(f'/api/chats/?page_size={page_size}')
+
+        assert len(response.data['items']) == page_size
+
+    def test_list_chats_cursor_mode(
+        self, authenticated_client, user, django_assert_num_queries
+    ):
+        """?cursor= switches to keyset pages without a count query."""
+        for i in range(5):
+            ChatFactory(user=user, title=f'Chat {i}')
+
+        with django_assert_num_queries(2):  # auth user lookup + page
+            response = authenticated_client.get('/api/chats/?cursor=&page_size=3')
+
+        assert response.status_code == 200
+        pagination = response.data['pagination']
+        assert pagination['has_more'] is True
+        assert pagination['total_items'] is None
+        first_page = [c['id'] for c in response.data['items']]
+
+        response = authenticated_client.get(
+            '/api/chats/', {'cursor': pagination['next_cursor'], 'page_size': 3}
+        )
+        assert response.data['pagination']['has_more'] is False
+        second_page = [c['id'] for c in response.data['items']]
+        assert len(second_page) == 2
+        assert not set(first_page) & set(second_page)
+
     def test_list_chats_requires_authentication(self, api_client):
         """Unauthenticated requests are rejected."""
         response = api_client.get('/api/chats/')
@@ -206,6 +256,185 @@ class TestGetChat:
         assert response.status_code == 200
         assert response.data['chat']['title'] == 'User Chat'
 
+    def test_get_chat_returns_etag(self, authenticated_client, user):
+        """The response carries an ETag and asks clients to revalidate."""
+        chat = ChatFactory(user=user)
+
+        response = authenticated_client.get(f'/api/chats/{chat.id}/')
+
+        assert response['ETag']
+        assert 'no-cache' in response['Cache-Control']
+
+    def test_get_chat_not_modified(
+        self, authenticated_client, user, django_assert_max_num_queries
+    ):
+        """A matching If-None-Match returns 304 without loading the chat."""
+        chat = ChatFactory(user=user)
+        etag = authenticated_client.get(f'/api/chats/{chat.id}/')['ETag']
+
+        with django_assert_max_num_queries(2):
+            response = authenticated_client.get(
+                f'/api/chats/{chat.id}/', HTTP_IF_NONE_MATCH=etag
+            )
+
+        assert response.status_code == 304
+
+    def test_get_chat_modified_after_update(self, authenticated_client, user):
+        """Once the chat changes, the old ETag no longer matches."""
+        chat = ChatFactory(user=user)
+        etag = authenticated_client.get(f'/api/chats/{chat.id}/')['ETag']
+        chat.title = 'Renamed'
+        chat.save()
+
+        response = authenticated_client.get(
+            f'/api/chats/{chat.id}/', HTTP_IF_NONE_MATCH=etag
+        )
+
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+class TestChatDelta:
+    """Tests for delta sync (GET /api/chats/:id/?since=N)."""
+
+    def test_returns_only_new_messages_and_help(self, authenticated_client, user):
+        """Only messages and help responses after the given indexes are returned."""
+        chat = ChatFactory(
+            user=user,
+            messages=[
+                {'role': 'user', 'content': 'One'},
+                {'role': 'assistant', 'content': 'Two'},
+                {'role': 'user', 'content': 'Three'},
+            ],
+            help_responses=[
+                {'turn': 1, 'help_text': 'Old', 'status': 'completed'},
+                {'turn': 2, 'help_text': 'New', 'status': 'completed'},
+            ],
+        )
+
+        response = authenticated_client.get(
+            f'/api/chats/{chat.id}/', {'since': 2, 'help_since': 1}
+        )
+
+        assert response.status_code == 200
+        data = response.data['chat']
+        assert data['messages'] == [{'role': 'user', 'content': 'Three'}]
+        assert data['message_count'] == 3
+        assert data['help_responses'] == [
+            {'turn': 2, 'help_text': 'New', 'status': 'completed'}
+        ]
+        assert data['help_count'] == 2
+        assert 'grading_data' not in data
+
+    def test_up_to_date_client_gets_empty_lists(self, authenticated_client, user):
+        """A client that has everything receives empty deltas."""
+        chat = ChatFactory(user=user, messages=[{'role': 'user', 'content': 'Hi'}])
+
+        data = authenticated_client.get(
+            f'/api/chats/{chat.id}/', {'since': 1, 'help_since': 0}
+        ).data['chat']
+
+        assert data['messages'] == []
+        assert data['help_responses'] == []
+
+    def test_payload_size_constant(self, authenticated_client, user):
+        """The delta payload does not grow with the conversation."""
+        one_turn = [
+            {'role': 'user', 'content': 'x' * 200},
+            {'role': 'assistant', 'content': 'y' * 200},
+        ]
+        short_chat = ChatFactory(user=user, messages=one_turn * 2)
+        long_chat = ChatFactory(user=user, messages=one_turn * 50)
+
+        short = authenticated_client.get(
+            f'/api/chats/{short_chat.id}/', {'since': 2}
+        ).content
+        long = authenticated_client.get(
+            f'/api/chats/{long_chat.id}/', {'since': 98}
+        ).content
+
+        assert abs(len(long) - len(short)) < 20
+
+    def test_invalid_since_rejected(self, authenticated_client, user):
+        """since must be a non-negative integer."""
+        chat = ChatFactory(user=user)
+
+        response = authenticated_client.get(f'/api/chats/{chat.id}/', {'since': -1})
+
+        assert response.status_code == 400
+        assert response.data['status'] == 'fail'
+
+
+@pytest.mark.django_db
+class TestChatStatus:
+    """Tests for the lightweight status endpoint (GET /api/chats/:id/status/)."""
+
+    def test_status_fields(self, authenticated_client, user):
+        """Returns status, counts, help state and a version token."""
+        chat = ChatFactory(
+            user=user,
+            status='getting_help',
+            interaction_count=1,
+            messages=[
+                {'role': 'user', 'content': 'Hello'},
+                {'role': 'assistant', 'content': 'Hi there!'},
+            ],
+            help_responses=[
+                {'turn': 1, 'help_text': 'Try again', 'status': 'completed'},
+                {'turn': 1, 'help_text': '', 'status': 'processing'},
+            ],
+        )
+
+        response = authenticated_client.get(f'/api/chats/{chat.id}/status/')
+
+        assert response.status_code == 200
+        data = response.data['chat']
+        assert data['status'] == 'getting_help'
+        assert data['interaction_count'] == 1
+        assert data['message_count'] == 2
+        assert data['help_count'] == 2
+        assert data['help_status'] == 'processing'
+        assert response['ETag'] == f'"{data["version"]}"'
+
+    def test_status_empty_help(self, authenticated_client, user):
+        """A chat without help responses reports no help state."""
+        chat = ChatFactory(user=user, messages=[], help_responses=[])
+
+        data = authenticated_client.get(f'/api/chats/{chat.id}/status/').data['chat']
+
+        assert data['message_count'] == 0
+        assert data['help_count'] == 0
+        assert data['help_status'] is None
+
+    def test_status_not_modified(self, authenticated_client, user):
+        """Unchanged chats return 304 for a matching If-None-Match."""
+        chat = ChatFactory(user=user)
+        etag = authenticated_client.get(f'/api/chats/{chat.id}/status/')['ETag']
+
+        response = authenticated_client.get(
+            f'/api/chats/{chat.id}/status/', HTTP_IF_NONE_MATCH=etag
+        )
+
+        assert response.status_code == 304
+
+    def test_status_shares_etag_with_detail(self, authenticated_client, user):
+        """Status and detail ETags agree, so either can revalidate the other."""
+        chat = ChatFactory(user=user)
+
+        status_etag = authenticated_client.get(f'/api/chats/{chat.id}/status/')['ETag']
+        detail_etag = authenticated_client.get(f'/api/chats/{chat.id}/')['ETag']
+
+        assert status_etag == detail_etag
+
+    def test_status_wrong_user_not_found(self, authenticated_client):
+        """Cannot read another user's chat status."""
+        chat = ChatFactory(user=UserFactory())
+
+        response = authenticated_client.get(f'/api/chats/{chat.id}/status/')
+
+        assert response.status_code == 404
+
 
 @pytest.mark.django_db
 class TestUpdateChat:
@@ -315,6 +544,56 @@ class TestUpdateChat:
         assert response.status_code == 403
         assert 'only update your own' in response.data['message'].lower()
 
+    def test_update_chat_bumps_version(self, authenticated_client, user):
+        """Each write returns a new version, which is also the new ETag."""
+        chat = ChatFactory(user=user)
+        etag = authenticated_client.get(f'/api/chats/{chat.id}/')['ETag']
+
+        response = authenticated_client.patch(
+            f'/api/chats/{chat.id}/',
+            {'title': 'Renamed'},
+            format='json',
+            HTTP_IF_MATCH=etag,
+        )
+
+        assert response.status_code == 200
+        new_version = response.data['chat']['version']
+        assert f'"{new_version}"' != etag
+        assert authenticated_client.get(f'/api/chats/{chat.id}/')['ETag'] == (
+            f'"{new_version}"'
+        )
+
+    def test_update_chat_stale_if_match_conflicts(self, authenticated_client, user):
+        """A write based on an old copy of the chat is rejected with 409."""
+        chat = ChatFactory(user=user, title='Original')
+        etag = authenticated_client.get(f'/api/chats/{chat.id}/')['ETag']
+        Chat.objects.get(pk=chat.pk).apply_update(title='Changed elsewhere')
+
+        response = authenticated_client.patch(
+            f'/api/chats/{chat.id}/',
+            {'title': 'Mine'},
+            format='json',
+            HTTP_IF_MATCH=etag,
+        )
+
+        assert response.status_code == 409
+        assert response.data['error_code'] == 'VERSION_CONFLICT'
+        chat.refresh_from_db()
+        assert chat.title == 'Changed elsewhere'
+        assert f'"{response.data["version"]}"' == chat_etag(chat.version)
+
+    def test_apply_update_rejects_stale_instance(self, user):
+        """apply_update fails if the row changed since the instance was read."""
+        chat = ChatFactory(user=user, title='Original')
+        stale = Chat.objects.get(pk=chat.pk)
+        chat.apply_update(title='First')
+
+        with pytest.raises(ChatVersionConflictError):
+            stale.apply_update(title='Second')
+
+        chat.refresh_from_db()
+        assert chat.title == 'First'
+
 
 @pytest.mark.django_db
 class TestDeleteChat:
@@ -0,0 +1,113 @@
+"""Tests for the chat diagnostics log and keeping errors out of LLM prompts."""
+
+import pytest
+from api.context_budget import plan_context
+from api.models import ChatEvent
+from api.utils import format_conversation_for_llm
+
+from .factories import ChatFactory, UserFactory
+
+
+# How failed turns were recorded in transcripts before the diagnostics log
+LEGACY_ERROR = {'role': 'system', 'content': 'Error processing message: timeout'}
+
+
+def log_event(chat, kind=ChatEvent.KIND_ERROR, message='Error processing message'):
+    """Add an event to a chat's diagnostics log."""
+    return ChatEvent.objects.create(chat=chat, kind=kind, message=message)
+
+
+@pytest.mark.django_db
+class TestDiagnosticsView:
+    """Tests for GET /api/chats/<pk>/diagnostics/."""
+
+    def test_owner_sees_events_newest_first(self, authenticated_client, chat):
+        """The chat's events are listed newest first."""
+        first = log_event(chat, kind=ChatEvent.KIND_RECOVERY, message='Rolled back')
+        second = log_event(chat)
+        log_event(ChatFactory())
+
+        response = authenticated_client.get(f'/api/chats/{chat.id}/diagnostics/')
+
+        assert response.status_code == 200
+        assert [e['id'] for e in response.data['items']] == [second.id, first.id]
+        assert response.data['items'][1]['message'] == 'Rolled back'
+
+    def test_filter_by_kind(self, authenticated_client, chat):
+        """?kind= limits the list to one kind of event."""
+        log_event(chat, kind=ChatEvent.KIND_RECOVERY)
+        error = log_event(chat)
+
+        response = authenticated_client.get(
+            f'/api/chats/{chat.id}/diagnostics/', {'kind': 'error'}
+        )
+
+        assert [e['id'] for e in response.data['items']] == [error.id]
+
+    def test_unknown_kind(self, authenticated_client, chat):
+        """An unknown kind is rejected."""
+        response = authenticated_client.get(
+            f'/api/chats/{chat.id}/diagnostics/', {'kind': 'nope'}
+        )
+        assert response.status_code == 400
+
+    def test_other_users_chat_not_found(self, authenticated_client):
+        """Learners can't read another learner's log."""
+        other = ChatFactory(user=UserFactory())
+        log_event(other)
+
+        response = authenticated_client.get(f'/api/chats/{other.id}/diagnostics/')
+
+        assert response.status_code == 404
+
+    def test_staff_see_any_chat(self, staff_client, chat):
+        """Staff can read every chat's log."""
+        log_event(chat)
+
+        response = staff_client.get(f'/api/chats/{chat.id}/diagnostics/')
+
+        assert len(response.data['items']) == 1
+
+    def test_cursor_pagination(self, authenticated_client, chat):
+        """Following next_cursor visits each event once."""
+        expected = {log_event(chat).id for _ in range(5)}
+
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            response = authenticated_client.get(
+                f'/api/chats/{chat.id}/diagnostics/',
+                {'cursor': cursor, 'page_size': 2},
+            )
+            seen += [e['id'] for e in response.data['items']]
+            cursor = response.data['pagination']['next_cursor']
+
+        assert sorted(seen) == sorted(expected)
+
+
+class TestErrorRecordsLeftOut:
+    """Error records left in older transcripts never reach the LLM."""
+
+    def test_resident_context_skips_error_records(self):
+        """Only the scenario prompt and real turns are sent."""
+        messages = [
+            {'role': 'system', 'content': 'Brief'},
+            {'role': 'user', 'content': 'Hi'},
+            LEGACY_ERROR,
+            {'role': 'user', 'content': 'Hi again'},
+        ]
+
+        kept, _, dropped = plan_context(messages, 'slc-resident')
+
+        assert kept == [messages[0], messages[1], messages[3]]
+        assert dropped == 0
+
+    @pytest.mark.django_db
+    def test_help_and_grading_transcript_skips_error_records(self):
+        """format_conversation_for_llm leaves error records out."""
+        chat = ChatFactory(messages=[{'role': 'user', 'content': 'Hi'}, LEGACY_ERROR])
+
+        text = format_conversation_for_llm(chat)
+
+        assert 'User: Hi' in text
+        assert 'timeout' not in text
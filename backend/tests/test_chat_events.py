@@ -0,0 +1,175 @@
+"""Tests for the chat event push channel (SSE)."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from api.background_tasks import run_chat_message
+from api.chat_events import (
+    ChatEventHub,
+    _notify,
+    _relay,
+    hub,
+    publish_chat_event,
+)
+from api.models import Chat
+
+from .factories import ChatFactory, UserProfileFactory
+
+
+def parse_frame(frame):
+    """Split an SSE frame into (event, data)."""
+    fields = dict(line.split(': ', 1) for line in frame.strip().splitlines())
+    return fields['event'], json.loads(fields['data'])
+
+
+class TestChatEventHub:
+    """Tests for the in-process hub."""
+
+    def test_publish_reaches_subscribers_of_that_chat(self, settings):
+        """Events go to every subscriber of the chat and nobody else."""
+        local_hub = ChatEventHub()
+        first = local_hub.subscribe(1)
+        second = local_hub.subscribe(1)
+        other = local_hub.subscribe(2)
+
+        local_hub.publish(1, {'type': 'status', 'data': {'status': 'ready'}})
+
+        assert first.get(timeout=0)['data'] == {'status': 'ready'}
+        assert second.get(timeout=0)['type'] == 'status'
+        assert other.get(timeout=0) is None
+
+    def test_unsubscribe_removes_chat(self):
+        """The last unsubscribe forgets the chat entirely."""
+        local_hub = ChatEventHub()
+        subscription = local_hub.subscribe(1)
+
+        local_hub.unsubscribe(subscription)
+
+        assert local_hub.subscriber_count() == 0
+
+    def test_overflow_collapses_to_sync(self, settings):
+        """A subscriber that falls behind gets one sync event."""
+        settings.CHAT_EVENTS_QUEUE_SIZE = 2
+        local_hub = ChatEventHub()
+        subscription = local_hub.subscribe(1)
+
+        for i in range(5):
+            local_hub.publish(1, {'type': 'partial', 'data': {'content': str(i)}})
+
+        assert subscription.get(timeout=0)['type'] == 'sync'
+        assert subscription.get(timeout=0) is None
+
+
+class TestPostgresBroker:
+    """Tests for the NOTIFY path (database calls mocked)."""
+
+    def test_oversized_payload_becomes_sync(self):
+        """Payloads too big for NOTIFY are replaced with a sync hint."""
+        with patch('api.chat_events.connection') as mock_connection:
+            cursor = mock_connection.cursor.return_value.__enter__.return_value
+            _notify(7, {'type': 'message', 'data': {'content': 'x' * 10000}})
+
+        _sql, (channel, payload) = cursor.execute.call_args.args
+        assert channel == 'chat_events'
+        assert json.loads(payload) == {
+            'chat_id': 7,
+            'type': 'sync',
+            'data': {'reason': 'message'},
+        }
+
+    def test_relay_publishes_to_local_hub(self):
+        """Notifications from other processes are delivered locally."""
+        subscription = hub.subscribe(42)
+        try:
+            _relay(json.dumps({'chat_id': 42, 'type': 'status', 'data': {}}))
+            assert subscription.get(timeout=0)['type'] == 'status'
+        finally:
+            hub.unsubscribe(subscription)
+
+
+@pytest.mark.django_db
+class TestChatEventsView:
+    """Tests for GET /api/chats/<pk>/events/."""
+
+    def test_streams_snapshot_and_events(
+        self, authenticated_client_with_profile, user_with_profile
+    ):
+        """The stream opens with a snapshot and then relays published events."""
+        chat = ChatFactory(user=user_with_profile, status=Chat.STATUS_THINKING)
+
+        response = authenticated_client_with_profile.get(
+            f'/api/chats/{chat.id}/events/', HTTP_ACCEPT='text/event-stream'
+        )
+
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'text/event-stream'
+        frames = iter(response.streaming_content)
+        assert next(frames).startswith(b'retry:')
+        event, data = parse_frame(next(frames).decode())
+        assert event == 'snapshot'
+        assert data['status'] == Chat.STATUS_THINKING
+        chat_response = authenticated_client_with_profile.get(f'/api/chats/{chat.id}/')
+        assert data['updated_at'] == chat_response.data['chat']['updated_at']
+
+        publish_chat_event(chat.id, 'status', {'status': Chat.STATUS_READY})
+
+        event, data = parse_frame(next(frames).decode())
+        assert (event, data) == ('status', {'status': Chat.STATUS_READY})
+        response.close()
+        assert hub.subscriber_count() == 0
+
+    def test_heartbeat_then_end_of_stream(
+        self, authenticated_client_with_profile, user_with_profile, settings
+    ):
+        """Idle streams send keep-alives and end after the maximum duration."""
+        settings.CHAT_EVENTS_HEARTBEAT = 0.01
+        settings.CHAT_EVENTS_MAX_STREAM_SECONDS = 0.05
+        chat = ChatFactory(user=user_with_profile)
+
+        response = authenticated_client_with_profile.get(
+            f'/api/chats/{chat.id}/events/'
+        )
+        frames = list(response.streaming_content)
+
+        assert b': keep-alive\n\n' in frames
+        assert hub.subscriber_count() == 0
+
+    def test_other_users_chat_not_found(self, authenticated_client_with_profile):
+        """Users cannot subscribe to someone else's chat."""
+        chat = ChatFactory()
+
+        response = authenticated_client_with_profile.get(
+            f'/api/chats/{chat.id}/events/'
+        )
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_chat_message_task_publishes_deltas():
+    """The chat-message task pushes the new messages and status transitions."""
+    profile = UserProfileFactory(openwebui_token='test-token')
+    chat = ChatFactory(user=profile.user, messages=[])
+
+    with (
+        patch('api.background_tasks.OpenWebUIClient') as mock_client_class,
+        patch('api.background_tasks.publish_chat_event') as mock_publish,
+    ):
+        mock_client = MagicMock()
+        mock_client.get_conversation_response.return_value = 'Hello!'
+        mock_client_class.return_value = mock_client
+
+        run_chat_message(chat.id, 'Hi', 'test-token')
+
+    events = [(c.args[1], c.args[2]) for c in mock_publish.call_args_list]
+    assert events == [
+        ('message', {'index': 0, 'message': {'role': 'user', 'content': 'Hi'}}),
+        # The turn is counted as soon as the user message is stored
+        ('status', {'status': Chat.STATUS_THINKING, 'interaction_count': 1}),
+        (
+            'message',
+            {'index': 1, 'message': {'role': 'assistant', 'content': 'Hello!'}},
+        ),
+        ('status', {'status': Chat.STATUS_READY, 'interaction_count': 1}),
+    ]
@@ -0,0 +1,166 @@
+"""Tests for staff full-text search over chat transcripts.
+
+Searching needs Postgres; those tests are skipped on the default SQLite
+test settings (run them with ``--ds=backend.settings``, see
+test_query_plans.py). Request validation is tested everywhere.
+"""
+
+from io import StringIO
+
+import pytest
+from api.archive import archive_chat
+from api.message_store import append_messages, load_messages, sync_message_rows
+from api.models import Chat, ChatMessage
+from django.core.management import call_command
+from django.db import connection
+
+from .factories import ChatFactory, UserFactory
+
+
+needs_postgres = pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='Full-text search needs Postgres'
+)
+
+
+def chat_with(user, *contents, title='Chat'):
+    """A chat whose transcript alternates user/assistant ``contents``."""
+    roles = ['user', 'assistant']
+    chat = ChatFactory(
+        user=user,
+        title=title,
+        messages=[
+            {'role': roles[i % 2], 'content': content}
+            for i, content in enumerate(contents)
+        ],
+    )
+    sync_message_rows(chat)
+    return chat
+
+
+@pytest.mark.django_db
+class TestSearchRequests:
+    """Validation of search requests."""
+
+    def test_staff_only(self, authenticated_client):
+        """Learners can't search other learners' chats."""
+        response = authenticated_client.get('/api/chats/search/', {'q': 'falls'})
+        assert response.status_code == 403
+
+    def test_query_required(self, staff_client):
+        """An empty query is rejected."""
+        response = staff_client.get('/api/chats/search/', {'q': '  '})
+        assert response.status_code == 400
+
+    def test_unknown_role(self, staff_client):
+        """The role filter must be a message role."""
+        response = staff_client.get(
+            '/api/chats/search/', {'q': 'falls', 'role': 'robot'}
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.skipif(connection.vendor == 'postgresql', reason='SQLite only')
+    def test_needs_postgres(self, staff_client):
+        """Without full-text search the endpoint says so."""
+        response = staff_client.get('/api/chats/search/', {'q': 'falls'})
+        assert response.status_code == 501
+        assert response.data['status'] == 'fail'
+
+
+@needs_postgres
+@pytest.mark.django_db
+class TestSearch:
+    """Ranked search results (Postgres)."""
+
+    def test_ranked_results_with_snippets(self, staff_client, user):
+        """Chats are ranked by their best message and show a highlight."""
+        strong = chat_with(
+            user,
+            'She had two falls last week and takes medication for falls',
+            'Tell me more about the falls.',
+        )
+        weak = chat_with(user, 'Hello', 'Any falls recently?')
+        chat_with(user, 'Nothing relevant here', 'Okay')
+
+        response = staff_client.get('/api/chats/search/', {'q': 'falls'})
+
+        assert response.status_code == 200
+        items = response.data['items']
+        assert [item['chat']['id'] for item in items] == [strong.id, weak.id]
+        assert items[0]['match_count'] == 2
+        assert '<mark>falls</mark>' in items[0]['message']['snippet']
+        assert items[0]['message']['seq'] == 0
+
+    def test_role_filter_and_stemming(self, staff_client, user):
+        """role=user only matches learner messages; words match by stem."""
+        learner = chat_with(user, 'I forgot my medications', 'Noted')
+        chat_with(user, 'Hello', 'Remember your medication')
+
+        response = staff_client.get(
+            '/api/chats/search/', {'q': 'medication', 'role': 'user'}
+        )
+
+        assert [item['chat']['id'] for item in response.data['items']] == [learner.id]
+
+    def test_cursor_pagination(self, staff_client):
+        """Following next_cursor visits each matching chat once."""
+        user = UserFactory()
+        expected = {chat_with(user, f'falls {i}', 'ok').id for i in range(5)}
+
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            response = staff_client.get(
+                '/api/chats/search/', {'q': 'falls', 'cursor': cursor, 'page_size': 2}
+            )
+            seen += [item['chat']['id'] for item in response.data['items']]
+            cursor = response.data['pagination']['next_cursor']
+
+        assert sorted(seen) == sorted(expected)
+
+    def test_appended_messages_are_indexed(self, user):
+        """New turns are searchable without a reindex."""
+        chat = chat_with(user, 'Hello', 'Hi')
+        append_messages(
+            chat, load_messages(chat), [{'role': 'user', 'content': 'I fell over'}]
+        )
+
+        assert (
+            ChatMessage.objects.filter(chat=chat, search_vector__isnull=False).count()
+            == 3
+        )
+
+    def test_index_command_fills_old_rows(self, staff_client, user):
+        """index_chat_search fills vectors for rows written before search."""
+        chat = chat_with(user, 'A fall in the garden', 'Oh no')
+        ChatMessage.objects.filter(chat=chat).update(search_vector=None)
+
+        call_command('index_chat_search', '--batch-size=1', stdout=StringIO())
+
+        response = staff_client.get('/api/chats/search/', {'q': 'fall'})
+        assert [item['chat']['id'] for item in response.data['items']] == [chat.id]
+
+    def test_archived_chats_are_found(self, staff_client, user):
+        """Archiving a chat keeps it in the search results."""
+        chat = chat_with(user, 'She had a fall on the stairs', 'That sounds painful')
+        Chat.objects.filter(pk=chat.pk).update(
+            completed=True, status=Chat.STATUS_COMPLETE
+        )
+        chat.refresh_from_db()
+        assert archive_chat(chat) is True
+
+        response = staff_client.get('/api/chats/search/', {'q': 'stairs'})
+
+        assert [item['chat']['id'] for item in response.data['items']] == [chat.id]
+        assert '<mark>stairs</mark>' in response.data['items'][0]['message']['snippet']
+
+    def test_search_uses_gin_index(self):
+        """The match is served by the GIN index, not a sequential scan."""
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(
+                'EXPLAIN SELECT id FROM api_chatmessage '
+                "WHERE search_vector @@ websearch_to_tsquery('english', 'falls')"
+            )
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+
+        assert 'api_chatmessage_search_idx' in plan
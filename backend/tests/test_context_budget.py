@@ -0,0 +1,276 @@
+"""Tests for token-budgeted conversation history."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from api.background_tasks import run_chat_message, run_summary
+from api.context_budget import (
+    MESSAGE_OVERHEAD_TOKENS,
+    approximate_tokens,
+    plan_context,
+    summary_boundary,
+    summary_message,
+)
+from api.jobs import run_job
+from api.message_store import load_messages, load_token_counts, sync_message_rows
+from api.models import Chat, ChatMessage, LLMJob
+
+from .factories import ChatFactory
+
+
+def conversation(turns, content='word ' * 20):
+    """A system prompt followed by ``turns`` user/assistant exchanges."""
+    messages = [{'role': 'system', 'content': 'You are a patient.'}]
+    for i in range(turns):
+        messages.append({'role': 'user', 'content': f'{i} {content}'})
+        messages.append({'role': 'assistant', 'content': f'{i} {content}'})
+    return messages
+
+
+def one_token_each(text):
+    """Test tokenizer: one token per whitespace-separated word."""
+    return len(text.split())
+
+
+@pytest.fixture
+def word_tokenizer(settings):
+    """Count one token per word, in a 100 token window with 20 reserved."""
+    settings.LLM_TOKENIZER = 'tests.test_context_budget.one_token_each'
+    settings.LLM_CONTEXT_LIMITS = {'small': 100}
+    settings.LLM_DEFAULT_CONTEXT_TOKENS = 1000
+    settings.LLM_RESPONSE_RESERVE_TOKENS = 20
+
+
+class TestApproximateTokens:
+    """Tests for the built-in tokenizer estimate."""
+
+    def test_words_and_punctuation(self):
+        """Short words are one token, long ones several, punctuation one."""
+        assert approximate_tokens('The patient fell.') == 5
+        assert approximate_tokens('electroencephalography') == 4
+        assert approximate_tokens('') == 0
+
+    def test_non_ascii_counts_characters(self):
+        """Scripts without spaces are not counted as one long word."""
+        assert approximate_tokens('你好世界') == 4
+
+
+class TestPlanContext:
+    """Tests for plan_context."""
+
+    def test_short_chat_is_sent_whole(self, word_tokenizer):
+        """Nothing is dropped when the chat fits."""
+        messages = conversation(2, content='hi')
+
+        kept, tokens, _ = plan_context(messages, 'small')
+
+        assert kept == messages
+        # 'You are a patient.' is 4 words, every other message 2
+        assert tokens == 4 + 4 * 2 + 5 * MESSAGE_OVERHEAD_TOKENS
+
+    def test_long_chat_keeps_system_and_newest(self, word_tokenizer):
+        """The newest messages that fit are kept, in order, after the system."""
+        messages = conversation(10, content='one two three four five')
+
+        kept, tokens, _ = plan_context(messages, 'small')
+
+        # 80 tokens left: the system prompt (8), then 7 messages of 10 each
+        assert kept == [messages[0], *messages[-7:]]
+        assert tokens == 78
+
+    def test_unknown_model_uses_default_limit(self, word_tokenizer):
+        """Models without their own limit get LLM_DEFAULT_CONTEXT_TOKENS."""
+        messages = conversation(10, content='one two three four five')
+
+        kept, _, _ = plan_context(messages, 'other')
+
+        assert kept == messages
+
+    def test_latest_message_always_sent(self, word_tokenizer):
+        """A single message over the budget is still sent."""
+        messages = [{'role': 'user', 'content': 'word ' * 500}]
+
+        kept, tokens, _ = plan_context(messages, 'small')
+
+        assert kept == messages
+        assert tokens == 500 + MESSAGE_OVERHEAD_TOKENS
+
+    def test_known_counts_are_not_recounted(self, word_tokenizer):
+        """Counts passed in are trusted; only the missing ones are measured."""
+        messages = conversation(1, content='hi')
+
+        with patch('api.context_budget.count_tokens', return_value=1) as tokenizer:
+            _, tokens, _ = plan_context(messages, 'small', [10, None, 10])
+
+        assert tokenizer.call_count == 1
+        assert tokens == 21 + 3 * MESSAGE_OVERHEAD_TOKENS
+
+
+@pytest.mark.django_db
+class TestStoredCounts:
+    """Token counts cached on ChatMessage rows."""
+
+    def test_counts_stored_on_insert(self, word_tokenizer):
+        """Rows are written with their content's token count."""
+        chat = ChatFactory(messages=conversation(1, content='hi there'))
+        sync_message_rows(chat)
+
+        counts = list(ChatMessage.objects.filter(chat=chat).values_list('token_count'))
+
+        assert counts == [(4,), (3,), (3,)]
+
+    def test_missing_counts_filled_in(self, word_tokenizer, django_assert_num_queries):
+        """Rows without a count are counted once and saved."""
+        chat = ChatFactory(messages=conversation(1, content='hi there'))
+        sync_message_rows(chat)
+        ChatMessage.objects.filter(chat=chat, seq=1).update(token_count=None)
+        messages = load_messages(chat)
+
+        assert load_token_counts(chat, messages) == [4, 3, 3]
+        assert not ChatMessage.objects.filter(token_count__isnull=True).exists()
+        with django_assert_num_queries(1):
+            load_token_counts(chat, messages)
+
+    def test_turn_sends_what_fits(self, word_tokenizer, settings):
+        """A resident turn sends the system prompt and the newest history."""
+        settings.LLM_CONTEXT_LIMITS = {'slc-resident': 100}
+        chat = ChatFactory(
+            messages=conversation(10, content='one two three four five'),
+            status=Chat.STATUS_READY,
+        )
+        sync_message_rows(chat)
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client = MagicMock()
+            mock_client.get_conversation_response.return_value = 'Okay'
+            mock_client_class.return_value = mock_client
+            run_chat_message(chat.id, 'one two three', 'test-token')
+
+        sent = mock_client.get_conversation_response.call_args.kwargs['messages']
+        assert sent[0]['role'] == 'system'
+        assert sent[-1] == {'role': 'user', 'content': 'one two three'}
+        # 8 (system) + 7 (new message) + 6 x 10 history fit in 80
+        assert len(sent) == 8
+
+
+@pytest.mark.django_db
+class TestConversationSummary:
+    """The rolling summary of turns that no longer fit the context."""
+
+    @pytest.fixture
+    def long_chat(self, word_tokenizer, settings):
+        """A 21-message chat in a 100-token resident window."""
+        settings.LLM_CONTEXT_LIMITS = {'slc-resident': 100}
+        settings.LLM_SUMMARY_MAX_TOKENS = 10
+        chat = ChatFactory(
+            messages=conversation(10, content='one two three four five'),
+            status=Chat.STATUS_READY,
+        )
+        sync_message_rows(chat)
+        return chat
+
+    def test_plan_sends_summary_instead_of_covered_messages(self, word_tokenizer):
+        """Summarized messages are replaced by the summary after the system."""
+        messages = conversation(10, content='one two three four five')
+
+        kept, tokens, dropped = plan_context(
+            messages, 'small', summary='Said hello', summary_through=15
+        )
+
+        assert kept == [messages[0], summary_message('Said hello'), *messages[15:]]
+        # System 8, summary 7 words + 4, then 6 messages of 10
+        assert tokens == 8 + 11 + 6 * 10
+        assert dropped == 0
+
+    def test_plan_reports_unsummarized_gap(self, word_tokenizer):
+        """Messages between the summary and the window count as left out."""
+        messages = conversation(10, content='one two three four five')
+
+        _, _, dropped = plan_context(
+            messages, 'small', summary='Said hello', summary_through=3
+        )
+
+        # 61 tokens left for history: 6 messages, so 15..20 are sent
+        assert dropped == 12
+
+    def test_boundary_leaves_room_to_grow(self, word_tokenizer, settings):
+        """A new summary leaves the window half the history budget."""
+        settings.LLM_SUMMARY_MAX_TOKENS = 10
+        messages = conversation(10, content='one two three four five')
+
+        # (80 - 8 - 10 - 4) / 2 = 29 tokens: the newest 2 messages
+        assert summary_boundary(messages, 'small') == 19
+
+    def test_turn_queues_summary_once(self, long_chat):
+        """A turn that leaves messages out queues one low-priority summary."""
+        job = LLMJob.objects.create(
+            chat=long_chat,
+            kind=LLMJob.KIND_CHAT_MESSAGE,
+            payload={'message': 'one two three'},
+        )
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client_class.return_value.get_conversation_response.return_value = (
+                'Okay'
+            )
+            run_job(job)
+            run_job(job)
+
+        summaries = LLMJob.objects.filter(kind=LLMJob.KIND_SUMMARY)
+        assert summaries.count() == 1
+        assert summaries.get().priority == LLMJob.PRIORITY_LOW
+
+    def test_summary_job_extends_summary(self, long_chat):
+        """Only the newly covered messages are sent, with the old summary."""
+        Chat.objects.filter(pk=long_chat.pk).update(
+            summary='- Said hello', summary_through=5
+        )
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client = mock_client_class.return_value
+            mock_client.get_summary_response.return_value = ' - Said a lot \n'
+            run_summary(long_chat.id, 'test-token')
+            run_summary(long_chat.id, 'test-token')
+
+        long_chat.refresh_from_db()
+        assert long_chat.summary == '- Said a lot'
+        # (80 - 8 - 10 - 4) / 2 = 29 tokens: the newest 2 messages are kept
+        assert long_chat.summary_through == 19
+        prompt = mock_client.get_summary_response.call_args.args[0][1]['content']
+        assert '- Said hello' in prompt
+        assert 'Resident: 1 one' not in prompt
+        assert 'Care worker: 2 one' in prompt
+        assert 'Resident: 8 one' in prompt
+        assert '9 one' not in prompt
+        # Nothing new to cover the second time
+        assert mock_client.get_summary_response.call_count == 1
+
+    def test_next_turn_uses_summary(self, long_chat):
+        """Later turns send the system prompt, summary and recent window."""
+        Chat.objects.filter(pk=long_chat.pk).update(
+            summary='Said a lot', summary_through=19
+        )
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client = mock_client_class.return_value
+            mock_client.get_conversation_response.return_value = 'Okay'
+            turn = run_chat_message(long_chat.id, 'hi', 'test-token')
+
+        sent = mock_client.get_conversation_response.call_args.kwargs['messages']
+        assert sent[1] == summary_message('Said a lot')
+        assert len(sent) == 5
+        assert turn.replied
+        assert not turn.summary_due
+
+    def test_editing_summarized_messages_drops_summary(self, long_chat):
+        """Replacing covered messages through the API invalidates the summary."""
+        Chat.objects.filter(pk=long_chat.pk).update(
+            summary='Said a lot', summary_through=19
+        )
+        long_chat.refresh_from_db()
+        long_chat.messages = long_chat.messages[:3]
+
+        sync_message_rows(long_chat)
+
+        long_chat.refresh_from_db()
+        assert (long_chat.summary, long_chat.summary_through) == ('', 0)
@@ -0,0 +1,84 @@
+"""
+Benchmark: planning the context of a 500-message chat.
+
+Times plan_context() on a 500-message conversation with every message
+counted by the tokenizer, with the counts already known (as read from the
+ChatMessage rows), and the full per-turn path of reading the cached counts
+with load_token_counts() and planning.
+
+Run with: pytest backend/tests/test_context_budget_benchmark.py -m slow -s
+"""
+
+import statistics
+import time
+
+import pytest
+from api.context_budget import message_content_tokens, plan_context
+from api.message_store import load_messages, load_token_counts, sync_message_rows
+
+from .factories import ChatFactory
+
+
+MESSAGES = 500
+ROUNDS = 50
+
+SENTENCE = 'The patient reports intermittent chest pain radiating to the left arm. '
+
+
+def long_conversation():
+    """A system prompt and 500 user/assistant messages of varied length."""
+    messages = [{'role': 'system', 'content': SENTENCE * 40}]
+    for i in range(MESSAGES):
+        role = 'user' if i % 2 == 0 else 'assistant'
+        messages.append({'role': role, 'content': SENTENCE * (1 + i % 7)})
+    return messages
+
+
+def timed(func, rounds=ROUNDS):
+    """Call ``func`` ``rounds`` times and return per-call times in ms."""
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def summary(label, times):
+    """One report line: mean and p95 in ms."""
+    return (
+        f'  {label:<26} mean {statistics.mean(times):.3f} ms, '
+        f'p95 {statistics.quantiles(times, n=20)[-1]:.3f} ms'
+    )
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+def test_planning_500_message_chat():
+    """Cached counts make planning a long chat a single pass over ints."""
+    messages = long_conversation()
+    counts = [message_content_tokens(m) for m in messages]
+    chat = ChatFactory(messages=messages)
+    sync_message_rows(chat)
+    stored = load_messages(chat)
+
+    uncounted = timed(lambda: plan_context(messages, 'slc-resident'))
+    cached = timed(lambda: plan_context(messages, 'slc-resident', counts))
+    per_turn = timed(
+        lambda: plan_context(stored, 'slc-resident', load_token_counts(chat, stored))
+    )
+
+    kept, tokens, _ = plan_context(messages, 'slc-resident', counts)
+    print(
+        f'\n{len(messages)} messages, {sum(counts)} tokens in total; '
+        f'{len(kept)} messages (~{tokens} tokens) fit\n'
+        + summary('tokenizing every message', uncounted)
+        + '\n'
+        + summary('with cached counts', cached)
+        + '\n'
+        + summary('reading counts + planning', per_turn)
+    )
+
+    assert plan_context(messages, 'slc-resident')[:2] == (kept, tokens)
+    assert 1 < len(kept) < len(messages)
+    assert statistics.mean(cached) < statistics.mean(uncounted)
@@ -0,0 +1,112 @@
+"""Tests for read-replica routing."""
+
+import pytest
+from api.db_router import PRIMARY_PIN_COOKIE, primary_db, replica_reads
+from api.models import Chat
+from django.db import connections, router
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .factories import ChatFactory
+
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True, databases=['default', 'replica']),
+]
+
+
+@pytest.fixture
+def replica():
+    """Route opted-in reads to the test replica (a mirror of default)."""
+    with override_settings(DATABASE_REPLICA='replica'):
+        yield
+
+
+def queries_on(alias):
+    """Capture the queries run on one database alias."""
+    return CaptureQueriesContext(connections[alias])
+
+
+@pytest.mark.usefixtures('replica')
+class TestReplicaRouting:
+    """Which database each kind of request reads from."""
+
+    def test_polling_get_reads_replica(self, authenticated_client, user):
+        """Chat detail and list GETs read from the replica."""
+        chat = ChatFactory(user=user)
+
+        with queries_on('default') as primary, queries_on('replica') as replica:
+            detail = authenticated_client.get(f'/api/chats/{chat.id}/')
+            listing = authenticated_client.get('/api/chats/')
+
+        assert detail.status_code == listing.status_code == 200
+        assert len(replica) > 0
+        assert not any('api_chat' in q['sql'] for q in primary)
+
+    def test_client_that_wrote_sticks_to_primary(self, authenticated_client, user):
+        """After a write the client reads its own writes from the primary."""
+        chat = ChatFactory(user=user)
+
+        response = authenticated_client.patch(
+            f'/api/chats/{chat.id}/', {'title': 'Renamed'}, format='json'
+        )
+        assert response.status_code == 200
+        assert PRIMARY_PIN_COOKIE in response.cookies
+
+        with queries_on('default') as primary, queries_on('replica') as replica:
+            authenticated_client.get(f'/api/chats/{chat.id}/')
+
+        assert len(primary) > 0
+        assert len(replica) == 0
+
+    def test_failed_write_does_not_pin(self, authenticated_client):
+        """Only successful writes set the stickiness cookie."""
+        response = authenticated_client.patch(
+            '/api/chats/999999/', {'title': 'Nope'}, format='json'
+        )
+
+        assert response.status_code == 404
+        assert PRIMARY_PIN_COOKIE not in response.cookies
+
+    def test_reads_after_write_in_request_use_primary(self):
+        """Once a request writes, its later reads go to the primary."""
+        seen = []
+
+        class View:
+            @replica_reads
+            def get(self, request):
+                seen.append(router.db_for_read(Chat))
+                ChatFactory()
+                seen.append(router.db_for_read(Chat))
+
+        View().get(type('Request', (), {'COOKIES': {}})())
+
+        assert seen == ['replica', 'default']
+
+    def test_primary_db_overrides_replica_reads(self):
+        """primary_db() (used by background jobs) always reads the primary."""
+        seen = []
+
+        class View:
+            @replica_reads
+            def get(self, request):
+                with primary_db():
+                    seen.append(router.db_for_read(Chat))
+
+        View().get(type('Request', (), {'COOKIES': {}})())
+
+        assert seen == ['default']
+
+
+def test_no_replica_configured(authenticated_client, user):
+    """Without DATABASE_REPLICA everything stays on the primary."""
+    chat = ChatFactory(user=user)
+
+    with queries_on('replica') as replica:
+        authenticated_client.get(f'/api/chats/{chat.id}/')
+        response = authenticated_client.patch(
+            f'/api/chats/{chat.id}/', {'title': 'Renamed'}, format='json'
+        )
+
+    assert len(replica) == 0
+    assert PRIMARY_PIN_COOKIE not in response.cookies
@@ -0,0 +1,155 @@
+"""Tests for the incrementally maintained LearnerStats totals."""
+
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from api.background_tasks import run_grading
+from api.learner_stats import computed_stats
+from api.models import Chat, LearnerStats
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .factories import ChatFactory, CompletedChatFactory, UserFactory
+
+
+def stats_for(user):
+    """The learner's stored totals as a dict."""
+    return LearnerStats.objects.filter(user=user).values(
+        'chat_count', 'completed_count', 'score_total', 'scored_count', 'latest_score'
+    )[0]
+
+
+def grade(chat, percentage):
+    """Run the grading task for ``chat`` with a canned LLM score."""
+    with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+        mock_client_class.return_value.get_grading_response.return_value = {
+            'score': {'percentage': percentage}
+        }
+        run_grading(chat.id, 'test-token')
+
+
+@pytest.mark.django_db
+class TestIncrementalUpdates:
+    """Creating, grading, editing and deleting chats keep the totals right."""
+
+    def test_create_and_grade(self, authenticated_client, user):
+        """New chats count at once; grading adds completion and score."""
+        response = authenticated_client.post(
+            '/api/chats/', {'title': 'New', 'messages': []}, format='json'
+        )
+        assert response.status_code == 201
+        assert stats_for(user)['chat_count'] == 1
+
+        chat = Chat.objects.get(pk=response.data['chat']['id'])
+        Chat.objects.filter(pk=chat.pk).update(status=Chat.STATUS_GRADING)
+        grade(chat, 70)
+        second = ChatFactory(user=user, status=Chat.STATUS_GRADING)
+        grade(second, 90)
+
+        assert stats_for(user) == {
+            'chat_count': 2,
+            'completed_count': 2,
+            'score_total': 160.0,
+            'scored_count': 2,
+            'latest_score': 90.0,
+        }
+
+    def test_failed_grading_changes_nothing(self, user):
+        """A grading error leaves the totals alone."""
+        chat = ChatFactory(user=user, status=Chat.STATUS_GRADING)
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client_class.return_value.get_grading_response.side_effect = (
+                RuntimeError('LLM down')
+            )
+            run_grading(chat.id, 'test-token')
+
+        assert stats_for(user)['completed_count'] == 0
+
+    def test_delete_recomputes(self, authenticated_client, user):
+        """Deleting a graded chat takes its score back out."""
+        kept = CompletedChatFactory(user=user, score=60)
+        deleted = CompletedChatFactory(user=user, score=100)
+
+        response = authenticated_client.delete(f'/api/chats/{deleted.id}/')
+
+        assert response.status_code == 204
+        assert stats_for(user) == {
+            'chat_count': 1,
+            'completed_count': 1,
+            'score_total': kept.score,
+            'scored_count': 1,
+            'latest_score': kept.score,
+        }
+
+    def test_score_edit_recomputes(self, authenticated_client, user):
+        """Editing a chat's score directly is reflected in the totals."""
+        chat = CompletedChatFactory(user=user, score=50)
+
+        authenticated_client.patch(
+            f'/api/chats/{chat.id}/', {'score': 75}, format='json'
+        )
+
+        assert stats_for(user)['score_total'] == 75.0
+
+    def test_purge_recomputes(self, user):
+        """purge_chats updates the owners' totals."""
+        chat = CompletedChatFactory(user=user)
+        Chat.objects.filter(pk=chat.pk).update(updated_at='2000-01-01T00:00:00Z')
+
+        call_command('purge_chats', '--days=365', stdout=StringIO())
+
+        assert stats_for(user)['chat_count'] == 0
+        assert stats_for(user)['latest_score'] is None
+
+
+@pytest.mark.django_db
+class TestStaffListing:
+    """The staff user listing reads the totals instead of counting chats."""
+
+    def test_all_users_serves_stats(self, staff_client):
+        """Totals come from LearnerStats, without touching api_chat."""
+        learner = UserFactory(username='learner')
+        ChatFactory(user=learner)
+        CompletedChatFactory(user=learner, score=80)
+        CompletedChatFactory(user=learner, score=90)
+        UserFactory(username='newcomer')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = staff_client.get('/api/users/')
+
+        users = {u['username']: u for u in response.data['items']}
+        assert users['learner']['chat_count'] == 3
+        assert users['learner']['completed_count'] == 2
+        assert users['learner']['average_score'] == 85.0
+        assert users['learner']['latest_score'] == 90.0
+        assert users['newcomer']['chat_count'] == 0
+        assert users['newcomer']['average_score'] is None
+        assert not any('"api_chat"' in q['sql'] for q in queries)
+
+
+@pytest.mark.django_db
+class TestRebuildCommand:
+    """Tests for manage.py rebuild_learner_stats."""
+
+    def test_rebuild_repairs_drift(self, user):
+        """Every row is recomputed from the chats in batches."""
+        CompletedChatFactory(user=user, score=40)
+        ChatFactory(user=user)
+        other = UserFactory()
+        LearnerStats.objects.filter(user=user).update(chat_count=99, score_total=0)
+
+        out = StringIO()
+        call_command('rebuild_learner_stats', '--batch-size=1', stdout=out)
+
+        assert 'Users rebuilt: 2' in out.getvalue()
+        assert stats_for(user) == {
+            'chat_count': 2,
+            'completed_count': 1,
+            'score_total': 40.0,
+            'scored_count': 1,
+            'latest_score': 40.0,
+        }
+        assert stats_for(other)['chat_count'] == 0
+        assert len(computed_stats()) == 2
@@ -0,0 +1,179 @@
+"""Tests for the durable LLM job queue and the run_llm_workers command."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from api.jobs import claim_jobs, enqueue_job, run_job_by_id
+from api.models import Chat, LLMJob
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from .factories import ChatFactory, UserProfileFactory
+
+
+class SyncExecutor:
+    """Stand-in for BoundedTaskExecutor that runs tasks immediately."""
+
+    def __init__(self, max_workers, max_queue_size, retry_after=5):
+        self.max_workers = max_workers
+
+    def submit(self, func, *args, **kwargs):
+        func(*args, **kwargs)
+
+    def join(self):
+        pass
+
+    def stats(self):
+        return {'active_workers': 0, 'queue_depth': 0}
+
+
+@pytest.mark.django_db
+class TestEnqueueFromViews:
+    """LLM views persist jobs instead of starting threads."""
+
+    def test_send_message_enqueues_job(
+        self, authenticated_client_with_profile, user_with_profile
+    ):
+        """Send message creates a queued chat_message job with its payload."""
+        chat = ChatFactory(user=user_with_profile)
+
+        authenticated_client_with_profile.post(
+            f'/api/chats/{chat.id}/send-message/',
+            {'message': 'Hello', 'is_action': True},
+            format='json',
+        )
+
+        job = LLMJob.objects.get(chat=chat)
+        assert job.kind == LLMJob.KIND_CHAT_MESSAGE
+        assert job.status == LLMJob.STATUS_QUEUED
+        assert job.payload == {'message': 'Hello', 'is_action': True}
+
+    def test_get_help_enqueues_job(
+        self, authenticated_client_with_profile, user_with_profile
+    ):
+        """Get help creates a queued help job."""
+        chat = ChatFactory(
+            user=user_with_profile,
+            messages=[{'role': 'user', 'content': 'Hello'}],
+        )
+
+        authenticated_client_with_profile.post(f'/api/chats/{chat.id}/get-help/')
+
+        assert LLMJob.objects.get(chat=chat).kind == LLMJob.KIND_HELP
+
+    def test_grade_enqueues_job(
+        self, authenticated_client_with_profile, user_with_profile
+    ):
+        """Grade creates a queued grading job."""
+        chat = ChatFactory(
+            user=user_with_profile,
+            messages=[{'role': 'user', 'content': 'Hello'}],
+        )
+
+        authenticated_client_with_profile.post(f'/api/chats/{chat.id}/grade/')
+
+        assert LLMJob.objects.get(chat=chat).kind == LLMJob.KIND_GRADING
+
+    @override_settings(LLM_JOB_QUEUE_MAX=0)
+    def test_full_backlog_returns_503(
+        self, authenticated_client_with_profile, user_with_profile
+    ):
+        """A full durable backlog rejects new work with 503."""
+        chat = ChatFactory(user=user_with_profile)
+
+        response = authenticated_client_with_profile.post(
+            f'/api/chats/{chat.id}/send-message/',
+            {'message': 'Hello'},
+            format='json',
+        )
+
+        assert response.status_code == 503
+        assert not LLMJob.objects.filter(chat=chat).exists()
+
+
+@pytest.mark.django_db
+class TestJobQueue:
+    """Tests for enqueue/claim helpers."""
+
+    @override_settings(LLM_JOB_EXECUTION='inline')
+    def test_inline_mode_dispatches_to_pool(self, chat):
+        """Inline mode hands the job id to the in-process worker pool."""
+        with patch('api.jobs.submit_task') as mock_submit:
+            job = enqueue_job(chat, LLMJob.KIND_GRADING)
+
+        mock_submit.assert_called_once_with(run_job_by_id, job.id, 'inline')
+
+    def test_claim_marks_jobs_running(self, chat):
+        """Claimed jobs are locked to the worker and their attempts counted."""
+        job = enqueue_job(chat, LLMJob.KIND_GRADING)
+
+        claimed = claim_jobs('worker-1', limit=10)
+
+        assert [j.pk for j in claimed] == [job.pk]
+        job.refresh_from_db()
+        assert job.status == LLMJob.STATUS_RUNNING
+        assert job.locked_by == 'worker-1'
+        assert job.attempts == 1
+        assert claim_jobs('worker-2', limit=10) == []
+
+    def test_claim_takes_low_priority_jobs_last(self, chat):
+        """Summaries wait behind learner-facing jobs queued after them."""
+        summary = enqueue_job(chat, LLMJob.KIND_SUMMARY, priority=LLMJob.PRIORITY_LOW)
+        grading = enqueue_job(chat, LLMJob.KIND_GRADING)
+
+        assert [j.pk for j in claim_jobs('worker-1', limit=1)] == [grading.pk]
+        assert [j.pk for j in claim_jobs('worker-1', limit=1)] == [summary.pk]
+
+    def test_claim_skips_jobs_not_yet_available(self, chat):
+        """Jobs scheduled for the future are left in the queue."""
+        LLMJob.objects.create(
+            chat=chat,
+            kind=LLMJob.KIND_GRADING,
+            available_at=timezone.now() + timedelta(minutes=5),
+        )
+
+        assert claim_jobs('worker-1', limit=10) == []
+
+    def test_run_job_by_id_skips_claimed_job(self, chat):
+        """A job already claimed by a standalone worker is not run twice."""
+        job = enqueue_job(chat, LLMJob.KIND_GRADING)
+        claim_jobs('worker-1', limit=1)
+
+        with patch('api.jobs.run_job') as mock_run:
+            run_job_by_id(job.id, 'inline')
+
+        mock_run.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestRunLLMWorkersCommand:
+    """Tests for manage.py run_llm_workers."""
+
+    def test_once_processes_queued_jobs(self):
+        """--once drains the queue and marks jobs done."""
+        profile = UserProfileFactory(openwebui_token='stored-token')
+        chat = ChatFactory(user=profile.user, messages=[])
+        job = enqueue_job(chat, LLMJob.KIND_CHAT_MESSAGE, {'message': 'Hi there'})
+
+        with (
+            patch(
+                'api.management.commands.run_llm_workers.BoundedTaskExecutor',
+                SyncExecutor,
+            ),
+            patch('api.background_tasks.OpenWebUIClient') as mock_client_class,
+        ):
+            mock_client = MagicMock()
+            mock_client.get_conversation_response.return_value = 'Hello!'
+            mock_client_class.return_value = mock_client
+
+            call_command('run_llm_workers', '--once', '--concurrency=2')
+
+        # Token is read from the profile at run time, not stored in the job
+        mock_client_class.assert_called_once_with(user_token='stored-token')
+        job.refresh_from_db()
+        assert job.status == LLMJob.STATUS_DONE
+        chat.refresh_from_db()
+        assert chat.status == Chat.STATUS_READY
+        assert chat.messages[-1] == {'role': 'assistant', 'content': 'Hello!'}
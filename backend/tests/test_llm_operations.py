@@ -8,8 +8,12 @@ These tests document the CURRENT behavior of the LLM-related API endpoints:
 All OpenWebUI API calls are mocked - we test the view logic, not actual LLM responses.
 """
 
+from contextlib import contextmanager
+from unittest.mock import patch
+
 import pytest
 from api.models import Chat
+from api.utils import chat_etag
 
 from .factories import ChatFactory, UserFactory
 
@@ -448,3 +452,99 @@ class TestGrade:
         response = api_client.post(f'/api/chats/{chat.id}/grade/', {}, format='json')
 
         assert response.status_code == 401
+
+
+@contextmanager
+def concurrent_write(**fields):
+    """Have another writer update the chat just before the view's first write."""
+    apply_update = Chat.apply_update
+    raced = []
+
+    def racing_apply_update(chat, **updates):
+        if not raced:
+            raced.append(chat.pk)
+            Chat.objects.get(pk=chat.pk).apply_update(**fields)
+        return apply_update(chat, **updates)
+
+    with patch.object(Chat, 'apply_update', racing_apply_update):
+        yield
+
+
+@pytest.mark.django_db
+class TestConcurrentWrites:
+    """Version races on the status write of send-message, get-help and grade."""
+
+    @pytest.fixture
+    def chat(self, user_with_profile):
+        """A chat with one answered turn."""
+        return ChatFactory(
+            user=user_with_profile,
+            messages=[
+                {'role': 'user', 'content': 'Hello'},
+                {'role': 'assistant', 'content': 'Hi there!'},
+            ],
+            interaction_count=1,
+        )
+
+    @pytest.mark.parametrize('operation', ['send-message', 'get-help', 'grade'])
+    def test_unconditional_request_retried(
+        self, operation, chat, authenticated_client_with_profile
+    ):
+        """Without If-Match, losing a race to a background write isn't an error."""
+        with concurrent_write(title='Renamed elsewhere'):
+            response = authenticated_client_with_profile.post(
+                f'/api/chats/{chat.id}/{operation}/',
+                {'message': 'Next'},
+                format='json',
+            )
+
+        assert response.status_code == 202
+        chat.refresh_from_db()
+        assert chat.title == 'Renamed elsewhere'
+        assert chat.status != Chat.STATUS_READY
+
+    def test_retry_rechecks_the_chat(self, chat, authenticated_client_with_profile):
+        """The retry sees the other writer's change (here: the chat completed)."""
+        with concurrent_write(completed=True):
+            response = authenticated_client_with_profile.post(
+                f'/api/chats/{chat.id}/send-message/',
+                {'message': 'Next'},
+                format='json',
+            )
+
+        assert response.status_code == 400
+        assert 'completed' in response.data['message']
+
+    def test_conditional_request_conflicts(
+        self, chat, authenticated_client_with_profile
+    ):
+        """With If-Match, losing the race is a 409."""
+        with concurrent_write(title='Renamed elsewhere'):
+            response = authenticated_client_with_profile.post(
+                f'/api/chats/{chat.id}/send-message/',
+                {'message': 'Next'},
+                format='json',
+                HTTP_IF_MATCH=chat_etag(chat.version),
+            )
+
+        assert response.status_code == 409
+        assert response.data['error_code'] == 'VERSION_CONFLICT'
+
+    @pytest.mark.parametrize('operation', ['send-message', 'get-help', 'grade'])
+    def test_stale_if_match_rejected(
+        self, operation, chat, authenticated_client_with_profile
+    ):
+        """A request made from an old copy of the chat is refused up front."""
+        etag = chat_etag(chat.version)
+        Chat.objects.get(pk=chat.pk).apply_update(title='Renamed elsewhere')
+
+        response = authenticated_client_with_profile.post(
+            f'/api/chats/{chat.id}/{operation}/',
+            {'message': 'Next'},
+            format='json',
+            HTTP_IF_MATCH=etag,
+        )
+
+        assert response.status_code == 409
+        chat.refresh_from_db()
+        assert chat.status == Chat.STATUS_READY
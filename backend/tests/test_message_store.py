@@ -0,0 +1,299 @@
+"""Tests for per-message chat storage, its counters and maintenance commands."""
+
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from api.archive import archive_chat, rehydrate
+from api.background_tasks import _write_with_retry, run_chat_message
+from api.message_store import append_messages, load_messages, sync_message_rows
+from api.models import Chat, ChatMessage, ChatVersionConflictError
+from django.core.management import call_command
+
+from .factories import ChatFactory, CompletedChatFactory, UserProfileFactory
+
+
+def stored_messages(chat):
+    """The chat's rows, as message objects, in order."""
+    return [row.as_message() for row in ChatMessage.objects.filter(chat=chat)]
+
+
+@pytest.mark.django_db
+class TestMessageStore:
+    """Tests for load_messages, append_messages and sync_message_rows."""
+
+    def test_load_reads_json_until_rows_are_complete(self):
+        """Legacy chats are read from the JSON projection, minus partials."""
+        chat = ChatFactory(
+            messages=[
+                {'role': 'user', 'content': 'Hi'},
+                {'role': 'assistant', 'content': 'Hel', 'streaming': True},
+            ]
+        )
+
+        assert load_messages(chat) == [{'role': 'user', 'content': 'Hi'}]
+
+    def test_load_reads_rows_once_complete(self):
+        """Complete chats are read from their rows, not the JSON."""
+        chat = ChatFactory(messages=[{'role': 'user', 'content': 'Hi'}])
+        sync_message_rows(chat)
+        Chat.objects.filter(pk=chat.pk).update(messages=[])
+
+        chat.refresh_from_db()
+        assert load_messages(chat) == [{'role': 'user', 'content': 'Hi'}]
+
+    def test_append_numbers_rows_after_existing_messages(self):
+        """Appended rows continue the transcript's sequence."""
+        chat = ChatFactory(messages=[{'role': 'user', 'content': 'Hi'}] * 3)
+        messages = load_messages(chat)
+
+        new = append_messages(chat, messages, [{'role': 'user', 'content': 'Next'}])
+
+        assert len(new) == 4
+        assert chat.messages == new
+        row = ChatMessage.objects.get(chat=chat)
+        assert (row.seq, row.content) == (3, 'Next')
+
+    def test_concurrent_append_is_a_version_conflict(self):
+        """A writer that lost the race gets a conflict it can retry."""
+        chat = ChatFactory(messages=[])
+        sync_message_rows(chat)
+        stale = Chat.objects.get(pk=chat.pk)
+        append_messages(chat, [], [{'role': 'user', 'content': 'First'}])
+
+        with pytest.raises(ChatVersionConflictError):
+            append_messages(stale, [], [{'role': 'assistant', 'content': 'Late'}])
+
+        def append_reply(chat):
+            return append_messages(
+                chat, load_messages(chat), [{'role': 'assistant', 'content': 'Late'}]
+            )
+
+        assert _write_with_retry(stale, append_reply) == [
+            {'role': 'user', 'content': 'First'},
+            {'role': 'assistant', 'content': 'Late'},
+        ]
+        assert ChatMessage.objects.filter(chat=chat).count() == 2
+
+    def test_rows_round_trip_unusual_messages(self):
+        """Extra keys and non-text content come back unchanged."""
+        messages = [
+            {'role': 'user', 'content': 'Hi', 'timestamp': '2026-01-01T00:00:00Z'},
+            {'role': 'assistant', 'content': {'parts': ['a', 'b']}},
+            {'role': 'x' * 40, 'content': 'odd role'},
+        ]
+        chat = ChatFactory(messages=messages)
+
+        sync_message_rows(chat)
+
+        assert stored_messages(chat) == messages
+
+    def test_sync_keeps_matching_prefix(self):
+        """Only rows after the first difference are replaced."""
+        chat = ChatFactory(
+            messages=[
+                {'role': 'user', 'content': 'One'},
+                {'role': 'assistant', 'content': 'Two'},
+            ]
+        )
+        sync_message_rows(chat)
+        first_row = ChatMessage.objects.get(chat=chat, seq=0)
+
+        chat.messages = [
+            {'role': 'user', 'content': 'One'},
+            {'role': 'assistant', 'content': 'Changed'},
+            {'role': 'user', 'content': 'Three'},
+        ]
+        sync_message_rows(chat)
+
+        assert ChatMessage.objects.get(chat=chat, seq=0).pk == first_row.pk
+        assert stored_messages(chat) == chat.messages
+
+    def test_sync_of_stale_snapshot_keeps_later_append(self):
+        """A turn that lands after the backfill read the chat is not lost."""
+        chat = ChatFactory(messages=[{'role': 'user', 'content': 'Hi'}])
+        snapshot = Chat.objects.get(pk=chat.pk)
+        append_messages(
+            chat, load_messages(chat), [{'role': 'assistant', 'content': 'Hello'}]
+        )
+
+        sync_message_rows(snapshot)
+
+        expected = [
+            {'role': 'user', 'content': 'Hi'},
+            {'role': 'assistant', 'content': 'Hello'},
+        ]
+        assert stored_messages(chat) == expected
+        assert snapshot.messages == expected
+        assert snapshot.version == Chat.objects.get(pk=chat.pk).version
+
+    def test_sync_does_not_touch_updated_at(self):
+        """Backfilling a chat doesn't change its version."""
+        chat = ChatFactory()
+        before = chat.updated_at
+
+        sync_message_rows(chat)
+
+        chat.refresh_from_db()
+        assert chat.message_rows_complete is True
+        assert chat.updated_at == before
+
+
+@pytest.mark.django_db
+class TestMessageWrites:
+    """Views and tasks write rows alongside the JSON projection."""
+
+    def test_create_chat_writes_rows(self, authenticated_client):
+        """A chat created with messages starts with complete rows."""
+        response = authenticated_client.post(
+            '/api/chats/',
+            {'title': 'New', 'messages': [{'role': 'system', 'content': 'Brief'}]},
+            format='json',
+        )
+
+        chat = Chat.objects.get(pk=response.data['chat']['id'])
+        assert chat.message_rows_complete is True
+        assert stored_messages(chat) == [{'role': 'system', 'content': 'Brief'}]
+
+    def test_update_chat_rewrites_rows(self, authenticated_client, user):
+        """Replacing messages through the API replaces the rows too."""
+        chat = ChatFactory(user=user, messages=[{'role': 'user', 'content': 'Old'}])
+
+        authenticated_client.patch(
+            f'/api/chats/{chat.id}/',
+            {'messages': [{'role': 'user', 'content': 'New'}]},
+            format='json',
+        )
+
+        assert stored_messages(chat) == [{'role': 'user', 'content': 'New'}]
+
+    @pytest.mark.parametrize('rows_complete', [True, False])
+    def test_turn_appends_rows(self, rows_complete):
+        """A turn inserts the user and assistant rows after the transcript."""
+        profile = UserProfileFactory(openwebui_token='test-token')
+        chat = ChatFactory(
+            user=profile.user, messages=[{'role': 'system', 'content': 'Brief'}]
+        )
+        if rows_complete:
+            sync_message_rows(chat)
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client = MagicMock()
+            mock_client.get_conversation_response.return_value = 'Hello!'
+            mock_client_class.return_value = mock_client
+            run_chat_message(chat.id, 'Hi', 'test-token')
+
+        rows = ChatMessage.objects.filter(chat=chat, seq__gte=1)
+        assert [(r.seq, r.role) for r in rows] == [(1, 'user'), (2, 'assistant')]
+        chat.refresh_from_db()
+        assert chat.messages[1:] == [
+            {'role': 'user', 'content': 'Hi'},
+            {'role': 'assistant', 'content': 'Hello!'},
+        ]
+
+
+@pytest.mark.django_db
+class TestCounters:
+    """The role counters move with appends and can be checked and repaired."""
+
+    def test_append_increments_counters(self):
+        """Appending counts the new user and assistant messages in the same write."""
+        chat = ChatFactory(messages=[{'role': 'user', 'content': 'Hi'}])
+        assert (chat.interaction_count, chat.assistant_message_count) == (1, 0)
+
+        append_messages(
+            chat,
+            load_messages(chat),
+            [
+                {'role': 'assistant', 'content': 'Hello'},
+                {'role': 'scenario', 'content': 'Waves'},
+                {'role': 'user', 'content': 'Bye'},
+            ],
+        )
+
+        assert (chat.interaction_count, chat.assistant_message_count) == (2, 1)
+        chat.refresh_from_db()
+        assert (chat.interaction_count, chat.assistant_message_count) == (2, 1)
+
+    @pytest.mark.parametrize('rows_complete', [True, False])
+    def test_check_command_reports_and_fixes_drift(self, rows_complete):
+        """Wrong counters are reported, and rewritten with --fix."""
+        chat = ChatFactory(
+            messages=[
+                {'role': 'user', 'content': 'Hi'},
+                {'role': 'assistant', 'content': 'Hello'},
+            ],
+            help_responses=[
+                {'turn': 1, 'help_text': 'Listen', 'status': 'completed'},
+                {'turn': 2, 'help_text': '', 'status': 'processing'},
+            ],
+        )
+        if rows_complete:
+            sync_message_rows(chat)
+        ok = ChatFactory(messages=[{'role': 'user', 'content': 'Fine'}])
+        Chat.objects.filter(pk=chat.pk).update(
+            interaction_count=5, assistant_message_count=0, help_response_count=2
+        )
+
+        out = StringIO()
+        call_command('check_chat_counters', stdout=out)
+        assert f'Chat {chat.pk}:' in out.getvalue()
+        assert f'Chat {ok.pk}:' not in out.getvalue()
+        chat.refresh_from_db()
+        assert chat.interaction_count == 5
+
+        call_command('check_chat_counters', '--fix', '--batch-size=1', stdout=out)
+        chat.refresh_from_db()
+        assert chat.interaction_count == 1
+        assert chat.assistant_message_count == 1
+        assert chat.help_response_count == 1
+
+    def test_check_command_queries_per_batch(self, django_assert_num_queries):
+        """Each batch is recounted with one query per storage kind."""
+        for i in range(3):
+            synced = ChatFactory(messages=[{'role': 'user', 'content': f'Hi {i}'}])
+            sync_message_rows(synced)
+            ChatFactory(messages=[{'role': 'user', 'content': f'Old {i}'}])
+            archive_chat(CompletedChatFactory())
+
+        # Chats, their row counts, legacy transcripts and archives
+        with django_assert_num_queries(4):
+            call_command('check_chat_counters', '--batch-size=100', stdout=StringIO())
+
+
+@pytest.mark.django_db
+class TestBackfillCommand:
+    """Tests for the backfill_chat_messages command."""
+
+    def test_backfills_in_batches_and_is_rerunnable(self):
+        """Every idle chat gets its rows; running again changes nothing."""
+        chats = [
+            ChatFactory(messages=[{'role': 'user', 'content': f'Hi {i}'}])
+            for i in range(5)
+        ]
+        busy = ChatFactory(status=Chat.STATUS_THINKING)
+
+        call_command('backfill_chat_messages', '--batch-size=2')
+        call_command('backfill_chat_messages', '--batch-size=2')
+
+        for chat in chats:
+            chat.refresh_from_db()
+            assert chat.message_rows_complete is True
+            assert stored_messages(chat) == chat.messages
+        busy.refresh_from_db()
+        assert busy.message_rows_complete is False
+        assert ChatMessage.objects.count() == 5
+
+    def test_restores_rows_of_archived_chats(self):
+        """Chats archived without their rows get them back from the archive."""
+        chat = CompletedChatFactory()
+        archive_chat(chat)
+        Chat.objects.filter(pk=chat.pk).update(message_rows_complete=False)
+        ChatMessage.objects.filter(chat=chat).delete()
+
+        call_command('backfill_chat_messages')
+
+        chat.refresh_from_db()
+        assert chat.archived is True
+        assert chat.message_rows_complete is True
+        assert stored_messages(chat) == rehydrate(chat).messages
@@ -5,12 +5,13 @@ These tests verify the current behavior of the OpenWebUI API client,
 including authentication, chat completion, and error handling.
 """
 
+import json
 from unittest.mock import patch
 
 import pytest
 import responses
 from api.models import UserProfile
-from api.openwebui_client import OpenWebUIClient
+from api.openwebui_client import OpenWebUIClient, get_http_session
 from django.contrib.auth.models import User
 
 
@@ -431,6 +432,75 @@ class TestGetConversationResponse:
             )
 
 
+def sse_body(*chunks):
+    """Build an SSE completion stream from content deltas."""
+    lines = [
+        'data: ' + json.dumps({'choices': [{'delta': {'content': chunk}}]})
+        for chunk in chunks
+    ]
+    return '\n\n'.join([*lines, 'data: [DONE]']) + '\n\n'
+
+
+class TestChatCompletionStream:
+    """Tests for streaming chat completions."""
+
+    @responses.activate
+    def test_yields_content_deltas(self, client_with_token):
+        """Content deltas are yielded in order until [DONE]."""
+        responses.add(
+            responses.POST,
+            'http://localhost:8080/api/chat/completions',
+            body=': keep-alive\n\n' + sse_body('Hel', 'lo', '!'),
+            content_type='text/event-stream',
+            status=200,
+        )
+
+        chunks = list(
+            client_with_token.chat_completion_stream(
+                model='slc-resident', messages=[{'role': 'user', 'content': 'Hi'}]
+            )
+        )
+
+        assert chunks == ['Hel', 'lo', '!']
+        request_body = json.loads(responses.calls[0].request.body)
+        assert request_body['stream'] is True
+
+    @responses.activate
+    def test_stream_error_chunk_raises(self, client_with_token):
+        """An error event in the stream raises."""
+        responses.add(
+            responses.POST,
+            'http://localhost:8080/api/chat/completions',
+            body='data: {"error": {"message": "overloaded"}}\n\n',
+            content_type='text/event-stream',
+            status=200,
+        )
+
+        with pytest.raises(Exception, match='stream error'):
+            list(
+                client_with_token.chat_completion_stream(
+                    model='slc-resident', messages=[{'role': 'user', 'content': 'Hi'}]
+                )
+            )
+
+    @responses.activate
+    def test_http_error_raises(self, client_with_token):
+        """A failed stream request raises with the API error detail."""
+        responses.add(
+            responses.POST,
+            'http://localhost:8080/api/chat/completions',
+            json={'detail': 'Model not found'},
+            status=404,
+        )
+
+        with pytest.raises(Exception, match='404: Model not found'):
+            list(
+                client_with_token.stream_conversation_response(
+                    model='missing', messages=[{'role': 'user', 'content': 'Hi'}]
+                )
+            )
+
+
 class TestGetHelpResponse:
     """Tests for get_help_response method."""
 
@@ -560,3 +630,51 @@ class TestGetGradingResponse:
             client_with_token.get_grading_response(
                 messages=[{'role': 'user', 'content': 'Grade'}]
             )
+
+
+class TestPooledSession:
+    """Tests for the shared keep-alive HTTP session."""
+
+    def test_session_is_shared(self):
+        """Every call gets the same process-wide session."""
+        assert get_http_session() is get_http_session()
+
+    def test_session_mounts_pooled_adapter(self, settings):
+        """HTTP and HTTPS use an adapter sized from settings."""
+        adapter = get_http_session().get_adapter('https://example.com')
+        assert adapter._pool_maxsize == settings.OPENWEBUI_POOL_MAXSIZE
+        assert adapter._pool_block is True
+
+    @responses.activate
+    def test_completion_uses_connect_and_read_timeouts(self, client_with_token):
+        """Requests carry a (connect, read) timeout tuple."""
+        responses.add(
+            responses.POST,
+            'http://localhost:8080/api/chat/completions',
+            json={'choices': [{'message': {'content': 'ok'}}]},
+            status=200,
+        )
+
+        client_with_token.chat_completion(
+            model='test-model',
+            messages=[{'role': 'user', 'content': 'Hi'}],
+            timeout=42,
+        )
+
+        timeout = responses.calls[0].request.req_kwargs['timeout']
+        assert timeout[1] == 42
+
+    @responses.activate
+    def test_login_cookies_not_shared(self):
+        """Cookies set by OpenWebUI are not kept on the shared session."""
+        responses.add(
+            responses.POST,
+            'http://localhost:8080/api/v1/auths/signin',
+            json={'token': 'abc'},
+            headers={'Set-Cookie': 'token=abc; Path=/'},
+            status=200,
+        )
+
+        OpenWebUIClient().login(email='a@example.com', password='pw')
+
+        assert len(get_http_session().cookies) == 0
@@ -0,0 +1,128 @@
+"""
+Benchmark: pooled keep-alive session vs. a new connection per LLM turn.
+
+Runs 50 concurrent chat completions against a local stub OpenWebUI server,
+once through the shared pooled session and once with module-level
+``requests.post`` (the previous behaviour), and reports per-call latency
+and the number of TCP connections the server accepted.
+
+Run with: pytest backend/tests/test_openwebui_session_benchmark.py -m slow -s
+The stub is plain HTTP on localhost, so the saving shown is TCP setup only;
+against a remote HTTPS OpenWebUI the TLS handshake saved per call is larger.
+"""
+
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+import requests
+from api import openwebui_client
+from api.openwebui_client import OpenWebUIClient
+
+
+CONCURRENT_TURNS = 50
+ROUNDS = 4
+
+COMPLETION_BODY = json.dumps(
+    {'choices': [{'message': {'role': 'assistant', 'content': 'Hello!'}}]}
+).encode()
+
+
+class StubOpenWebUIHandler(BaseHTTPRequestHandler):
+    """Minimal /api/chat/completions endpoint that supports keep-alive."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(COMPLETION_BODY)))
+        self.end_headers()
+        self.wfile.write(COMPLETION_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubOpenWebUIServer(ThreadingHTTPServer):
+    """Threaded stub server with room for every concurrent connect."""
+
+    daemon_threads = True
+    request_queue_size = CONCURRENT_TURNS * 2
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    """Start a threaded stub server and point the client at it."""
+    server = StubOpenWebUIServer(('127.0.0.1', 0), StubOpenWebUIHandler)
+    server.connections = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv('OPENWEBUI_BASE_URL', f'http://127.0.0.1:{server.server_port}')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def run_turns(turns):
+    """Run concurrent completions and return per-call latencies in ms."""
+
+    def one_turn(_):
+        client = OpenWebUIClient(user_token='bench-token')
+        start = time.perf_counter()
+        client.chat_completion(
+            model='slc-resident', messages=[{'role': 'user', 'content': 'Hi'}]
+        )
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=turns) as pool:
+        return list(pool.map(one_turn, range(turns)))
+
+
+@pytest.mark.slow
+def test_pooled_session_saves_connection_setup(stub_server, settings):
+    """The pooled session reuses connections across concurrent turns."""
+    # Size the pool to the concurrency so turns never queue for a connection
+    settings.OPENWEBUI_POOL_MAXSIZE = CONCURRENT_TURNS
+
+    # Previous behaviour: module-level requests.post opens a fresh connection
+    with patch.object(openwebui_client, 'get_http_session', return_value=requests):
+        unpooled = []
+        for _ in range(ROUNDS):
+            unpooled += run_turns(CONCURRENT_TURNS)
+    unpooled_connections = len(stub_server.connections)
+
+    stub_server.connections.clear()
+    with patch.object(openwebui_client, '_session', None):
+        run_turns(CONCURRENT_TURNS)  # warm the pool
+        stub_server.connections.clear()
+        pooled = []
+        for _ in range(ROUNDS):
+            pooled += run_turns(CONCURRENT_TURNS)
+        openwebui_client.get_http_session().close()
+    pooled_connections = len(stub_server.connections)
+
+    print(
+        f'\n{CONCURRENT_TURNS} concurrent turns x {ROUNDS} rounds\n'
+        f'  per-call connection: mean {statistics.mean(unpooled):.2f} ms, '
+        f'p95 {statistics.quantiles(unpooled, n=20)[-1]:.2f} ms, '
+        f'{unpooled_connections} connections\n'
+        f'  pooled keep-alive:   mean {statistics.mean(pooled):.2f} ms, '
+        f'p95 {statistics.quantiles(pooled, n=20)[-1]:.2f} ms, '
+        f'{pooled_connections} connections\n'
+        f'  overhead saved per call: '
+        f'{statistics.mean(unpooled) - statistics.mean(pooled):.2f} ms'
+    )
+
+    assert unpooled_connections == CONCURRENT_TURNS * ROUNDS
+    # A warm pool never opens more than pool_maxsize connections (pool_block)
+    assert pooled_connections <= settings.OPENWEBUI_POOL_MAXSIZE
+    assert pooled_connections < unpooled_connections
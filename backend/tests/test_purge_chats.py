@@ -0,0 +1,95 @@
+"""Tests for the purge_chats retention command."""
+
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from api.message_store import sync_message_rows
+from api.models import Chat, ChatMessage, Note
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from .factories import (
+    ChatFactory,
+    ChatWithMessagesFactory,
+    CompletedChatFactory,
+    NoteFactory,
+    UserFactory,
+)
+
+
+def backdate(obj, days=400):
+    """Set a chat's or note's last update ``days`` ago."""
+    type(obj).objects.filter(pk=obj.pk).update(
+        updated_at=timezone.now() - timedelta(days=days)
+    )
+    return obj
+
+
+@pytest.mark.django_db
+class TestPurgeChatsCommand:
+    """Tests for manage.py purge_chats."""
+
+    def test_deletes_old_chats_in_batches(self, user):
+        """Old chats and their message rows go; recent and busy chats stay."""
+        old = [backdate(ChatWithMessagesFactory(user=user)) for _ in range(3)]
+        for chat in old:
+            sync_message_rows(chat)
+        recent = ChatFactory(user=user)
+        busy = backdate(ChatFactory(user=user, status=Chat.STATUS_THINKING))
+
+        out = StringIO()
+        call_command('purge_chats', '--days=365', '--batch-size=2', stdout=out)
+
+        assert set(Chat.objects.all()) == {recent, busy}
+        assert not ChatMessage.objects.exists()
+        output = out.getvalue()
+        assert 'api.Chat: 3' in output
+        assert 'Rows per second' in output
+
+    def test_status_and_user_filters(self, user):
+        """Only chats matching every filter are deleted."""
+        other = UserFactory()
+        graded = backdate(CompletedChatFactory(user=user))
+        backdate(CompletedChatFactory(user=other))
+        backdate(ChatFactory(user=user))
+
+        call_command(
+            'purge_chats',
+            '--days=365',
+            '--status=complete',
+            f'--user={user.username}',
+            stdout=StringIO(),
+        )
+
+        assert Chat.objects.count() == 2
+        assert not Chat.objects.filter(pk=graded.pk).exists()
+
+    def test_notes(self, user):
+        """Notes are only deleted with --notes."""
+        old_note = backdate(NoteFactory(author=user))
+        NoteFactory(author=user)
+
+        call_command('purge_chats', '--days=365', stdout=StringIO())
+        assert Note.objects.count() == 2
+
+        call_command('purge_chats', '--days=365', '--notes', stdout=StringIO())
+        assert Note.objects.count() == 1
+        assert not Note.objects.filter(pk=old_note.pk).exists()
+
+    def test_dry_run_deletes_nothing(self, user):
+        """--dry-run reports what would be deleted."""
+        chat = backdate(ChatWithMessagesFactory(user=user))
+        sync_message_rows(chat)
+
+        out = StringIO()
+        call_command('purge_chats', '--days=365', '--dry-run', stdout=out)
+
+        assert 'Chats to delete: 1' in out.getvalue()
+        assert f'Message rows to delete: {len(chat.messages)}' in out.getvalue()
+        assert Chat.objects.filter(pk=chat.pk).exists()
+
+    def test_rejects_unknown_user(self):
+        """An unknown username is an error, not a no-op."""
+        with pytest.raises(CommandError, match='nobody'):
+            call_command('purge_chats', '--days=365', '--user=nobody')
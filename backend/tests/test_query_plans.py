@@ -0,0 +1,153 @@
+"""Query-plan regression tests for the Chat indexes.
+
+Runs EXPLAIN on the queries behind chat listings, the stuck-chat sweeper
+and graded-chat lookups against a seeded table and fails if Postgres
+would read ``api_chat`` with a sequential scan. Sequential scans are
+disabled for the test transaction, so the planner only picks one when no
+index can serve the query, however small the table.
+
+Needs Postgres (skipped on the default SQLite test settings), e.g.:
+    pytest tests/test_query_plans.py --ds=backend.settings
+with DB_NAME/DB_USER/DB_PWD/DB_HOST/DB_PORT pointing at a scratch server.
+"""
+
+import datetime as dt
+
+import pytest
+from api.models import Chat
+from api.serializers import ChatSummarySerializer
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .factories import UserFactory
+
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'postgresql', reason='EXPLAIN plans need Postgres'
+    ),
+]
+
+USERS = 20
+CHATS_PER_USER = 50
+
+
+@pytest.fixture
+def seeded_users():
+    """Users with a realistic spread of chat statuses; sequential scans off."""
+    users = [UserFactory() for _ in range(USERS)]
+    statuses = [
+        Chat.STATUS_READY,
+        Chat.STATUS_COMPLETE,
+        Chat.STATUS_COMPLETE,
+        Chat.STATUS_READY_FOR_GRADING,
+        Chat.STATUS_THINKING,
+    ]
+    now = timezone.now()
+    Chat.objects.bulk_create(
+        Chat(
+            user=user,
+            title=f'Chat {i}',
+            status=statuses[i % len(statuses)],
+            completed=statuses[i % len(statuses)] == Chat.STATUS_COMPLETE,
+            score=i % 100,
+            messages=[],
+        )
+        for user in users
+        for i in range(CHATS_PER_USER)
+    )
+    # bulk_create sets auto_now fields to the same instant; spread them out
+    for i, pk in enumerate(Chat.objects.values_list('pk', flat=True)):
+        Chat.objects.filter(pk=pk).update(updated_at=now - dt.timedelta(minutes=i))
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE api_chat')
+        cursor.execute('SET LOCAL enable_seqscan = off')
+    return users
+
+
+def plan_nodes(sql, params=()):
+    """Every node of the EXPLAIN plan for ``sql``."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    pending = [plan[0]['Plan']]
+    while pending:
+        node = pending.pop()
+        pending.extend(node.get('Plans', []))
+        yield node
+
+
+def chat_scans(sql, params=()):
+    """(node type, index name) for each read of api_chat in the plan."""
+    return [
+        (node['Node Type'], node.get('Index Name'))
+        for node in plan_nodes(sql, params)
+        if node.get('Relation Name') == 'api_chat'
+    ]
+
+
+def assert_index_used(queryset, index_name):
+    """The queryset reads api_chat through ``index_name`` and never sequentially."""
+    sql, params = queryset.query.sql_with_params()
+    scans = chat_scans(sql, params)
+    assert scans
+    assert all(node_type != 'Seq Scan' for node_type, _ in scans), scans
+    assert any(name == index_name for _, name in scans), scans
+
+
+def captured_chat_queries(queries):
+    """SQL of the captured queries that select from api_chat."""
+    return [
+        q['sql']
+        for q in queries
+        if q['sql'].startswith('SELECT') and '"api_chat"' in q['sql']
+    ]
+
+
+def test_chat_list_pages_use_covering_index(staff_client, seeded_users):
+    """First and cursor pages of a staff per-user listing use the list index."""
+    user = seeded_users[0]
+    url = f'/api/users/{user.id}/chats/'
+
+    with CaptureQueriesContext(connection) as queries:
+        first = staff_client.get(url, {'cursor': '', 'page_size': 10})
+        next_cursor = first.data['pagination']['next_cursor']
+        staff_client.get(url, {'cursor': next_cursor, 'page_size': 10})
+
+    selects = captured_chat_queries(queries)
+    assert len(selects) == 2
+    for sql in selects:
+        scans = chat_scans(sql)
+        assert all(node_type != 'Seq Scan' for node_type, _ in scans), scans
+        assert 'api_chat_user_list_idx' in {name for _, name in scans}, scans
+
+
+def test_own_chat_list_uses_covering_index(seeded_users):
+    """A learner's first page of summaries is read from the list index."""
+    chats = ChatSummarySerializer.setup_queryset(
+        Chat.objects.filter(user=seeded_users[0])
+    ).order_by('-updated_at', '-id')[:10]
+
+    assert_index_used(chats, 'api_chat_user_list_idx')
+
+
+@pytest.mark.usefixtures('seeded_users')
+def test_transient_chats_use_partial_index():
+    """The stuck-chat sweep reads only the in-flight partial index."""
+    stuck = Chat.objects.filter(
+        status=Chat.STATUS_THINKING,
+        updated_at__lt=timezone.now() - dt.timedelta(minutes=5),
+    ).only('id', 'status', 'updated_at', 'version')
+
+    assert_index_used(stuck, 'api_chat_transient_idx')
+
+
+def test_graded_chats_by_score_use_partial_index(seeded_users):
+    """A learner's completed chats, best score first, use the score index."""
+    graded = Chat.objects.filter(user=seeded_users[0], completed=True).order_by(
+        '-score'
+    )[:5]
+
+    assert_index_used(graded, 'api_chat_user_score_idx')
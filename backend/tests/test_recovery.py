@@ -0,0 +1,256 @@
+"""Tests for the stuck-chat recovery sweeper."""
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from api.background_tasks import run_chat_message
+from api.models import Chat, ChatEvent, LLMJob
+from api.recovery import recover_stuck_chats
+from django.core.management import call_command
+from django.utils import timezone
+
+from .factories import ChatFactory, UserProfileFactory
+
+
+def make_stale(chat, minutes=60):
+    """Backdate a chat's updated_at past every recovery deadline."""
+    Chat.objects.filter(pk=chat.pk).update(
+        updated_at=timezone.now() - timedelta(minutes=minutes)
+    )
+
+
+@pytest.mark.django_db
+class TestRecoverStuckChats:
+    """Tests for recover_stuck_chats()."""
+
+    def test_stuck_thinking_chat_rolled_back(self):
+        """A chat stuck in thinking with no job goes back to ready."""
+        chat = ChatFactory(status=Chat.STATUS_THINKING)
+        make_stale(chat)
+
+        summary = recover_stuck_chats()
+
+        chat.refresh_from_db()
+        assert chat.status == Chat.STATUS_READY
+        assert summary['rolled_back'] == 1
+        event = ChatEvent.objects.get(chat=chat)
+        assert event.kind == ChatEvent.KIND_RECOVERY
+        assert event.data['action'] == 'rolled_back'
+        assert event.data['previous_status'] == Chat.STATUS_THINKING
+
+    def test_stuck_stream_partial_reply_removed(self):
+        """A partial streamed reply left by a dead worker is dropped."""
+        chat = ChatFactory(
+            status=Chat.STATUS_THINKING,
+            messages=[
+                {'role': 'user', 'content': 'Hello'},
+                {'role': 'assistant', 'content': 'Hel', 'streaming': True},
+            ],
+        )
+        make_stale(chat)
+
+        recover_stuck_chats()
+
+        chat.refresh_from_db()
+        assert chat.status == Chat.STATUS_READY
+        assert chat.messages == [{'role': 'user', 'content': 'Hello'}]
+
+    def test_recent_transient_chat_untouched(self):
+        """Chats within their deadline are left alone."""
+        chat = ChatFactory(status=Chat.STATUS_THINKING)
+
+        summary = recover_stuck_chats()
+
+        chat.refresh_from_db()
+        assert chat.status == Chat.STATUS_THINKING
+        assert summary['rolled_back'] == 0
+
+    def test_stuck_help_clears_placeholder(self):
+        """A stuck help request is rolled back and its placeholder removed."""
+        chat = ChatFactory(
+            status=Chat.STATUS_GETTING_HELP,
+            help_responses=[
+                {'turn': 1, 'help_text': 'Earlier help', 'status': 'completed'},
+                {'turn': 2, 'help_text': '', 'status': 'processing'},
+            ],
+        )
+        make_stale(chat)
+
+        recover_stuck_chats()
+
+        chat.refresh_from_db()
+        assert chat.status == Chat.STATUS_READY
+        assert [h['status'] for h in chat.help_responses] == ['completed']
+
+    def test_stuck_grading_allows_retry(self):
+        """A stuck grading run returns to ready_for_grading with a failed marker."""
+        chat = ChatFactory(status=Chat.STATUS_GRADING)
+        make_stale(chat, minutes=120)
+
+        recover_stuck_chats()
+
+        chat.refresh_from_db()
+        assert chat.status == Chat.STATUS_READY_FOR_GRADING
+        assert chat.grading_data['status'] == 'failed'
+
+    def test_chat_with_queued_job_not_rolled_back(self):
+        """A chat whose job is still waiting for a worker is left alone."""
+        chat = ChatFactory(status=Chat.STATUS_IN_PROGRESS)
+        LLMJob.objects.create(chat=chat, kind=LLMJob.KIND_CHAT_MESSAGE)
+        make_stale(chat)
+
+        recover_stuck_chats()
+
+        chat.refresh_from_db()
+        assert chat.status == Chat.STATUS_IN_PROGRESS
+
+    def test_stale_running_job_requeued(self):
+        """A running job past its deadline is put back in the queue."""
+        chat = ChatFactory(status=Chat.STATUS_THINKING)
+        job = LLMJob.objects.create(
+            chat=chat,
+            kind=LLMJob.KIND_CHAT_MESSAGE,
+            status=LLMJob.STATUS_RUNNING,
+            attempts=1,
+            locked_by='dead-worker',
+            locked_at=timezone.now() - timedelta(hours=1),
+        )
+        make_stale(chat)
+
+        summary = recover_stuck_chats()
+
+        job.refresh_from_db()
+        assert job.status == LLMJob.STATUS_QUEUED
+        assert job.locked_by == ''
+        assert summary['requeued'] == 1
+        chat.refresh_from_db()
+        assert chat.status == Chat.STATUS_THINKING
+        assert ChatEvent.objects.get(chat=chat).data['action'] == 'requeued'
+
+    def test_exhausted_job_failed_and_chat_rolled_back(self, settings):
+        """After the last attempt the job fails and the chat is rolled back."""
+        settings.LLM_JOB_MAX_ATTEMPTS = 2
+        chat = ChatFactory(status=Chat.STATUS_GRADING)
+        job = LLMJob.objects.create(
+            chat=chat,
+            kind=LLMJob.KIND_GRADING,
+            status=LLMJob.STATUS_RUNNING,
+            attempts=2,
+            locked_at=timezone.now() - timedelta(hours=1),
+        )
+        make_stale(chat, minutes=120)
+
+        recover_stuck_chats()
+
+        job.refresh_from_db()
+        assert job.status == LLMJob.STATUS_FAILED
+        chat.refresh_from_db()
+        assert chat.status == Chat.STATUS_READY_FOR_GRADING
+
+    def test_command_reports_summary(self):
+        """manage.py recover_stuck_chats prints what it did."""
+        chat = ChatFactory(status=Chat.STATUS_THINKING)
+        make_stale(chat)
+        out = StringIO()
+
+        call_command('recover_stuck_chats', stdout=out)
+
+        assert 'Rolled back chats: 1' in out.getvalue()
+
+    def test_command_leaves_inline_dispatch_to_web_process(self, settings):
+        """In inline mode the command re-queues jobs without running them."""
+        settings.LLM_JOB_EXECUTION = 'inline'
+        chat = ChatFactory(status=Chat.STATUS_THINKING)
+        stale = LLMJob.objects.create(
+            chat=chat,
+            kind=LLMJob.KIND_CHAT_MESSAGE,
+            status=LLMJob.STATUS_RUNNING,
+            attempts=1,
+            locked_at=timezone.now() - timedelta(hours=1),
+        )
+        orphaned = LLMJob.objects.create(
+            chat=ChatFactory(status=Chat.STATUS_GETTING_HELP),
+            kind=LLMJob.KIND_HELP,
+            available_at=timezone.now() - timedelta(hours=1),
+        )
+
+        with patch('api.jobs.submit_task') as submit_task:
+            call_command('recover_stuck_chats', stdout=StringIO())
+
+        submit_task.assert_not_called()
+        stale.refresh_from_db()
+        assert stale.status == LLMJob.STATUS_QUEUED
+        orphaned.refresh_from_db()
+        assert orphaned.status == LLMJob.STATUS_QUEUED
+        assert not ChatEvent.objects.filter(data__action='redispatched').exists()
+
+
+@pytest.mark.django_db
+class TestJobRetention:
+    """Tests for deleting finished jobs in the recovery sweep."""
+
+    def finished_job(self, status, days_ago):
+        """A job that finished ``days_ago`` days ago with ``status``."""
+        return LLMJob.objects.create(
+            chat=ChatFactory(),
+            kind=LLMJob.KIND_CHAT_MESSAGE,
+            payload={'message': 'Private'},
+            status=status,
+            finished_at=timezone.now() - timedelta(days=days_ago),
+        )
+
+    def test_old_finished_jobs_deleted(self, settings):
+        """Done, failed and cancelled jobs past retention are removed."""
+        settings.LLM_JOB_RETENTION_DAYS = 7
+        old = [
+            self.finished_job(status, days_ago=8)
+            for status in (
+                LLMJob.STATUS_DONE,
+                LLMJob.STATUS_FAILED,
+                LLMJob.STATUS_CANCELLED,
+            )
+        ]
+        recent = self.finished_job(LLMJob.STATUS_DONE, days_ago=1)
+        queued = LLMJob.objects.create(
+            chat=ChatFactory(), kind=LLMJob.KIND_HELP, status=LLMJob.STATUS_QUEUED
+        )
+
+        with patch('api.jobs.JOB_PURGE_BATCH_SIZE', 2):
+            summary = recover_stuck_chats()
+
+        assert summary['purged_jobs'] == len(old)
+        assert set(LLMJob.objects.values_list('pk', flat=True)) == {
+            recent.pk,
+            queued.pk,
+        }
+
+    def test_zero_retention_keeps_jobs(self, settings):
+        """LLM_JOB_RETENTION_DAYS=0 turns the cleanup off."""
+        settings.LLM_JOB_RETENTION_DAYS = 0
+        job = self.finished_job(LLMJob.STATUS_DONE, days_ago=400)
+
+        assert recover_stuck_chats()['purged_jobs'] == 0
+        assert LLMJob.objects.filter(pk=job.pk).exists()
+
+
+@pytest.mark.django_db
+def test_requeued_message_not_duplicated():
+    """Re-running a chat message job does not store the user message twice."""
+    profile = UserProfileFactory(openwebui_token='test-token')
+    chat = ChatFactory(
+        user=profile.user,
+        status=Chat.STATUS_THINKING,
+        messages=[{'role': 'user', 'content': 'Hello'}],
+    )
+
+    with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+        mock_client = MagicMock()
+        mock_client.get_conversation_response.return_value = 'Hi!'
+        mock_client_class.return_value = mock_client
+
+        run_chat_message(chat.id, 'Hello', 'test-token')
+
+    chat.refresh_from_db()
+    assert [m['role'] for m in chat.messages] == ['user', 'assistant']
@@ -0,0 +1,117 @@
+"""Tests for the shared scenario catalog and the dedupe command."""
+
+import pytest
+from api.models import Chat, Scenario
+from api.scenarios import intern_scenario, scenario_data
+from api.utils import check_max_turns_not_exceeded
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .factories import ChatFactory
+
+
+SCENARIO = {
+    'resident': 'Mrs. Smith',
+    'must_disclose': ['allergy'],
+    'end_conditions': ['diagnosis'],
+    'max_turns': 2,
+}
+
+
+@pytest.mark.django_db
+class TestScenarioStore:
+    """Tests for intern_scenario and scenario_data."""
+
+    def test_same_content_shares_a_row(self):
+        """Scenarios equal up to key order map to one row."""
+        first = intern_scenario(SCENARIO)
+        second = intern_scenario(dict(reversed(SCENARIO.items())))
+
+        assert first.pk == second.pk
+        assert Scenario.objects.count() == 1
+        assert intern_scenario({**SCENARIO, 'max_turns': 3}).pk != first.pk
+
+    def test_no_scenario(self):
+        """Chats without course data get no row."""
+        assert intern_scenario(None) is None
+        assert Scenario.objects.count() == 0
+
+    def test_scenario_data_is_cached(self):
+        """After the first read the scenario comes from the per-process cache."""
+        scenario = intern_scenario(SCENARIO)
+        chat = ChatFactory(scenario=scenario, course_data=None, interaction_count=2)
+        assert scenario_data(chat) == SCENARIO
+
+        with CaptureQueriesContext(connection) as queries:
+            result = check_max_turns_not_exceeded(chat)
+
+        assert result is not None
+        assert len(queries) == 0
+
+    def test_falls_back_to_legacy_copy(self):
+        """Chats not yet deduplicated still read their own course_data."""
+        chat = ChatFactory(course_data=SCENARIO)
+        assert chat.scenario_id is None
+        assert scenario_data(chat) == SCENARIO
+
+
+@pytest.mark.django_db
+class TestScenarioApi:
+    """Chats created through the API reference shared scenarios."""
+
+    def test_create_chats_share_scenario(self, authenticated_client):
+        """Two chats from the same scenario store it once and return it as before."""
+        for title in ('First', 'Second'):
+            response = authenticated_client.post(
+                '/api/chats/',
+                {'title': title, 'course_data': SCENARIO, 'messages': []},
+                format='json',
+            )
+            assert response.status_code == 201
+            assert response.data['chat']['course_data'] == SCENARIO
+
+        assert Scenario.objects.count() == 1
+        assert set(Chat.objects.values_list('course_data', flat=True)) == {None}
+        assert Chat.objects.filter(scenario__isnull=False).count() == 2
+
+    def test_update_course_data(self, authenticated_client, user):
+        """Changing a chat's course data points it at another row."""
+        chat = ChatFactory(user=user, course_data=SCENARIO)
+        changed = {**SCENARIO, 'max_turns': 5}
+
+        response = authenticated_client.patch(
+            f'/api/chats/{chat.id}/', {'course_data': changed}, format='json'
+        )
+
+        assert response.status_code == 200
+        assert response.data['chat']['course_data'] == changed
+        chat.refresh_from_db()
+        assert chat.course_data is None
+        assert chat.scenario.data == changed
+
+
+@pytest.mark.django_db
+class TestDedupeScenariosCommand:
+    """Tests for the dedupe_scenarios command."""
+
+    def test_moves_copies_into_shared_rows(self):
+        """Identical copies end up on one row; other chats are left alone."""
+        chats = [ChatFactory(course_data=SCENARIO) for _ in range(3)]
+        other = ChatFactory(course_data={'max_turns': 4})
+        empty = ChatFactory(course_data=None)
+        updated_at = {c.pk: c.updated_at for c in chats}
+
+        call_command('dedupe_scenarios', '--batch-size=2')
+        call_command('dedupe_scenarios', '--batch-size=2')
+
+        assert Scenario.objects.count() == 2
+        for chat in chats:
+            chat.refresh_from_db()
+            assert chat.course_data is None
+            assert scenario_data(chat) == SCENARIO
+            assert chat.updated_at == updated_at[chat.pk]
+        other.refresh_from_db()
+        assert scenario_data(other) == {'max_turns': 4}
+        empty.refresh_from_db()
+        assert empty.scenario_id is None
@@ -0,0 +1,261 @@
+"""Tests for precomputing help speculatively after resident replies."""
+
+from unittest.mock import patch
+
+import pytest
+from api.background_tasks import run_help_precompute
+from api.jobs import run_job
+from api.models import Chat, HelpPrecomputeStats, LLMJob
+from api.speculative_help import speculative_help_totals
+from django.db.models import F
+
+from .factories import ChatFactory
+
+
+@pytest.fixture
+def speculative(settings):
+    """Turn speculative help on."""
+    settings.LLM_SPECULATIVE_HELP = True
+
+
+@pytest.fixture
+def answered_chat(user_with_profile):
+    """A chat whose latest message is a resident reply."""
+    return ChatFactory(
+        user=user_with_profile,
+        messages=[
+            {'role': 'user', 'content': 'Hello'},
+            {'role': 'assistant', 'content': 'Hi there!'},
+        ],
+        interaction_count=1,
+        assistant_message_count=1,
+    )
+
+
+def precompute(chat, help_text='Ask about their day'):
+    """Run a help precompute job for the chat's current version."""
+    with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+        mock_client = mock_client_class.return_value
+        mock_client.get_help_response.return_value = help_text
+        run_help_precompute(chat.id, 'test-token', chat.version)
+    return mock_client
+
+
+def queue_precompute(chat):
+    """Add a queued help precompute job for the chat."""
+    return LLMJob.objects.create(
+        chat=chat,
+        kind=LLMJob.KIND_HELP_PRECOMPUTE,
+        payload={'version': chat.version},
+        priority=LLMJob.PRIORITY_LOW,
+    )
+
+
+@pytest.mark.django_db
+class TestPrecompute:
+    """Tests for queueing and running help precompute jobs."""
+
+    def test_reply_queues_low_priority_precompute(self, speculative, answered_chat):
+        """A resident reply queues a precompute for the chat's new version."""
+        job = LLMJob.objects.create(
+            chat=answered_chat,
+            kind=LLMJob.KIND_CHAT_MESSAGE,
+            payload={'message': 'How are you?'},
+        )
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client_class.return_value.get_conversation_response.return_value = (
+                'Fine'
+            )
+            run_job(job)
+
+        answered_chat.refresh_from_db()
+        precomputes = LLMJob.objects.filter(kind=LLMJob.KIND_HELP_PRECOMPUTE)
+        assert precomputes.get().priority == LLMJob.PRIORITY_LOW
+        assert precomputes.get().payload == {'version': answered_chat.version}
+
+    def test_failed_turn_queues_nothing(self, speculative, answered_chat):
+        """No precompute is queued when the resident reply failed."""
+        job = LLMJob.objects.create(
+            chat=answered_chat,
+            kind=LLMJob.KIND_CHAT_MESSAGE,
+            payload={'message': 'How are you?'},
+        )
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client_class.return_value.get_conversation_response.side_effect = (
+                RuntimeError('timeout')
+            )
+            run_job(job)
+
+        assert not LLMJob.objects.filter(kind=LLMJob.KIND_HELP_PRECOMPUTE).exists()
+
+    def test_off_by_default(self, answered_chat):
+        """Without LLM_SPECULATIVE_HELP nothing is precomputed."""
+        job = LLMJob.objects.create(
+            chat=answered_chat,
+            kind=LLMJob.KIND_CHAT_MESSAGE,
+            payload={'message': 'How are you?'},
+        )
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client_class.return_value.get_conversation_response.return_value = (
+                'Fine'
+            )
+            run_job(job)
+
+        assert not LLMJob.objects.filter(kind=LLMJob.KIND_HELP_PRECOMPUTE).exists()
+
+    def test_help_stored_without_new_version(
+        self, answered_chat, authenticated_client_with_profile
+    ):
+        """The help is saved on the chat, invisibly to clients."""
+        version = answered_chat.version
+
+        precompute(answered_chat)
+
+        answered_chat.refresh_from_db()
+        assert answered_chat.speculative_help == 'Ask about their day'
+        assert answered_chat.speculative_help_version == version
+        assert answered_chat.version == version
+        response = authenticated_client_with_profile.get(
+            f'/api/chats/{answered_chat.id}/'
+        )
+        assert 'Ask about their day' not in str(response.data)
+        assert speculative_help_totals()['precomputed'] == 1
+
+    def test_dropped_if_chat_moved_on(self, answered_chat):
+        """A job for an older version makes no LLM call."""
+        Chat.objects.filter(pk=answered_chat.pk).update(version=F('version') + 1)
+
+        mock_client = precompute(answered_chat)
+
+        mock_client.get_help_response.assert_not_called()
+        assert speculative_help_totals()['cancelled'] == 1
+
+    def test_unanswered_turn_skipped(self, user_with_profile):
+        """Nothing is precomputed if the last message wasn't answered."""
+        chat = ChatFactory(
+            user=user_with_profile, messages=[{'role': 'user', 'content': 'Hello'}]
+        )
+
+        mock_client = precompute(chat)
+
+        mock_client.get_help_response.assert_not_called()
+
+    def test_result_discarded_if_chat_changes_during_call(self, answered_chat):
+        """Help computed for a version the chat has left is thrown away."""
+
+        def learner_sends_message(messages):
+            Chat.objects.filter(pk=answered_chat.pk).update(version=F('version') + 1)
+            return 'Too late'
+
+        with patch('api.background_tasks.OpenWebUIClient') as mock_client_class:
+            mock_client = mock_client_class.return_value
+            mock_client.get_help_response.side_effect = learner_sends_message
+            run_help_precompute(answered_chat.id, 'test-token', answered_chat.version)
+
+        answered_chat.refresh_from_db()
+        assert answered_chat.speculative_help == ''
+        totals = speculative_help_totals()
+        assert totals['precomputed'] == 1
+        assert totals['wasted_call_rate'] == 1.0
+
+
+@pytest.mark.django_db
+class TestServingPrecomputedHelp:
+    """Tests for answering help requests from precomputed help."""
+
+    def test_get_help_answers_at_once(
+        self, speculative, answered_chat, authenticated_client_with_profile
+    ):
+        """Precomputed help for the current version is returned directly."""
+        precompute(answered_chat)
+
+        response = authenticated_client_with_profile.post(
+            f'/api/chats/{answered_chat.id}/get-help/', {}, format='json'
+        )
+
+        assert response.status_code == 200
+        assert response.data['help_text'] == 'Ask about their day'
+        assert response.data['processing'] is False
+        assert not LLMJob.objects.filter(kind=LLMJob.KIND_HELP).exists()
+        answered_chat.refresh_from_db()
+        assert answered_chat.help_responses[-1]['status'] == 'completed'
+        assert answered_chat.help_responses[-1]['turn'] == 1
+        assert answered_chat.help_response_count == 1
+        assert answered_chat.speculative_help == ''
+        totals = speculative_help_totals()
+        assert totals['hit_rate'] == 1.0
+        assert totals['wasted_call_rate'] == 0.0
+
+    def test_stale_help_not_served(
+        self, speculative, answered_chat, authenticated_client_with_profile
+    ):
+        """After the chat changes, help is requested as usual."""
+        precompute(answered_chat)
+        Chat.objects.filter(pk=answered_chat.pk).update(version=F('version') + 1)
+        queued = queue_precompute(Chat.objects.get(pk=answered_chat.pk))
+
+        response = authenticated_client_with_profile.post(
+            f'/api/chats/{answered_chat.id}/get-help/', {}, format='json'
+        )
+
+        assert response.status_code == 202
+        assert LLMJob.objects.filter(kind=LLMJob.KIND_HELP).exists()
+        queued.refresh_from_db()
+        assert queued.status == LLMJob.STATUS_CANCELLED
+        totals = speculative_help_totals()
+        assert totals['help_requests'] == 1
+        assert totals['hit_rate'] == 0.0
+
+    def test_not_served_when_off(
+        self, answered_chat, authenticated_client_with_profile
+    ):
+        """Turning the setting off stops serving stored help."""
+        precompute(answered_chat)
+
+        response = authenticated_client_with_profile.post(
+            f'/api/chats/{answered_chat.id}/get-help/', {}, format='json'
+        )
+
+        assert response.status_code == 202
+
+    def test_sending_message_cancels_queued_precompute(
+        self, answered_chat, authenticated_client_with_profile
+    ):
+        """A new message cancels the chat's queued precompute jobs."""
+        queued = queue_precompute(answered_chat)
+
+        response = authenticated_client_with_profile.post(
+            f'/api/chats/{answered_chat.id}/send-message/',
+            {'message': 'Next'},
+            format='json',
+        )
+
+        assert response.status_code == 202
+        queued.refresh_from_db()
+        assert queued.status == LLMJob.STATUS_CANCELLED
+        assert HelpPrecomputeStats.objects.get().cancelled == 1
+
+
+@pytest.mark.django_db
+def test_queue_stats_report_speculative_help(staff_client):
+    """Staff queue stats include the precompute outcomes and rates."""
+    HelpPrecomputeStats.objects.create(
+        day='2026-10-16', help_requests=4, served=1, precomputed=2
+    )
+    HelpPrecomputeStats.objects.create(
+        day='2026-10-17', help_requests=4, served=1, precomputed=2, cancelled=3
+    )
+
+    response = staff_client.get('/api/llm/queue/stats/')
+
+    assert response.data['speculative_help'] == {
+        'help_requests': 8,
+        'served': 2,
+        'precomputed': 4,
+        'cancelled': 3,
+        'hit_rate': 0.25,
+        'wasted_call_rate': 0.5,
+    }
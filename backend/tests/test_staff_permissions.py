@@ -121,6 +121,20 @@ class TestUserChatsView:
         # Response includes user info
         assert response.data['user']['username'] == 'target'
 
+    def test_user_chats_query_count_is_constant(
+        self, staff_client, django_assert_num_queries
+    ):
+        """Listing a user's chats does not run a query per chat."""
+        target_user = UserFactory()
+        ChatFactory.create_batch(15, user=target_user)
+
+        # auth user lookup + target user + count + page
+        with django_assert_num_queries(4):
+            response = staff_client.get(f'/api/users/{target_user.id}/chats/')
+
+        assert len(response.data['items']) == 10
+        assert 'messages' not in response.data['items'][0]
+
     def test_user_chats_user_not_found(self, staff_client):
         """Staff gets 404 for non-existent user."""
         response = staff_client.get('/api/users/99999/chats/')
@@ -0,0 +1,162 @@
+"""Tests for the bounded LLM worker pool and queue-full handling in views."""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+from api.models import Chat
+from api.task_queue import BoundedTaskExecutor, TaskQueueFullError
+
+from .factories import ChatFactory
+
+
+class TestBoundedTaskExecutor:
+    """Tests for BoundedTaskExecutor."""
+
+    def test_runs_submitted_task(self):
+        """Submitted callables run on a worker thread."""
+        executor = BoundedTaskExecutor(max_workers=2, max_queue_size=5)
+        done = threading.Event()
+        result = []
+
+        def task(value):
+            result.append(value)
+            done.set()
+
+        executor.submit(task, 42)
+
+        assert done.wait(timeout=5)
+        assert result == [42]
+
+    def test_rejects_when_queue_full(self):
+        """Submitting beyond queue capacity raises TaskQueueFullError."""
+        executor = BoundedTaskExecutor(max_workers=1, max_queue_size=1, retry_after=7)
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking_task():
+            started.set()
+            release.wait(timeout=5)
+
+        executor.submit(blocking_task)
+        assert started.wait(timeout=5)
+        executor.submit(blocking_task)  # Fills the single queue slot
+
+        with pytest.raises(TaskQueueFullError) as exc_info:
+            executor.submit(blocking_task)
+
+        assert exc_info.value.retry_after == 7
+        stats = executor.stats()
+        assert stats['active_workers'] == 1
+        assert stats['queue_depth'] == 1
+        assert stats['rejected'] == 1
+        release.set()
+
+    def test_failed_task_does_not_kill_worker(self):
+        """A task that raises is counted and the worker keeps running."""
+        executor = BoundedTaskExecutor(max_workers=1, max_queue_size=5)
+        done = threading.Event()
+
+        def failing_task():
+            raise ValueError('boom')
+
+        executor.submit(failing_task)
+        executor.submit(done.set)
+
+        assert done.wait(timeout=5)
+        executor.join()
+        assert executor.stats()['failed'] == 1
+        assert executor.stats()['completed'] == 1
+
+
+@pytest.mark.django_db
+class TestQueueFullResponses:
+    """LLM endpoints return 503 with a retry hint when the pool is saturated."""
+
+    def test_send_message_queue_full_returns_503(
+        self, authenticated_client_with_profile, user_with_profile
+    ):
+        """Send message returns 503 and restores the previous chat status."""
+        chat = ChatFactory(user=user_with_profile, status=Chat.STATUS_READY)
+
+        with patch(
+            'api.views.chat_operations_views.enqueue_job',
+            side_effect=TaskQueueFullError(retry_after=9),
+        ):
+            response = authenticated_client_with_profile.post(
+                f'/api/chats/{chat.id}/send-message/',
+                {'message': 'Hello'},
+                format='json',
+            )
+
+        assert response.status_code == 503
+        assert response.data['error_code'] == 'QUEUE_FULL'
+        assert response.data['retry_after'] == 9
+        assert response['Retry-After'] == '9'
+        chat.refresh_from_db()
+        assert chat.status == Chat.STATUS_READY
+
+    def test_get_help_queue_full_removes_placeholder(
+        self, authenticated_client_with_profile, user_with_profile
+    ):
+        """Get help returns 503 and does not leave a processing placeholder."""
+        chat = ChatFactory(
+            user=user_with_profile,
+            messages=[
+                {'role': 'user', 'content': 'Hello'},
+                {'role': 'assistant', 'content': 'Hi'},
+            ],
+        )
+
+        with patch(
+            'api.views.chat_operations_views.enqueue_job',
+            side_effect=TaskQueueFullError(retry_after=5),
+        ):
+            response = authenticated_client_with_profile.post(
+                f'/api/chats/{chat.id}/get-help/',
+            )
+
+        assert response.status_code == 503
+        chat.refresh_from_db()
+        assert chat.help_responses == []
+
+    def test_grade_queue_full_restores_status(
+        self, authenticated_client_with_profile, user_with_profile
+    ):
+        """Grade returns 503 and the chat is not left in grading status."""
+        chat = ChatFactory(
+            user=user_with_profile,
+            status=Chat.STATUS_READY_FOR_GRADING,
+            messages=[{'role': 'user', 'content': 'Hello'}],
+        )
+
+        with patch(
+            'api.views.chat_operations_views.enqueue_job',
+            side_effect=TaskQueueFullError(retry_after=5),
+        ):
+            response = authenticated_client_with_profile.post(
+                f'/api/chats/{chat.id}/grade/',
+            )
+
+        assert response.status_code == 503
+        chat.refresh_from_db()
+        assert chat.status == Chat.STATUS_READY_FOR_GRADING
+
+
+@pytest.mark.django_db
+class TestQueueStatsView:
+    """Tests for GET /api/llm/queue/stats/."""
+
+    def test_staff_can_view_stats(self, staff_client):
+        """Staff users see queue depth and worker counts."""
+        response = staff_client.get('/api/llm/queue/stats/')
+
+        assert response.status_code == 200
+        assert 'queue_depth' in response.data['queue']
+        assert 'active_workers' in response.data['queue']
+
+    def test_non_staff_forbidden(self, authenticated_client):
+        """Regular users cannot view queue stats."""
+        response = authenticated_client.get('/api/llm/queue/stats/')
+
+        assert response.status_code == 403
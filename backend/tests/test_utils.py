@@ -1,15 +1,22 @@
 """Tests for API utility functions."""
 
+from datetime import timedelta
+
 import pytest
-from api.models import Chat
+from api.models import Chat, ChatMessage
 from api.utils import (
     check_chat_not_completed,
     check_max_turns_not_exceeded,
     format_conversation_for_llm,
     get_openwebui_token,
     get_pagination_data,
+    paginate_queryset,
 )
 from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APIRequestFactory
 
 
@@ -123,6 +130,97 @@ class TestGetPaginationData:
 
         assert result['page_size'] == 10
 
+    def test_page_size_is_capped(self, factory, settings):
+        """Test page size is clamped to API_MAX_PAGE_SIZE."""
+        settings.API_MAX_PAGE_SIZE = 50
+        request = factory.get('/?page_size=100000')
+        result = get_pagination_data(request, 100)
+
+        assert result['page_size'] == 50
+        assert result['end_index'] == 50
+
+
+@pytest.mark.django_db
+class TestPaginateQueryset:
+    """Tests for paginate_queryset utility."""
+
+    ORDERING = ('-updated_at', '-id')
+
+    @pytest.fixture
+    def chats(self, user):
+        """Seven chats, five of which share an updated_at timestamp."""
+        chats = [Chat.objects.create(user=user, title=f'Chat {i}') for i in range(7)]
+        tied = timezone.now() - timedelta(hours=1)
+        Chat.objects.filter(pk__in=[c.pk for c in chats[:5]]).update(updated_at=tied)
+        return Chat.objects.filter(user=user)
+
+    def test_without_cursor_uses_page_numbers(self, factory, chats):
+        """Test the original response shape is kept when no cursor is sent."""
+        request = factory.get('/?page=2&page_size=3')
+        rows, pagination = paginate_queryset(request, chats, self.ORDERING)
+
+        assert len(rows) == 3
+        assert pagination['page'] == 2
+        assert pagination['total_items'] == 7
+
+    def test_cursor_walks_every_row_once(self, factory, chats):
+        """Test following next_cursor visits each row once, in order."""
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            request = factory.get('/', {'cursor': cursor, 'page_size': 2})
+            rows, pagination = paginate_queryset(request, chats, self.ORDERING)
+            seen += [row.pk for row in rows]
+            assert pagination['has_more'] == (pagination['next_cursor'] is not None)
+            cursor = pagination['next_cursor']
+
+        expected = list(chats.order_by(*self.ORDERING).values_list('pk', flat=True))
+        assert seen == expected
+
+    def test_cursor_total_is_optional(self, factory, chats):
+        """Test the count is only run when include_total is set."""
+        request = factory.get('/?cursor=')
+        _, pagination = paginate_queryset(request, chats, self.ORDERING)
+        assert pagination['total_items'] is None
+
+        request = factory.get('/?cursor=&include_total=true')
+        _, pagination = paginate_queryset(request, chats, self.ORDERING)
+        assert pagination['total_items'] == 7
+
+    def test_invalid_cursor_starts_from_first_page(self, factory, chats):
+        """Test an unreadable cursor falls back to the first page."""
+        first, _ = paginate_queryset(
+            factory.get('/?cursor=&page_size=3'), chats, self.ORDERING
+        )
+        for cursor in ('not-base64!', 'WzFd', 'WyJ4IiwgInkiXQ=='):
+            rows, _ = paginate_queryset(
+                factory.get('/', {'cursor': cursor, 'page_size': 3}),
+                chats,
+                self.ORDERING,
+            )
+            assert [r.pk for r in rows] == [r.pk for r in first]
+
+    def test_cursor_over_grouped_annotation(self, factory, chats):
+        """Test cursors also key on annotations of a .values() queryset."""
+        for i, chat in enumerate(chats.order_by('pk')):
+            ChatMessage.objects.bulk_create(
+                ChatMessage(chat=chat, seq=seq, role='user', content='Hi')
+                for seq in range(i % 3 + 1)
+            )
+        grouped = ChatMessage.objects.values('chat_id').annotate(n=Count('id'))
+        ordering = ('-n', '-chat_id')
+
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            request = factory.get('/', {'cursor': cursor, 'page_size': 2})
+            rows, pagination = paginate_queryset(request, grouped, ordering)
+            seen += [(row['n'], row['chat_id']) for row in rows]
+            cursor = pagination['next_cursor']
+
+        assert seen == sorted(seen, reverse=True)
+        assert len(seen) == 7
+
 
 class TestCheckChatNotCompleted:
     """Tests for check_chat_not_completed utility."""
@@ -172,7 +270,7 @@ class TestCheckMaxTurnsNotExceeded:
     def test_under_max_turns_returns_none(self, chat):
         """Test that chat under max turns returns None."""
         chat.course_data = {'max_turns': 10}
-        chat.messages = [{'role': 'user', 'content': 'Hello'}]
+        chat.interaction_count = 1
         chat.save()
 
         result = check_max_turns_not_exceeded(chat)
@@ -181,11 +279,7 @@ class TestCheckMaxTurnsNotExceeded:
     def test_at_max_turns_returns_error(self, chat):
         """Test that chat at max turns returns error."""
         chat.course_data = {'max_turns': 2}
-        chat.messages = [
-            {'role': 'user', 'content': 'Hello'},
-            {'role': 'assistant', 'content': 'Hi'},
-            {'role': 'user', 'content': 'How are you?'},
-        ]
+        chat.interaction_count = 2
         chat.save()
 
         result = check_max_turns_not_exceeded(chat)
@@ -193,6 +287,19 @@ class TestCheckMaxTurnsNotExceeded:
         assert result.status_code == 400
         assert 'Maximum turns' in result.data['message']
 
+    def test_does_not_read_messages(self, chat):
+        """The turn counter is used; the transcript is never loaded."""
+        chat.course_data = {'max_turns': 2}
+        chat.interaction_count = 2
+        chat.save()
+        chat = Chat.objects.defer('messages').get(pk=chat.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = check_max_turns_not_exceeded(chat)
+
+        assert result is not None
+        assert len(queries) == 0
+
     def test_no_course_data_returns_none(self, chat):
         """Test that chat without course_data returns None."""
         chat.course_data = None
@@ -1,8 +1,11 @@
 import { Box, Grid } from "@mui/material";
-import { useSendMessageMutation, useGetChatQuery } from "../../services/Chat.api.ts";
+import { useSendMessageMutation, useGetChatQuery, useGetChatStatusQuery } from "../../services/Chat.api.ts";
 import { useEffect, useState } from "react";
 import Conversation from "../../components/conversation/Conversation.tsx";
 import usePreferences from "../../utils/usePreferences.ts";
+import useChatEvents from "../../utils/useChatEvents.ts";
+import syncChatDelta from "../../utils/syncChatDelta.ts";
+import { useAppDispatch } from "../../store/store.ts";
 import { useParams } from "react-router-dom";
 import TutorDialogModal from "../../components/tutor-dialog-modal/TutorDialogModal.tsx";
 import GradingResultsModal from "../../components/grading-results-modal/GradingResultsModal.tsx";
@@ -40,12 +43,24 @@ const ChatPage = () => {
     const chatStatus = initialChatData?.chat?.status;
     const isProcessing = chatStatus === 'thinking' || chatStatus === 'in_progress' || chatStatus === 'grading' || chatStatus === 'getting_help';
 
-    // Poll for updates ONLY when processing
+    // Push updates over server-sent events while processing
+    const isPushConnected = useChatEvents(djangoChatId, isProcessing);
     const { data: chatQueryData } = useGetChatQuery(djangoChatId!, {
         skip: !djangoChatId,
-        pollingInterval: isProcessing ? 2000 : 0,
     });
 
+    // If the stream is unavailable, poll the lightweight status endpoint and
+    // only fetch what changed when its version moves
+    const dispatch = useAppDispatch();
+    const { data: chatStatusData } = useGetChatStatusQuery(djangoChatId!, {
+        skip: !djangoChatId || !isProcessing || isPushConnected,
+        pollingInterval: 2000,
+    });
+    const polledVersion = chatStatusData?.chat?.version;
+    useEffect(() => {
+        if (polledVersion && djangoChatId) void dispatch(syncChatDelta(djangoChatId));
+    }, [polledVersion, djangoChatId, dispatch]);
+
     // Use the polled data if available, otherwise use initial data
     const activeChatData = chatQueryData || initialChatData;
 
@@ -62,6 +77,10 @@ const ChatPage = () => {
     const isComplete = activeChatData?.chat?.completed || activeStatus === 'complete';
     const isGraded = !!activeChatData?.chat?.grading_data && !('error' in activeChatData.chat.grading_data);
 
+    // Once a streamed reply starts arriving, show it instead of the loading overlay
+    const lastMessage = activeChatData?.chat?.messages?.at(-1);
+    const isStreamingReply = activeStatus === 'thinking' && !!lastMessage?.streaming;
+
     // Get loading message based on status
     const getLoadingMessage = () => {
         if (activeStatus === 'thinking') return 'AI is thinking...';
@@ -294,7 +313,7 @@ const ChatPage = () => {
                 message={chatData.intro}
             />
 
-            <LoadingOverlay open={isProcessing} message={getLoadingMessage()} />
+            <LoadingOverlay open={isProcessing && !isStreamingReply} message={getLoadingMessage()} />
         </Grid>
     );
 };
@@ -6,6 +6,7 @@ export interface ChatMessage {
   role: 'user' | 'assistant' | 'system' | 'scenario';
   content: string;
   timestamp?: string;
+  streaming?: boolean;  // Partial resident reply still being generated
 }
 
 export interface Chat {
@@ -28,11 +29,59 @@ export interface Chat {
     status?: 'processing' | 'completed' | 'error';
   }>;
   interaction_count: number;
+  assistant_message_count: number;
+  help_response_count: number;
   completed: boolean;
   status: 'ready' | 'in_progress' | 'thinking' | 'getting_help' | 'ready_for_grading' | 'grading' | 'complete';
   created_at: string;
   updated_at: string;
   openwebui_chat_id: string | null;
+  version: string;  // Send back as If-Match on updates to detect conflicts
+}
+
+// List endpoints return summaries without the transcript or JSON blobs
+export type ChatSummary = Pick<
+  Chat,
+  | 'id'
+  | 'user'
+  | 'title'
+  | 'status'
+  | 'avatar_id'
+  | 'score'
+  | 'interaction_count'
+  | 'assistant_message_count'
+  | 'help_response_count'
+  | 'completed'
+  | 'created_at'
+  | 'updated_at'
+  | 'openwebui_chat_id'
+>;
+
+export interface ChatStatus {
+  id: number;
+  status: Chat['status'];
+  interaction_count: number;
+  message_count: number;
+  help_count: number;
+  help_status: 'processing' | 'completed' | 'error' | null;
+  completed: boolean;
+  version: string;
+}
+
+export interface ChatDelta {
+  id: number;
+  status: Chat['status'];
+  interaction_count: number;
+  completed: boolean;
+  score: number | null;
+  updated_at: string;
+  version: string;
+  message_count: number;
+  since: number;
+  messages: ChatMessage[];
+  help_count: number;
+  help_since: number;
+  help_responses: Chat['help_responses'];
 }
 
 export interface ChatCreateRequest {
@@ -54,10 +103,10 @@ export interface ChatUpdateRequest {
   openwebui_chat_id?: string;
 }
 
-const chatApi = api.injectEndpoints({
+export const chatApi = api.injectEndpoints({
   endpoints: (builder) => ({
     // List all chats
-    getChats: builder.query<PaginatedResponse<Chat>, { page?: number; page_size?: number }>({
+    getChats: builder.query<PaginatedResponse<ChatSummary>, { page?: number; page_size?: number }>({
       query: ({ page = 1, page_size = 20 } = {}) => ({
         url: `/chats/`,
         params: { page, page_size },
@@ -77,6 +126,19 @@ const chatApi = api.injectEndpoints({
       providesTags: (_result, _error, id) => [{ type: 'Chat', id }],
     }),
 
+    // Get a chat's lightweight status (supports ETag/304 revalidation)
+    getChatStatus: builder.query<{ status: string; chat: ChatStatus }, number>({
+      query: (id) => `/chats/${id}/status/`,
+    }),
+
+    // Get only the messages and help responses after the client's copy
+    getChatDelta: builder.query<{ status: string; chat: ChatDelta }, { id: number; since: number; helpSince: number }>({
+      query: ({ id, since, helpSince }) => ({
+        url: `/chats/${id}/`,
+        params: { since, help_since: helpSince },
+      }),
+    }),
+
     // Create a new chat
     createChat: builder.mutation<{ status: string; message: string; chat: Chat }, ChatCreateRequest>({
       query: (chatData) => ({
@@ -172,7 +234,7 @@ const chatApi = api.injectEndpoints({
 
     // Get chats for a specific user (staff only)
     getUserChats: builder.query<
-      PaginatedResponse<Chat> & { user: { id: number; username: string; email: string } },
+      PaginatedResponse<ChatSummary> & { user: { id: number; username: string; email: string } },
       { userId: number; page?: number; page_size?: number }
     >({
       query: ({ userId, page = 1, page_size = 100 }) => ({
@@ -194,6 +256,7 @@ const chatApi = api.injectEndpoints({
 export const {
   useGetChatsQuery,
   useGetChatQuery,
+  useGetChatStatusQuery,
   useCreateChatMutation,
   useUpdateChatMutation,
   usePatchChatMutation,
@@ -41,6 +41,33 @@ export interface PaginatedResponse<T> {
   items: T[];
 }
 
+/**
+ * Cursor-mode paginated response, returned when a list endpoint is called
+ * with a `cursor` parameter (empty for the first page).
+ *
+ * Pass `next_cursor` back as `cursor` to get the next page. `total_items`
+ * is only filled in when `include_total=true` is sent.
+ *
+ * @template T - The type of items in the paginated response
+ */
+export interface CursorPaginatedResponse<T> {
+  /** Status of the response (usually "success") */
+  status: string;
+  /** Pagination metadata */
+  pagination: {
+    /** Number of items per page (capped by the server) */
+    page_size: number;
+    /** Cursor for the next page, or null if on last page */
+    next_cursor: string | null;
+    /** Whether there are more items after this page */
+    has_more: boolean;
+    /** Total number of items, or null unless requested */
+    total_items: number | null;
+  };
+  /** Array of items for the current page */
+  items: T[];
+}
+
 /**
  * Standard API error response structure.
  *
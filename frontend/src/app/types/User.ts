@@ -11,4 +11,7 @@ export interface UserData {
     last_name: string;
     is_staff: boolean;
     chat_count?: number;
+    completed_count?: number;
+    average_score?: number | null;
+    latest_score?: number | null;
 }
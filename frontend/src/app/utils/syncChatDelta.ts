@@ -0,0 +1,50 @@
+import { chatApi } from "../services/Chat.api.ts";
+import type { AppDispatch, RootState } from "../store/store.ts";
+
+/**
+ * Bring the cached getChat entry up to date by fetching only what changed
+ * since the cached copy, instead of re-downloading the whole chat.
+ *
+ * A trailing streaming message or processing help placeholder is not
+ * counted, because the server replaces those in place.
+ */
+const syncChatDelta = (chatId: number) => async (dispatch: AppDispatch, getState: () => RootState) => {
+    const cached = chatApi.endpoints.getChat.select(chatId)(getState()).data?.chat;
+    if (!cached) {
+        await dispatch(chatApi.endpoints.getChat.initiate(chatId, { forceRefetch: true }));
+        return;
+    }
+
+    const since = cached.messages.filter(m => !m.streaming).length;
+    const helpSince = cached.help_responses.filter(h => h.status !== 'processing').length;
+    const result = await dispatch(chatApi.endpoints.getChatDelta.initiate(
+        { id: chatId, since, helpSince },
+        { forceRefetch: true, subscribe: false },
+    ));
+    const delta = result.data?.chat;
+    if (!delta) return;
+
+    if (delta.message_count < since || delta.help_count < helpSince) {
+        // Our copy is ahead of the server (e.g. history was edited): start over
+        await dispatch(chatApi.endpoints.getChat.initiate(chatId, { forceRefetch: true }));
+        return;
+    }
+
+    dispatch(chatApi.util.updateQueryData('getChat', chatId, (draft) => {
+        const chat = draft.chat;
+        chat.messages.splice(delta.since, chat.messages.length, ...delta.messages);
+        chat.help_responses.splice(delta.help_since, chat.help_responses.length, ...delta.help_responses);
+        chat.status = delta.status;
+        chat.interaction_count = delta.interaction_count;
+        chat.completed = delta.completed;
+        chat.score = delta.score;
+        chat.updated_at = delta.updated_at;
+    }));
+
+    // Grading reports are not part of the delta; fetch the chat once when grading ends
+    if (delta.status === 'complete' && cached.status !== 'complete') {
+        await dispatch(chatApi.endpoints.getChat.initiate(chatId, { forceRefetch: true }));
+    }
+};
+
+export default syncChatDelta;
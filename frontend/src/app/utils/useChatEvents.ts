@@ -0,0 +1,140 @@
+import { useEffect, useState } from "react";
+import { getApiToken } from "../store/preferences.slice.ts";
+import { useAppDispatch, useTypedSelector } from "../store/store.ts";
+import { chatApi } from "../services/Chat.api.ts";
+import type { ChatMessage } from "../services/Chat.api.ts";
+import { logger } from "./logger";
+import syncChatDelta from "./syncChatDelta.ts";
+
+const EVENTS_BASE_URL = (import.meta.env.VITE_API_BASE_URL || window.location.origin) + "/api";
+const RETRY_AFTER_FAILURE_MS = 10000;
+
+type ChatEventData = {
+    status?: string;
+    interaction_count?: number;
+    updated_at?: string;
+    index?: number;
+    message?: ChatMessage;
+    content?: string;
+    help_response?: { turn: number; timestamp: string; help_text: string; status?: 'processing' | 'completed' | 'error' };
+};
+
+/**
+ * Subscribe to a chat's server-sent event stream while `enabled` and apply
+ * the pushed deltas to the cached getChat query.
+ *
+ * Uses fetch rather than EventSource so the JWT can be sent in the
+ * Authorization header. Returns whether the stream is connected; callers
+ * should fall back to polling when it is not.
+ */
+const useChatEvents = (chatId: number | null, enabled: boolean) => {
+    const dispatch = useAppDispatch();
+    const token = useTypedSelector(getApiToken);
+    const [connected, setConnected] = useState(false);
+
+    useEffect(() => {
+        if (!chatId || !enabled || !token) return;
+
+        const controller = new AbortController();
+        let retryTimer: ReturnType<typeof setTimeout> | undefined;
+
+        // Fetch only what changed since the cached copy
+        const refetch = () => {
+            void dispatch(syncChatDelta(chatId));
+        };
+
+        const applyEvent = (event: string, data: ChatEventData) => {
+            if (event === 'sync') {
+                // Too big to push (or we fell behind): fetch the changes instead
+                refetch();
+                return;
+            }
+            if (event === 'grading') {
+                // Grading reports are not pushed; fetch the full chat once
+                dispatch(chatApi.util.invalidateTags([{ type: 'Chat', id: chatId }]));
+                return;
+            }
+            if (event === 'snapshot') {
+                let missedUpdates = false;
+                dispatch(chatApi.util.updateQueryData('getChat', chatId, (draft) => {
+                    missedUpdates = draft.chat.updated_at !== data.updated_at;
+                }));
+                if (missedUpdates) refetch();
+                return;
+            }
+            dispatch(chatApi.util.updateQueryData('getChat', chatId, (draft) => {
+                const chat = draft.chat;
+                if (event === 'status' && data.status) {
+                    chat.status = data.status as typeof chat.status;
+                    if (data.interaction_count !== undefined) chat.interaction_count = data.interaction_count;
+                } else if (event === 'message' && data.index !== undefined && data.message) {
+                    chat.messages.splice(data.index, chat.messages.length, data.message);
+                } else if (event === 'partial' && data.index !== undefined) {
+                    chat.messages.splice(data.index, chat.messages.length, {
+                        role: 'assistant',
+                        content: data.content ?? '',
+                        streaming: true,
+                    });
+                } else if (event === 'help' && data.index !== undefined && data.help_response) {
+                    chat.help_responses.splice(data.index, chat.help_responses.length, data.help_response);
+                }
+            }));
+        };
+
+        const handleFrame = (frame: string) => {
+            let event = 'message';
+            let data = '';
+            for (const line of frame.split('\n')) {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            }
+            if (data) applyEvent(event, JSON.parse(data) as ChatEventData);
+        };
+
+        const connect = async () => {
+            try {
+                const response = await fetch(`${EVENTS_BASE_URL}/chats/${chatId}/events/`, {
+                    headers: { Authorization: `Bearer ${token}`, Accept: 'text/event-stream' },
+                    signal: controller.signal,
+                });
+                if (!response.ok || !response.body) {
+                    throw new Error(`Chat event stream failed with status ${response.status}`);
+                }
+                setConnected(true);
+
+                const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+                let buffer = '';
+                for (;;) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += value;
+                    let boundary = buffer.indexOf('\n\n');
+                    while (boundary !== -1) {
+                        handleFrame(buffer.slice(0, boundary));
+                        buffer = buffer.slice(boundary + 2);
+                        boundary = buffer.indexOf('\n\n');
+                    }
+                }
+                // The server closes streams after a while; reconnect straight away
+                retryTimer = setTimeout(connect, 0);
+            } catch (e) {
+                if (controller.signal.aborted) return;
+                logger.warn('Chat event stream unavailable, falling back to polling', e);
+                setConnected(false);
+                retryTimer = setTimeout(connect, RETRY_AFTER_FAILURE_MS);
+            }
+        };
+
+        void connect();
+
+        return () => {
+            controller.abort();
+            clearTimeout(retryTimer);
+            setConnected(false);
+        };
+    }, [chatId, enabled, token, dispatch]);
+
+    return connected;
+};
+
+export default useChatEvents;